@@ -0,0 +1,87 @@
+"""Translator round trips for a playlist of short clips: per-file translate_srt() vs one cross-file batch.
+
+Each synthetic clip has a channel intro and outro shared by every video, and
+a few sentences of its own cut across auto-caption cues. Both paths run
+against a counting mock translator with a cold cache, and the translated
+files of the two paths must be identical.
+
+    python benchmarks/bench_batch_translation.py [--clips 60] [--cues 24] [--targets ar,fr]
+"""
+import argparse
+import filecmp
+import glob
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from common import MockTranslator
+from youtube_downloader.subtitles import write_srt
+from youtube_downloader.translation import translate_srt, translate_srt_batch
+
+WORDS = ("we take a look at the new release and how it compares with last year's model in battery life "
+         "camera quality and price").split()
+INTRO = ["hey everyone and welcome back to the channel.", "before we start make sure to subscribe."]
+OUTRO = ["thanks for watching and see you in the next one."]
+
+
+def synthetic_clip(path, cues, rng):
+    """Intro, `cues` auto-caption cues of clip-specific text, outro."""
+    texts = list(INTRO)
+    while len(texts) < len(INTRO) + cues:
+        for i in range(rng.randint(3, 6)):
+            texts.append(' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 6))) + ('.' if i == 5 else ''))
+    texts = texts[:len(INTRO) + cues] + OUTRO
+    write_srt(path, [{'start': i * 2.0, 'end': i * 2.0 + 2.0, 'text': text} for i, text in enumerate(texts)])
+
+
+def run(mode, src_dir, targets):
+    """Translate copies of the clips in `mode`; returns (translator, seconds, output folder)."""
+    work = tempfile.mkdtemp(prefix=f'bench-batch-{mode}-')
+    paths = []
+    for path in sorted(glob.glob(os.path.join(src_dir, '*.en.srt'))):
+        paths.append(shutil.copy(path, work))
+    translator = MockTranslator()
+    started = time.perf_counter()
+    if mode == 'per-file':
+        for path in paths:
+            translate_srt(path, 'en', targets, translator)
+    else:
+        translate_srt_batch([(path, 'en', targets) for path in paths], translator)
+    return translator, time.perf_counter() - started, work
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clips', type=int, default=60)
+    parser.add_argument('--cues', type=int, default=24, help="clip-specific cues per file (default: 24)")
+    parser.add_argument('--targets', default='ar,fr')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    targets = args.targets.split(',')
+    rng = random.Random(args.seed)
+    src_dir = tempfile.mkdtemp(prefix='bench-batch-src-')
+    for clip in range(args.clips):
+        synthetic_clip(os.path.join(src_dir, f'clip{clip:03d}.en.srt'), args.cues, rng)
+
+    print(f"{args.clips} clips, {args.cues} cues each, targets {', '.join(targets)}\n")
+    print(f"{'mode':<10}{'calls':>8}{'chars':>10}{'chars/call':>12}{'ms':>8}")
+    outputs = {}
+    for mode in ('per-file', 'batch'):
+        translator, elapsed, outputs[mode] = run(mode, src_dir, targets)
+        print(f"{mode:<10}{translator.calls:>8}{translator.chars:>10}"
+              f"{translator.chars / max(translator.calls, 1):>12.0f}{elapsed * 1000:>8.0f}")
+    names = sorted(os.path.basename(path) for path in glob.glob(os.path.join(outputs['per-file'], '*.srt'))
+                   if not path.endswith('.en.srt'))
+    _, mismatch, errors = filecmp.cmpfiles(outputs['per-file'], outputs['batch'], names, shallow=False)
+    print(f"\n{len(names)} translated files compared, {len(mismatch) + len(errors)} different")
+    for path in [src_dir] + list(outputs.values()):
+        shutil.rmtree(path, ignore_errors=True)
+    if mismatch or errors:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Single vs. chunked parallel MP3 encoding of a long synthetic audio track.
+
+Generates --minutes of a tone with pink noise (AAC, like a YouTube m4a
+stream) with ffmpeg, then encodes it to 192 kbit/s MP3 with the stock
+FFmpegExtractAudioPP and with ChunkedExtractAudioPP at each worker count.
+Every chunked result is decoded and compared with the single encode: the
+sample count must match exactly, and the largest error around a chunk join
+must stay within the error level of the rest of the file. Needs ffmpeg with
+libmp3lame on the PATH.
+
+    python benchmarks/bench_encode.py [--minutes 60] [--workers 2,4,8]
+"""
+import argparse
+import array
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import yt_dlp
+
+import common  # noqa: F401  (puts the package on sys.path)
+from yt_dlp.postprocessor import FFmpegExtractAudioPP
+from youtube_downloader.encoding import CHUNK_FRAMES, MP3_FRAME_ALIGN, ChunkedExtractAudioPP
+
+RATE = 44100
+
+
+def decode(path):
+    pcm = subprocess.run(['ffmpeg', '-loglevel', 'error', '-i', path, '-f', 's16le', '-ac', '1', '-ar', str(RATE),
+                          '-'], check=True, capture_output=True).stdout
+    samples = array.array('h')
+    samples.frombytes(pcm)
+    return samples
+
+
+def window_error(a, b, start, size=1152):
+    return max((abs(a[i] - b[i]) for i in range(max(0, start), min(len(a), len(b), start + size))), default=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--minutes', type=int, default=60)
+    parser.add_argument('--workers', default='2,4,8', help="comma-separated worker counts to compare")
+    args = parser.parse_args()
+    if not shutil.which('ffmpeg'):
+        raise SystemExit("ffmpeg not found on the PATH")
+
+    ydl = yt_dlp.YoutubeDL({'quiet': True})
+    workdir = tempfile.mkdtemp(prefix='bench-encode-')
+    try:
+        source = os.path.join(workdir, 'source.m4a')
+        seconds = args.minutes * 60
+        subprocess.run(['ffmpeg', '-loglevel', 'error', '-f', 'lavfi', '-i', f'sine=frequency=440:duration={seconds}',
+                        '-f', 'lavfi', '-i', f'anoisesrc=d={seconds}:c=pink:a=0.05', '-filter_complex',
+                        f'amix=inputs=2,aresample={RATE},aformat=channel_layouts=stereo', '-c:a', 'aac',
+                        '-b:a', '128k', source], check=True)
+        single = FFmpegExtractAudioPP(ydl, 'mp3', '192')
+        quality = single._quality_args('libmp3lame')
+        reference = os.path.join(workdir, 'single.mp3')
+        started = time.perf_counter()
+        single.run_ffmpeg(source, reference, 'libmp3lame', quality)
+        baseline = time.perf_counter() - started
+        expected = decode(reference)
+
+        print(f"{args.minutes} min source, {os.cpu_count()} CPUs\n")
+        print(f"{'workers':<10}{'sec':>8}{'speedup':>9}{'samples':>12}{'join err':>10}{'file err':>10}")
+        print(f"{'single':<10}{baseline:>8.1f}{1.0:>9.2f}{len(expected):>12}{'-':>10}{'-':>10}")
+        joins = range(CHUNK_FRAMES * MP3_FRAME_ALIGN, len(expected), CHUNK_FRAMES * MP3_FRAME_ALIGN)
+        for workers in (int(value) for value in args.workers.split(',')):
+            chunked = ChunkedExtractAudioPP(ydl, 'mp3', '192', workers=workers, min_size=0)
+            output = os.path.join(workdir, f'chunked-{workers}.mp3')
+            started = time.perf_counter()
+            chunked.run_ffmpeg(source, output, 'libmp3lame', quality)
+            elapsed = time.perf_counter() - started
+            result = decode(output)
+            join_error = max((window_error(result, expected, join - 576) for join in joins), default=0)
+            file_error = max(window_error(result, expected, start) for start in range(0, len(expected), 441000))
+            print(f"{workers:<10}{elapsed:>8.1f}{baseline / elapsed:>9.2f}{len(result):>12}{join_error:>10}"
+                  f"{file_error:>10}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,129 @@
+"""Peak memory of listing, planning and a download pass over a synthetic 10,000-entry channel.
+
+Each variant runs in its own process against the local media server, with
+info dicts padded to roughly YouTube size (formats, thumbnails and
+translated caption languages, see the fake extractor). "before" keeps the
+info dicts the way the downloader used to; "after" uses the ItemRecord /
+extract_flat='discard_in_playlist' paths. The download pass uses
+skip_download so it measures info dict retention, not media I/O.
+
+Peak RSS is always reported; --trace adds the tracemalloc peak of Python
+allocations, which is more precise but makes yt-dlp several times slower.
+Format selection on padded dicts costs yt-dlp ~50 ms per entry, so the
+planning and download variants take several minutes each at 10,000 entries.
+
+    python benchmarks/bench_memory.py [--entries 10000] [--only plan_after] [--trace]
+"""
+import argparse
+import contextlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PADDING = 'formats=24&thumbnails=40&caption_langs=60'
+
+VARIANTS = ('list_before', 'list_after', 'plan_before', 'plan_after', 'download_before', 'download_after')
+
+
+def config_for(link):
+    from youtube_downloader import DownloadConfig
+    return DownloadConfig.from_dict({
+        'content_type': 'channel', 'link': link, 'download_type': 'video',
+        'format_option': 'bestvideo[height<=720]+bestaudio/best[height<=720]', 'playlist_items': None,
+        'subtitle_lang': None, 'auto_subs': '1', 'translate_subtitles': False, 'target_langs': [],
+        'subtitle_output': 'separate', 'embed_subs': False,
+    })
+
+
+def run_variant(name, entries, trace=False):
+    """Run one variant in this process and return its metrics."""
+    sys.path.insert(0, BENCH_DIR)
+    import yt_dlp
+    import common  # noqa: F401  (puts the package on sys.path)
+    from media_server import MediaServer
+    from youtube_downloader import Session
+    from youtube_downloader.download import build_ydl_opts, fetch_flat_entries, run_download
+    from youtube_downloader.failures import MinimalLogger
+    from youtube_downloader.planning import plan_downloads
+
+    session = Session()
+    media = MediaServer().start()
+    os.chdir(tempfile.mkdtemp(prefix=f'bench-memory-{name}-'))
+    os.makedirs('Downloaded')
+    link = f"fake://{media.url[len('http://'):]}/channel/{entries}?size=1024&{PADDING}"
+    config = config_for(link)
+    ydl_opts = build_ydl_opts(session, config, 'Downloaded/%(uploader)s/%(title)s.%(ext)s')
+    stage, kept = name.rsplit('_', 1)
+    # Load the extractors first; importing them under tracemalloc is very slow
+    with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
+        ydl.extract_info(f"fake://{media.url[len('http://'):]}/single/warmup", download=False, process=False)
+
+    if trace:
+        tracemalloc.start()
+    started = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        if stage == 'list':
+            if kept == 'before':
+                # The flat result stayed referenced for the whole run
+                flat = {'quiet': True, 'extract_flat': True, 'logger': MinimalLogger()}
+                with yt_dlp.YoutubeDL(flat) as ydl:
+                    result = ydl.extract_info(link, download=False)
+            else:
+                result = fetch_flat_entries(session, link)
+        elif stage == 'plan':
+            if kept == 'before':
+                opts = dict(ydl_opts, logger=MinimalLogger(), progress_hooks=[])
+                opts.pop('extract_flat')
+                with yt_dlp.YoutubeDL(opts) as ydl:
+                    result = ydl.extract_info(link, download=False)
+            else:
+                result = plan_downloads(ydl_opts, link)
+        else:
+            opts = dict(ydl_opts, skip_download=True, progress_hooks=[])
+            if kept == 'before':
+                opts.pop('extract_flat')
+            result = run_download(session, config, opts, [link], reserve_bytes=0)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1] if trace else None
+    tracemalloc.stop()
+    del result
+    return {
+        'seconds': round(elapsed, 2),
+        'traced_peak_mb': peak and round(peak / 1024 ** 2, 1),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--entries', type=int, default=10000)
+    parser.add_argument('--variant', choices=VARIANTS, help="run one variant in-process and print JSON")
+    parser.add_argument('--only', action='append', choices=VARIANTS, help="limit the run to these variants")
+    parser.add_argument('--trace', action='store_true', help="also report the tracemalloc peak (slow)")
+    args = parser.parse_args()
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.entries, args.trace)))
+        return
+
+    print(f"{args.entries} entries, padded info dicts ({PADDING})\n")
+    print(f"{'variant':<18}{'sec':>8}{'traced peak MB':>16}{'peak RSS MB':>13}")
+    for name in args.only or VARIANTS:
+        command = [sys.executable, os.path.abspath(__file__), '--variant', name, '--entries', str(args.entries)]
+        proc = subprocess.run(command + (['--trace'] if args.trace else []), capture_output=True, text=True,
+                              cwd=BENCH_DIR)
+        if proc.returncode:
+            raise SystemExit(f"{name} failed:\n{proc.stderr[-2000:]}")
+        m = json.loads(proc.stdout.strip().splitlines()[-1])
+        traced = f"{m['traced_peak_mb']:.1f}" if m['traced_peak_mb'] is not None else '-'
+        print(f"{name:<18}{m['seconds']:>8.1f}{traced:>16}{m['peak_rss_mb']:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,231 @@
+"""Offline end-to-end benchmark suite for the download and subtitle pipelines.
+
+Everything runs locally: media_server.py serves synthetic media and captions
+(with latency and per-connection throttling), the yt_dlp_plugins/ fake
+extractor turns fake:// URLs into single, playlist and channel info dicts,
+and mock_translate_server.py answers translation requests. The downloader
+itself runs unmodified.
+
+Each scenario runs in its own subprocess so peak RSS is per scenario. The
+suite reports throughput, latency percentiles and peak RSS, compares them
+with baselines.json and exits non-zero when a metric regresses by more than
+the tolerance.
+
+    python benchmarks/bench_offline.py                     # run and compare
+    python benchmarks/bench_offline.py --save-baseline     # record baselines.json
+    python benchmarks/bench_offline.py --scenario single   # one scenario, JSON output
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(BENCH_DIR, 'baselines.json')
+
+# Shared server settings; sizes are kept small so the whole suite takes well under a minute
+SERVER = {'latency': 0.01, 'throttle': 40 * 1024 ** 2, 'translate_latency': 0.02}
+
+SCENARIOS = {
+    'single': {'content_type': 'single', 'path': 'single/solo', 'size': 48 * 1024 ** 2, 'subs': False},
+    'playlist_subs': {'content_type': 'playlist', 'path': 'playlist/20', 'size': 2 * 1024 ** 2, 'subs': True,
+                      'cues': 600, 'targets': ['ar', 'fr']},
+    'playlist_short': {'content_type': 'playlist', 'path': 'playlist/60', 'size': 256 * 1024, 'subs': True,
+                       'cues': 20, 'targets': ['ar', 'fr']},
+    'channel_async': {'content_type': 'channel', 'path': 'channel/20', 'size': 2 * 1024 ** 2, 'subs': True,
+                      'cues': 600, 'targets': ['ar', 'fr'], 'async': True},
+    'translate_large': {'translate_only': True, 'cues': 3600, 'targets': ['ar', 'fr', 'de']},
+}
+
+# name -> True when higher is better
+METRICS = {'items_per_s': True, 'mb_per_s': True, 'item_p90_s': False, 'translate_p90_ms': False,
+           'peak_rss_mb': False}
+
+
+class ItemTimer:
+    """Progress hook recording first-byte-to-finished time per video ID."""
+    def __init__(self):
+        self.started = {}
+        self.finished = {}
+
+    def __call__(self, d):
+        video_id = (d.get('info_dict') or {}).get('id')
+        if video_id is None:
+            return  # Subtitle downloads report a bare format dict
+        now = time.perf_counter()
+        self.started.setdefault(video_id, now)
+        if d['status'] == 'finished':
+            self.finished[video_id] = now
+
+    def durations(self):
+        return [self.finished[k] - self.started[k] for k in self.finished]
+
+
+def timed_client(url):
+    """TranslatorClient that records the latency of every request."""
+    from youtube_downloader import TranslatorClient
+
+    class TimedTranslatorClient(TranslatorClient):
+        latencies = []
+
+        def translate(self, text, src='auto', dest='en'):
+            started = time.perf_counter()
+            try:
+                return super().translate(text, src, dest)
+            finally:
+                self.latencies.append(time.perf_counter() - started)
+
+    return TimedTranslatorClient(url, pool_size=4, timeout=10.0, rate=1e9)  # Pace only through the server latency
+
+
+def scenario_config(spec, link):
+    from youtube_downloader import DownloadConfig
+    return DownloadConfig.from_dict({
+        'content_type': spec['content_type'],
+        'link': link,
+        'download_type': 'video',
+        'format_option': 'bestvideo[height<=720]+bestaudio/best[height<=720]',
+        'playlist_items': None,
+        'subtitle_lang': 'en' if spec['subs'] else None,
+        'auto_subs': '1',
+        'translate_subtitles': bool(spec.get('targets')),
+        'target_langs': spec.get('targets', []),
+        'subtitle_output': 'separate',
+        'embed_subs': False,
+    })
+
+
+def run_scenario(name):
+    """Run one scenario in this process (cwd = a temp dir) and return its metrics."""
+    sys.path.insert(0, BENCH_DIR)
+    from common import summarize
+    from media_server import MediaServer, synthetic_captions
+    from mock_translate_server import MockTranslateServer
+    from youtube_downloader import Session
+    from youtube_downloader.download import build_output_template, build_ydl_opts, run_download, translate_deferred
+    from youtube_downloader.pipeline import AsyncPipeline
+    from youtube_downloader.subtitles import clean_srt_duplicates
+    from youtube_downloader.translation import translate_srt
+
+    spec = SCENARIOS[name]
+    media = MediaServer(latency=SERVER['latency'], throttle=SERVER['throttle']).start()
+    translate = MockTranslateServer(latency=SERVER['translate_latency']).start()
+    client = timed_client(translate.url)
+    session = Session(translator=client)
+    os.chdir(tempfile.mkdtemp(prefix=f'bench-{name}-'))
+    os.makedirs('Downloaded')
+    timer = ItemTimer()
+
+    started = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        if spec.get('translate_only'):
+            path = 'long.en.srt'
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(synthetic_captions('long', spec['cues']))
+            clean_srt_duplicates(path)
+            translate_srt(path, 'en', spec['targets'], client)
+            items = len(spec['targets'])
+        else:
+            host = media.url[len('http://'):]
+            link = f"fake://{host}/{spec['path']}?size={spec['size']}&cues={spec.get('cues', 300)}"
+            config = scenario_config(spec, link)
+            template, entries = build_output_template(session, config)
+            ydl_opts = build_ydl_opts(session, config, template)
+            ydl_opts['progress_hooks'] = ydl_opts['progress_hooks'] + [timer]
+            if spec.get('async'):
+                pipeline = AsyncPipeline(session, config, ydl_opts, reserve_bytes=0)
+                failures = asyncio.run(pipeline.run())
+            else:
+                deferred = []  # Translated after the pass in one cross-file batch, as Session.download does
+                failures = run_download(session, config, ydl_opts, [link], reserve_bytes=0, deferred=deferred)
+                translate_deferred(session, config, deferred)
+            if failures:
+                raise RuntimeError(f"{name}: {len(failures)} item(s) failed: {list(failures.values())[:1]}")
+            items = len(timer.finished)
+    elapsed = time.perf_counter() - started
+
+    item_stats = summarize(timer.durations()) if timer.durations() else None
+    translate_stats = summarize(client.latencies) if client.latencies else None
+    return {
+        'seconds': round(elapsed, 3),
+        'items': items,
+        'items_per_s': round(items / elapsed, 2),
+        'mb_per_s': round(media.stats['bytes'] / 1024 ** 2 / elapsed, 2),
+        'item_p50_s': item_stats and round(item_stats['p50'], 3),
+        'item_p90_s': item_stats and round(item_stats['p90'], 3),
+        'translate_requests': len(client.latencies),
+        'translate_p50_ms': translate_stats and round(translate_stats['p50'] * 1000, 1),
+        'translate_p90_ms': translate_stats and round(translate_stats['p90'] * 1000, 1),
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def run_in_subprocess(name):
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), '--scenario', name],
+                          capture_output=True, text=True, cwd=BENCH_DIR)
+    if proc.returncode:
+        raise RuntimeError(f"scenario {name} failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baselines, tolerance):
+    """Return human-readable regressions beyond the tolerance."""
+    regressions = []
+    for name, metrics in results.items():
+        for metric, higher_is_better in METRICS.items():
+            old, new = (baselines.get(name) or {}).get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append(f"{name}.{metric}: {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scenario', choices=SCENARIOS, help="run one scenario in-process and print JSON")
+    parser.add_argument('--only', action='append', choices=SCENARIOS, help="limit the suite to these scenarios")
+    parser.add_argument('--save-baseline', action='store_true', help=f"write results to {BASELINE_FILE}")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="allowed relative regression before a metric is flagged (default: 0.2)")
+    args = parser.parse_args()
+
+    if args.scenario:
+        print(json.dumps(run_scenario(args.scenario)))
+        return
+
+    results = {name: run_in_subprocess(name) for name in (args.only or SCENARIOS)}
+    print(f"{'scenario':<17}{'sec':>7}{'items/s':>9}{'MB/s':>8}{'item p50':>10}{'item p90':>10}"
+          f"{'tr req':>8}{'tr p90 ms':>11}{'RSS MB':>8}")
+    for name, m in results.items():
+        print(f"{name:<17}{m['seconds']:>7.2f}{m['items_per_s']:>9.2f}{m['mb_per_s']:>8.1f}"
+              f"{m['item_p50_s'] or 0:>10.3f}{m['item_p90_s'] or 0:>10.3f}"
+              f"{m['translate_requests']:>8}{m['translate_p90_ms'] or 0:>11.1f}{m['peak_rss_mb']:>8.1f}")
+
+    if args.save_baseline:
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaselines saved to {BASELINE_FILE}")
+        return
+    if not os.path.exists(BASELINE_FILE):
+        print("\nNo baselines.json yet; run with --save-baseline to record one.")
+        return
+    with open(BASELINE_FILE, 'r', encoding='utf-8') as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    if regressions:
+        print(f"\nRegressions beyond {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.tolerance:.0%} against {BASELINE_FILE}.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""Count translator calls and characters before and after sentence reflow.
+
+Runs the three strategies on caption files (or a synthetic auto-caption track
+when none are given) against a counting mock translator:
+
+  legacy   - the previous translate_srt: fixed batches of 10 cues
+  packed   - cue-level segments packed into full-size requests (reflow=False)
+  reflow   - sentences joined across cues, packed into full-size requests
+
+"segments" is the number of independent pieces of text the translator sees;
+fewer, complete sentences are what improves translation quality.
+
+    python benchmarks/bench_reflow.py [captions.en.srt ...]
+"""
+import argparse
+import os
+import random
+import tempfile
+
+from common import MockTranslator
+from youtube_downloader.subtitles import parse_srt, write_srt
+from youtube_downloader.translation import reflow_sentences, translate_cues
+
+WORDS = ("so today we are going to look at how the pipeline handles long recordings and what "
+         "happens when the network drops in the middle of a download because that is where "
+         "most of the time goes").split()
+
+
+def synthetic_captions(path, minutes=30, seed=1):
+    """Write an auto-caption style SRT: sentences cut across 3-6 short cues."""
+    rng = random.Random(seed)
+    cues, clock = [], 0.0
+    while clock < minutes * 60:
+        for _ in range(rng.randint(3, 6)):
+            words = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 6)))
+            cues.append({'start': clock, 'end': clock + 2.0, 'text': words})
+            clock += 2.0
+        cues[-1]['text'] += '.'
+    write_srt(path, cues)
+    return path
+
+
+def legacy_calls(cues, translator, batch_size=10):
+    for i in range(0, len(cues), batch_size):
+        translator.translate('\n\n'.join(c['text'] for c in cues[i:i + batch_size]), src='en', dest='ar')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('files', nargs='*', help="recorded .srt caption files")
+    args = parser.parse_args()
+
+    files = args.files or [synthetic_captions(os.path.join(tempfile.mkdtemp(), 'synthetic.en.srt'))]
+
+    print(f"{'file':<28}{'cues':>7}{'strategy':>10}{'segments':>10}{'calls':>8}{'chars':>10}")
+    for path in files:
+        cues = parse_srt(path)
+        for strategy in ('legacy', 'packed', 'reflow'):
+            translator = MockTranslator()  # Fresh cache: measure each strategy cold
+            if strategy == 'legacy':
+                legacy_calls(cues, translator)
+                segments = len(cues)
+            else:
+                translate_cues(cues, 'en', 'ar', translator, reflow=strategy == 'reflow')
+                segments = len(reflow_sentences(cues)) if strategy == 'reflow' else len(cues)
+            print(f"{os.path.basename(path)[:27]:<28}{len(cues):>7}{strategy:>10}{segments:>10}"
+                  f"{translator.calls:>8}{translator.chars:>10}")
+
+
+if __name__ == '__main__':
+    main()
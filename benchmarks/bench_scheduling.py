@@ -0,0 +1,69 @@
+"""Compare completion-time distributions of the queue ordering policies.
+
+The queue is synthetic: mostly short videos with a few multi-hour streams, some
+of them at the front of the playlist. Bitrates differ per item (static talks
+next to 4K footage), and each item's size is what format selection would
+report. Each item "downloads" at a fixed speed, so the completion time of an
+item is the sum of the sizes before it.
+
+    python benchmarks/bench_scheduling.py [--items 200] [--speed 5] [--seed 1]
+"""
+import argparse
+import random
+
+from common import summarize
+from youtube_downloader import DownloadConfig
+from youtube_downloader.planning import ORDER_POLICIES, ItemRecord, order_entries
+
+
+def synthetic_queue(count, rng):
+    entries = []
+    for index in range(1, count + 1):
+        if index <= 2 or rng.random() < 0.04:
+            duration = rng.randint(2 * 3600, 4 * 3600)  # Livestream archive
+        elif rng.random() < 0.2:
+            duration = rng.randint(20 * 60, 60 * 60)
+        else:
+            duration = rng.randint(60, 15 * 60)
+        mbps = rng.choice((0.3, 1.0, 2.5, 5.0, 5.0, 12.0))  # Slides and talks up to 4K footage
+        entries.append(ItemRecord(index, f'vid{index:05d}', f'Video {index}', duration,
+                                  size=int(duration * mbps * 1e6 / 8)))
+    # A few items the operator wants first
+    priorities = {e.id: 10 for e in rng.sample(entries, max(1, count // 20))}
+    return entries, priorities
+
+
+def completion_times(ordered, speed):
+    clock, done = 0.0, []
+    for entry in ordered:
+        clock += entry.size / (speed * 1024 ** 2)
+        done.append(clock)
+    return done
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--items', type=int, default=200)
+    parser.add_argument('--speed', type=float, default=5.0, help="download speed in MB/s")
+    parser.add_argument('--fairness-interval', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    config = DownloadConfig(format_option='bestvideo[height<=1080]+bestaudio/best[height<=1080]')
+    entries, priorities = synthetic_queue(args.items, random.Random(args.seed))
+
+    print(f"{'policy':<22}{'mean':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}{'done/1h':>9}  (minutes)")
+    runs = [(policy, args.fairness_interval) for policy in ORDER_POLICIES]
+    runs.insert(2, ('shortest', 0))
+    for policy, fairness in runs:
+        ordered = order_entries(entries, policy, config, priorities, fairness)
+        times = completion_times(ordered, args.speed)
+        stats = {k: v / 60 for k, v in summarize(times).items()}
+        first_hour = sum(1 for t in times if t <= 3600)
+        label = f"{policy} (fair={fairness})" if policy != 'index' else policy
+        print(f"{label:<22}{stats['mean']:>9.1f}{stats['p50']:>9.1f}{stats['p90']:>9.1f}"
+              f"{stats['p99']:>9.1f}{stats['max']:>9.1f}{first_hour:>9}")
+
+
+if __name__ == '__main__':
+    main()
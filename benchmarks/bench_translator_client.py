@@ -0,0 +1,77 @@
+"""Latency and throughput of the pooled translator client against the mock server.
+
+Sends the same batch of requests from a worker pool twice: once opening a new
+connection per request (the old behaviour), once through the keep-alive pool.
+A per-connection delay on the server stands in for the TCP/TLS handshake that
+keep-alive avoids.
+
+    python benchmarks/bench_translator_client.py [--requests 200] [--workers 4]
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from common import summarize
+from mock_translate_server import MockTranslateServer
+from youtube_downloader import TranslatorClient
+
+
+def run_threads(client, texts, workers):
+    latencies = []
+
+    def one(text):
+        started = time.perf_counter()
+        client.translate(text, src='en', dest='ar')
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(one, texts))
+    return time.perf_counter() - started, latencies
+
+
+def run_async(client, texts, workers):
+    latencies = []
+
+    async def one(text, slots):
+        async with slots:
+            started = time.perf_counter()
+            await client.translate_async(text, src='en', dest='ar')
+            latencies.append(time.perf_counter() - started)
+
+    async def all_requests():
+        slots = asyncio.Semaphore(workers)
+        await asyncio.gather(*(one(text, slots) for text in texts))
+
+    started = time.perf_counter()
+    asyncio.run(all_requests())
+    return time.perf_counter() - started, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--latency', type=float, default=0.02, help="server seconds per request")
+    parser.add_argument('--connect-latency', type=float, default=0.03, help="server seconds per new connection")
+    args = parser.parse_args()
+
+    texts = [f"caption line {i}\nsecond line {i}" for i in range(args.requests)]
+
+    print(f"{'mode':<22}{'conns':>7}{'req/s':>9}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}")
+    for name, keep_alive, runner in (('new connection', False, run_threads),
+                                     ('keep-alive pool', True, run_threads),
+                                     ('keep-alive pool async', True, run_async)):
+        server = MockTranslateServer(latency=args.latency, connect_latency=args.connect_latency).start()
+        client = TranslatorClient(server.url, pool_size=args.workers, timeout=5.0, keep_alive=keep_alive)
+        elapsed, latencies = runner(client, texts, args.workers)
+        client.close()
+        server.shutdown()
+        stats = summarize(latencies)
+        print(f"{name:<22}{server.stats['connections']:>7}{len(texts) / elapsed:>9.1f}"
+              f"{stats['p50'] * 1000:>9.1f}{stats['p90'] * 1000:>9.1f}{stats['p99'] * 1000:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
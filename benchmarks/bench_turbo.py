@@ -0,0 +1,82 @@
+"""Single-connection vs. turbo (segmented range) downloads against the throttled media server.
+
+The media server caps every connection at --throttle bytes/s, like a CDN that
+throttles per connection. Each run downloads the same synthetic single video
+through the downloader's run_download() and checks the result byte for byte.
+
+    python benchmarks/bench_turbo.py [--size-mb 128] [--throttle-mb 8] [--connections 1,4,8]
+"""
+import argparse
+import contextlib
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+
+import common  # noqa: F401  (puts the package on sys.path)
+from media_server import MediaServer
+from youtube_downloader import DownloadConfig, Session
+from youtube_downloader.download import build_output_template, build_ydl_opts, run_download
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 ** 2), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def run_once(session, media, size, connections):
+    workdir = tempfile.mkdtemp(prefix='bench-turbo-')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        os.makedirs('Downloaded')
+        link = f"fake://{media.url[len('http://'):]}/single/turbo?size={size}"
+        config = DownloadConfig(link=link, format_option='best', turbo=connections if connections > 1 else 0)
+        template, _ = build_output_template(session, config)
+        ydl_opts = build_ydl_opts(session, config, template)
+        before = dict(media.stats)
+        started = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            failures = run_download(session, config, ydl_opts, [link], reserve_bytes=0)
+        elapsed = time.perf_counter() - started
+        if failures:
+            raise RuntimeError(f"download failed: {list(failures.values())[0]['message']}")
+        path = os.path.join('Downloaded', 'Video turbo.mp4')
+        return {
+            'seconds': elapsed,
+            'mb_per_s': size / 1024 ** 2 / elapsed,
+            'requests': media.stats['requests'] - before['requests'],
+            'digest': file_digest(path),
+        }
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=int, default=128)
+    parser.add_argument('--throttle-mb', type=float, default=8.0, help="per-connection cap in MB/s (default: 8)")
+    parser.add_argument('--latency', type=float, default=0.02)
+    parser.add_argument('--connections', default='1,4,8', help="comma-separated values to compare (1 = off)")
+    args = parser.parse_args()
+
+    session = Session()
+    media = MediaServer(latency=args.latency, throttle=int(args.throttle_mb * 1024 ** 2)).start()
+    size = args.size_mb * 1024 ** 2
+    print(f"{args.size_mb} MB file, {args.throttle_mb} MB/s per connection, {args.latency * 1000:.0f} ms latency\n")
+    print(f"{'connections':<13}{'sec':>8}{'MB/s':>9}{'requests':>10}  same bytes")
+    reference = None
+    for connections in (int(value) for value in args.connections.split(',')):
+        result = run_once(session, media, size, connections)
+        reference = reference or result['digest']
+        print(f"{connections:<13}{result['seconds']:>8.2f}{result['mb_per_s']:>9.1f}{result['requests']:>10}"
+              f"  {'yes' if result['digest'] == reference else 'NO'}")
+
+
+if __name__ == '__main__':
+    main()
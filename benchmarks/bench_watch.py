@@ -0,0 +1,91 @@
+"""Watch mode against the local feed server: polling cost per round and exactly-once new uploads.
+
+Round 1 polls every channel for the first time and only records what is
+already there. Before round 2, --new uploads are published to random channels
+and --failing channels start answering 503; round 2 must download exactly the
+uploads of the healthy channels. Round 3 has no changes: every healthy feed
+should come back 304 Not Modified, and the failing channels stay in backoff.
+
+    python benchmarks/bench_watch.py [--channels 2000] [--new 25] [--failing 20] [--workers 16]
+"""
+import argparse
+import contextlib
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import common  # noqa: F401  (puts the package on sys.path)
+from feed_server import FeedServer
+from media_server import MediaServer
+from youtube_downloader import DownloadConfig, Session
+from youtube_downloader.download import build_output_template, build_ydl_opts
+from youtube_downloader.watch import FeedPoller, WatchState, watch_round
+
+
+def count_files(root):
+    return sum(len([name for name in files if name.endswith('.mp4')]) for _, _, files in os.walk(root))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--channels', type=int, default=2000)
+    parser.add_argument('--new', type=int, default=25, help="uploads published before round 2 (default: 25)")
+    parser.add_argument('--failing', type=int, default=20, help="channels answering 503 from round 2 (default: 20)")
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0.01)
+    args = parser.parse_args()
+
+    media = MediaServer().start()
+    feeds = FeedServer(channels=args.channels, media_host=media.url[len('http://'):], latency=args.latency).start()
+    rng = random.Random(7)
+    channel_ids = list(feeds.channels)
+
+    workdir = tempfile.mkdtemp(prefix='bench-watch-')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        os.makedirs('Downloaded')
+        config = DownloadConfig(content_type='channel', format_option='best', auto_subs=False)
+        session = Session()
+        template, _ = build_output_template(session, config)
+        ydl_opts = build_ydl_opts(session, config, template)
+        state = WatchState()
+        poller = FeedPoller(feeds.feed_url)
+
+        print(f"{args.channels} channels, {args.workers} workers, {args.latency * 1000:.0f} ms latency\n")
+        print(f"{'round':<8}{'sec':>7}{'polled':>8}{'304':>7}{'errors':>8}{'KB in':>8}{'new':>6}{'files':>7}")
+        expected = 0
+        with ThreadPoolExecutor(max_workers=args.workers) as pool:
+            for round_number in (1, 2, 3):
+                if round_number == 2:
+                    failing = set(rng.sample(channel_ids, args.failing))
+                    healthy = [cid for cid in channel_ids if cid not in failing]
+                    for cid in rng.choices(healthy, k=args.new):
+                        feeds.publish(cid)
+                        expected += 1
+                    feeds.failing = failing
+                before = dict(feeds.stats)
+                started = time.perf_counter()
+                with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                    counts = watch_round(session, config, ydl_opts, channel_ids, state, poller, pool, interval=0,
+                                         reserve_bytes=0, max_retry_passes=0)
+                elapsed = time.perf_counter() - started
+                files = count_files('Downloaded')
+                print(f"{round_number:<8}{elapsed:>7.2f}{counts['polled']:>8}"
+                      f"{feeds.stats['not_modified'] - before['not_modified']:>7}{counts['errors']:>8}"
+                      f"{(feeds.stats['bytes'] - before['bytes']) / 1024:>8.0f}{counts['new']:>6}{files:>7}")
+                if files != expected:
+                    raise SystemExit(f"expected {expected} downloaded file(s), found {files}")
+        state.close()
+        session.close()
+        print(f"\n{feeds.stats['connections']} connections for {feeds.stats['requests']} feed requests")
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
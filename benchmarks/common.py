@@ -0,0 +1,54 @@
+"""Shared helpers for the offline benchmarks."""
+import os
+import statistics
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)  # The youtube_downloader package
+
+from youtube_downloader.translation import RateLimiter, TranslationCache  # noqa: E402
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty sequence."""
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def summarize(values):
+    return {
+        'mean': statistics.fmean(values),
+        'p50': percentile(values, 50),
+        'p90': percentile(values, 90),
+        'p99': percentile(values, 99),
+        'max': max(values),
+    }
+
+
+class _Translated:
+    def __init__(self, text):
+        self.text = text
+
+
+class MockTranslator:
+    """Stands in for a TranslatorClient: counts requests and characters, optional latency.
+
+    Like the real client it carries a cache (fresh per instance, so every
+    measurement starts cold) and an unpaced rate limiter.
+    """
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self.chars = 0
+        self.cache = TranslationCache()
+        self.limiter = RateLimiter(rate=1e9)
+
+    def translate(self, text, src='auto', dest='en'):
+        import time
+        self.calls += 1
+        self.chars += len(text)
+        if self.latency:
+            time.sleep(self.latency)
+        return _Translated('\n'.join(f"[{dest}] {line}" if line else line for line in text.split('\n')))
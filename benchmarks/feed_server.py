@@ -0,0 +1,170 @@
+"""Local stand-in for YouTube's per-channel Atom feeds, for the watch mode benchmark.
+
+Serves `GET /feeds/videos.xml?channel_id=<id>` for synthetic channels with the
+15 latest uploads, an ETag and a Last-Modified header, and answers conditional
+requests with 304 Not Modified. `publish()` adds an upload to a channel and
+`failing` makes chosen channels answer 503 with a Retry-After header. Entry
+links point at the media server's fake:// videos when `media_host` is set.
+
+    python benchmarks/feed_server.py --port 8766 --channels 1000
+    python "v2/Youtube Downloader.py" --watch channels.txt --feed-url "http://127.0.0.1:8766/feeds/videos.xml?channel_id={channel_id}"
+"""
+import argparse
+import gzip
+import threading
+import time
+import urllib.parse
+from email.utils import formatdate, parsedate_to_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from xml.sax.saxutils import escape
+
+FEED_SIZE = 15  # YouTube feeds list the 15 latest uploads
+
+
+def channel_id(number):
+    return f"UC{number:022d}"
+
+
+def render_feed(channel, uploads, media_host):
+    entries = []
+    for video_id, published in reversed(uploads[-FEED_SIZE:]):
+        href = (f"fake://{media_host}/single/{video_id}?size=65536&cues=20" if media_host
+                else f"https://www.youtube.com/watch?v={video_id}")
+        stamp = time.strftime('%Y-%m-%dT%H:%M:%S+00:00', time.gmtime(published))
+        entries.append(
+            f"<entry><id>yt:video:{video_id}</id><yt:videoId>{video_id}</yt:videoId>"
+            f"<yt:channelId>{channel}</yt:channelId><title>{escape(f'Video {video_id}')}</title>"
+            f"<link rel=\"alternate\" href=\"{escape(href)}\"/>"
+            f"<author><name>Channel {channel}</name></author>"
+            f"<published>{stamp}</published><updated>{stamp}</updated>"
+            f"<media:group><media:title>{escape(f'Video {video_id}')}</media:title>"
+            f"<media:description>{'Synthetic upload description. ' * 20}</media:description></media:group>"
+            f"</entry>")
+    return ('<?xml version="1.0" encoding="UTF-8"?>'
+            '<feed xmlns:yt="http://www.youtube.com/xml/schemas/2015" '
+            'xmlns:media="http://search.yahoo.com/mrss/" xmlns="http://www.w3.org/2005/Atom">'
+            f"<title>Channel {channel}</title>{''.join(entries)}</feed>").encode('utf-8')
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.count('connections')
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        channel = dict(urllib.parse.parse_qsl(url.query)).get('channel_id')
+        self.server.count('requests')
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if url.path != '/feeds/videos.xml' or channel not in self.server.channels:
+            self.send_error(404)
+            return
+        if channel in self.server.failing:
+            self.server.count('errors')
+            self.send_response(503)
+            self.send_header('Retry-After', '120')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        with self.server.lock:
+            uploads = list(self.server.channels[channel])
+        etag = f'"{channel}-{len(uploads)}"'
+        last_modified = formatdate(uploads[-1][1], usegmt=True)
+        since = self.headers.get('If-Modified-Since')
+        if self.headers.get('If-None-Match') == etag or (
+                since and 'If-None-Match' not in self.headers
+                and parsedate_to_datetime(since).timestamp() >= int(uploads[-1][1])):
+            self.server.count('not_modified')
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        body = render_feed(channel, uploads, self.server.media_host)
+        gzipped = 'gzip' in self.headers.get('Accept-Encoding', '')
+        if gzipped:
+            body = gzip.compress(body)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/atom+xml; charset=UTF-8')
+        self.send_header('ETag', etag)
+        self.send_header('Last-Modified', last_modified)
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.count('bytes', len(body))
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FeedServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), channels=100, media_host=None, latency=0.0):
+        super().__init__(address, FeedHandler)
+        self.media_host = media_host
+        self.latency = latency
+        self.failing = set()
+        self.lock = threading.Lock()
+        started = time.time() - 86400
+        # Every channel starts with FEED_SIZE uploads, one an hour
+        self.channels = {
+            channel_id(n): [(f"c{n:05d}-{i:04d}", started + i * 3600) for i in range(FEED_SIZE)]
+            for n in range(channels)
+        }
+        self.stats = {'connections': 0, 'requests': 0, 'not_modified': 0, 'errors': 0, 'bytes': 0}
+
+    def count(self, key, amount=1):
+        with self.lock:
+            self.stats[key] += amount
+
+    def publish(self, channel):
+        """Add a new upload to `channel` and return its video ID."""
+        with self.lock:
+            uploads = self.channels[channel]
+            video_id = f"c{channel[-5:]}-{len(uploads):04d}"
+            uploads.append((video_id, max(time.time(), uploads[-1][1] + 1)))
+        return video_id
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def feed_url(self):
+        return f"{self.url}/feeds/videos.xml?channel_id={{channel_id}}"
+
+    def start(self):
+        """Serve from a daemon thread and return self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--channels', type=int, default=1000)
+    parser.add_argument('--media-host', help="host:port of media_server.py for fake:// entry links")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds before each response (default: 0)")
+    parser.add_argument('--write-list', metavar='FILE', help="write the channel IDs to FILE for --watch")
+    args = parser.parse_args()
+    server = FeedServer((args.host, args.port), args.channels, args.media_host, args.latency)
+    if args.write_list:
+        with open(args.write_list, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(server.channels) + '\n')
+    print(f"Feed server listening on {server.feed_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
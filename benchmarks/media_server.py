@@ -0,0 +1,183 @@
+"""Local HTTP server with synthetic media and caption files for offline benchmarks.
+
+Routes (all content is generated deterministically from the path, nothing on disk):
+
+    /media/<id>.mp4?size=BYTES          synthetic media, supports Range / HEAD
+    /subs/<id>.<lang>.srt?cues=N        synthetic SRT captions
+    /subs/<id>.<lang>.vtt?cues=N        the same captions as WebVTT
+
+`latency` delays every response (time to first byte); `throttle` caps each
+connection at that many bytes per second (0 = unlimited).
+
+    python benchmarks/media_server.py --port 8765 --latency 0.02 --throttle 20000000
+"""
+import argparse
+import random
+import re
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CHUNK = 64 * 1024
+CAPTION_WORDS = ("so today we are going to look at how the pipeline handles long recordings and what "
+                 "happens when the network drops in the middle of a download because that is where "
+                 "most of the time goes").split()
+
+
+def media_block(video_id):
+    """A CHUNK-sized block derived from the ID; media bytes repeat it."""
+    rng = random.Random(video_id)
+    return bytes(rng.getrandbits(8) for _ in range(256)) * (CHUNK // 256)
+
+
+def timestamp(seconds, sep):
+    millis = round(seconds * 1000)
+    return f"{millis // 3600000:02d}:{millis // 60000 % 60:02d}:{millis // 1000 % 60:02d}{sep}{millis % 1000:03d}"
+
+
+def synthetic_captions(video_id, cues, vtt=False):
+    """Auto-caption style text: sentences cut across 3-6 cues of 2 seconds, with rolling duplicates."""
+    rng = random.Random(video_id)
+    blocks, clock, previous = [], 0.0, ''
+    while len(blocks) < cues:
+        for i in range(rng.randint(3, 6)):
+            words = ' '.join(rng.choice(CAPTION_WORDS) for _ in range(rng.randint(3, 6)))
+            if i == 5:
+                words += '.'
+            text = f"{previous}\n{words}" if previous else words
+            sep = '.' if vtt else ','
+            number = '' if vtt else f"{len(blocks) + 1}\n"
+            blocks.append(f"{number}{timestamp(clock, sep)} --> {timestamp(clock + 2, sep)}\n{text}\n")
+            clock += 2.0
+            previous = words
+    body = '\n'.join(blocks[:cues])
+    return ("WEBVTT\n\n" + body) if vtt else body
+
+
+class MediaHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        self.server.count('connections')
+
+    def do_HEAD(self):
+        self.handle_request(head=True)
+
+    def do_GET(self):
+        self.handle_request(head=False)
+
+    def handle_request(self, head):
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        self.server.count('requests')
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        media = re.fullmatch(r'/media/([\w-]+)\.(mp4|m4a|webm)', url.path)
+        subs = re.fullmatch(r'/subs/([\w-]+)\.([\w-]+)\.(srt|vtt)', url.path)
+        if media:
+            self.send_media(media.group(1), int(query.get('size', 1024 * 1024)), head)
+        elif subs:
+            body = synthetic_captions(subs.group(1), int(query.get('cues', 300)), subs.group(3) == 'vtt')
+            self.send_bytes(body.encode('utf-8'), 'text/plain; charset=utf-8', head)
+        else:
+            self.send_error(404)
+
+    def send_bytes(self, body, content_type, head):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+            self.server.count('bytes', len(body))
+
+    def send_media(self, video_id, size, head):
+        start, end = 0, size - 1
+        match = re.fullmatch(r'bytes=(\d*)-(\d*)', self.headers.get('Range', ''))
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), size - 1) if match.group(2) else size - 1
+            else:
+                start = max(0, size - int(match.group(2)))
+            if start >= size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{size}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.end_headers()
+        if head:
+            return
+        block = media_block(video_id)
+        position, started = start, time.monotonic()
+        try:
+            while position <= end:
+                offset = position % CHUNK
+                piece = block[offset:offset + min(CHUNK - offset, end - position + 1)]
+                self.wfile.write(piece)
+                position += len(piece)
+                self.server.count('bytes', len(piece))
+                if self.server.throttle:
+                    ahead = (position - start) / self.server.throttle - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # The client stopped reading (e.g. a cancelled range)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MediaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), latency=0.0, throttle=0):
+        super().__init__(address, MediaHandler)
+        self.latency = latency
+        self.throttle = throttle
+        self.stats = {'connections': 0, 'requests': 0, 'bytes': 0}
+        self._lock = threading.Lock()
+
+    def count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve from a daemon thread and return self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.02, help="seconds before each response (default: 0.02)")
+    parser.add_argument('--throttle', type=int, default=0, help="bytes/s per connection, 0 = unlimited")
+    args = parser.parse_args()
+    server = MediaServer((args.host, args.port), args.latency, args.throttle)
+    print(f"Media server listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
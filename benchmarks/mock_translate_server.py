@@ -0,0 +1,94 @@
+"""Local LibreTranslate-compatible translation server for offline benchmarks.
+
+Answers `POST /translate` with every line prefixed by `[target]` after a
+configurable delay (plus an optional per-connection delay standing in for the
+TCP/TLS handshake), and counts requests and TCP connections so keep-alive reuse
+is visible. Run standalone and point the downloader at it:
+
+    python benchmarks/mock_translate_server.py --port 5055 --latency 0.05
+    python "v2/Youtube Downloader.py" --translator-url http://127.0.0.1:5055
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class MockTranslateHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep connections open between requests
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+    def setup(self):
+        super().setup()
+        self.server.count('connections')
+        if self.server.connect_latency:
+            time.sleep(self.server.connect_latency)
+
+    def do_POST(self):
+        if self.path.rstrip('/') != '/translate':
+            self.send_error(404)
+            return
+        length = int(self.headers.get('Content-Length', 0))
+        request = json.loads(self.rfile.read(length))
+        self.server.count('requests')
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        text = '\n'.join(f"[{request['target']}] {line}" if line else line
+                         for line in request['q'].split('\n'))
+        body = json.dumps({'translatedText': text}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class MockTranslateServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address=('127.0.0.1', 0), latency=0.0, connect_latency=0.0):
+        super().__init__(address, MockTranslateHandler)
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.stats = {'connections': 0, 'requests': 0}
+        self._lock = threading.Lock()
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve from a daemon thread and return self."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds per request (default: 0.05)")
+    parser.add_argument('--connect-latency', type=float, default=0.0,
+                        help="extra seconds per new connection, like a TLS handshake (default: 0)")
+    args = parser.parse_args()
+    server = MockTranslateServer((args.host, args.port), args.latency, args.connect_latency)
+    print(f"Mock translator listening on {server.url} ({args.latency * 1000:.0f} ms per request)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Served {server.stats['requests']} requests over {server.stats['connections']} connections")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""yt-dlp plugin extractor for the offline benchmarks.
+
+yt-dlp loads extractors from any `yt_dlp_plugins` package on sys.path, ahead
+of the built-in ones, so the unmodified downloader code can be pointed at
+fake:// URLs. Media and captions are served by benchmarks/media_server.py:
+
+    fake://127.0.0.1:8765/single/<id>?size=BYTES&cues=N&duration=SECONDS
+    fake://127.0.0.1:8765/playlist/<count>?size=...   (numbered playlist)
+    fake://127.0.0.1:8765/channel/<count>?size=...    (channel uploads)
+
+`formats=N`, `thumbnails=N` and `caption_langs=N` pad each info dict with
+extra formats, thumbnails and translated auto-caption languages, so memory
+benchmarks see dicts about as large as real YouTube ones.
+"""
+import urllib.parse
+
+from yt_dlp.extractor.common import InfoExtractor
+
+
+class FakeMediaIE(InfoExtractor):
+    IE_NAME = 'fakemedia'
+    _VALID_URL = r'fake://(?P<host>[^/]+)/(?P<kind>single|playlist|channel)/(?P<id>[\w-]+)'
+
+    def _real_extract(self, url):
+        host, kind, item_id = self._match_valid_url(url).group('host', 'kind', 'id')
+        query = urllib.parse.urlsplit(url).query
+        params = dict(urllib.parse.parse_qsl(query))
+        if kind == 'single':
+            return self._video(host, item_id, params)
+        entries = [
+            self.url_result(f"fake://{host}/single/{kind[0]}{item_id}-{i:05d}?{query}", FakeMediaIE,
+                            f"{kind[0]}{item_id}-{i:05d}", f"Video {i}", duration=int(params.get('duration', 600)))
+            for i in range(1, int(item_id) + 1)
+        ]
+        title = f"Fake {kind} {item_id}"
+        result = self.playlist_result(entries, f"{kind}-{item_id}", title)
+        if kind == 'channel':
+            result.update({'uploader': 'Fake Channel', 'channel': 'Fake Channel'})
+        return result
+
+    def _video(self, host, video_id, params):
+        base = f"http://{host}"
+        size = int(params.get('size', 1024 * 1024))
+        duration = int(params.get('duration', 600))
+        cues = params.get('cues', 300)
+        captions = {
+            lang: [{'ext': ext, 'url': f"{base}/subs/{video_id}.{lang}.{ext}?cues={cues}"} for ext in ('vtt', 'srt')]
+            for lang in params.get('langs', 'en').split(',')
+        }
+        # Padding formats are worse than format 22, so format selection does not change
+        padding = [{
+            'format_id': f'{100 + i}',
+            'url': f"{base}/media/{video_id}.mp4?size={size}&variant={i}&expire=1700000000&sig={'0' * 64}",
+            'ext': 'mp4',
+            'width': 256,
+            'height': 144,
+            'vcodec': 'avc1.4d400c',
+            'acodec': 'none',
+            'filesize': size // 10,
+            'tbr': 80,
+            'http_headers': {'User-Agent': 'fake', 'Accept': '*/*'},
+        } for i in range(int(params.get('formats', 0)))]
+        for i in range(int(params.get('caption_langs', 0))):
+            captions[f'x{i:03d}'] = [
+                {'ext': ext, 'url': f"{base}/subs/{video_id}.en.{ext}?cues={cues}&tlang=x{i:03d}"}
+                for ext in ('vtt', 'srt')]
+        return {
+            'id': video_id,
+            'title': f"Video {video_id}",
+            'uploader': 'Fake Channel',
+            'duration': duration,
+            'formats': padding + [{
+                'format_id': '22',
+                'url': f"{base}/media/{video_id}.mp4?size={size}",
+                'ext': 'mp4',
+                'width': 1280,
+                'height': 720,
+                'vcodec': 'avc1.64001F',
+                'acodec': 'mp4a.40.2',
+                'filesize': size,
+                'tbr': size * 8 / 1000 / duration,
+            }],
+            'thumbnails': [{'url': f"{base}/thumbs/{video_id}/{i}.jpg", 'width': 120 + i, 'height': 90 + i}
+                           for i in range(int(params.get('thumbnails', 0)))],
+            'subtitles': captions if params.get('manual') else {},
+            'automatic_captions': captions,
+        }
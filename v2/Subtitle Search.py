@@ -0,0 +1,109 @@
+import os
+import sys
+import time
+import sqlite3
+import argparse
+
+# The youtube_downloader package lives at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from youtube_downloader.console import Fore, Style
+from youtube_downloader.refresh import load_manifest
+from youtube_downloader.search import index_path, index_subtitle_file, open_search_index
+from youtube_downloader.subtitles import seconds_to_srt_time
+
+# -----------------------------------------------
+# Directory Scan for Subtitles Added Outside the Downloaders
+# -----------------------------------------------
+def manifest_video_ids():
+    """Map files recorded by Subtitle Only's manifest to their video IDs."""
+    manifest = load_manifest()
+    return {index_path(path): key.split(':', 1)[0]
+            for key, entry in manifest.items() for path in entry.get('outputs', [])}
+
+def update_index(conn, root="Downloaded"):
+    """Index new or changed .srt files under root and drop files that are gone. Returns (indexed, removed)."""
+    known_ids = manifest_video_ids()
+    seen, indexed = set(), 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]  # Skip caches and reports
+        for filename in filenames:
+            if not filename.endswith('.srt'):
+                continue
+            path = index_path(os.path.join(dirpath, filename))
+            seen.add(path)
+            try:
+                indexed += index_subtitle_file(conn, path, known_ids.get(path))
+            except (OSError, UnicodeDecodeError, ValueError) as e:
+                print(f"{Fore.YELLOW}{Style.BRIGHT}[Warning]{Style.RESET_ALL} Skipped {path}: {e}")
+    gone = [path for (path,) in conn.execute("SELECT path FROM files") if path not in seen]
+    with conn:
+        for path in gone:
+            conn.execute("DELETE FROM cues WHERE path = ?", (path,))
+            conn.execute("DELETE FROM files WHERE path = ?", (path,))
+    return indexed, len(gone)
+
+# -----------------------------------------------
+# Search
+# -----------------------------------------------
+def fts_query(text, raw=False):
+    """Quote the text as one FTS5 phrase unless raw FTS5 syntax was requested."""
+    return text if raw else '"' + text.replace('"', '""') + '"'
+
+def search(conn, text, lang=None, limit=20, raw=False):
+    sql = ("SELECT c.video_id, c.lang, c.start, c.end, c.text, c.path FROM cue_text "
+           "JOIN cues c ON c.id = cue_text.rowid WHERE cue_text MATCH ?")
+    params = [fts_query(text, raw)]
+    if lang:
+        sql += " AND c.lang = ?"
+        params.append(lang)
+    sql += " ORDER BY rank LIMIT ?"
+    params.append(limit)
+    return conn.execute(sql, params).fetchall()
+
+def cue_link(video_id, start):
+    return f"https://youtu.be/{video_id}?t={int(start)}" if video_id else None
+
+def print_results(rows, elapsed):
+    for video_id, lang, start, end, text, path in rows:
+        link = cue_link(video_id, start)
+        print(f"{Fore.GREEN}{Style.BRIGHT}[{seconds_to_srt_time(start)[:8]}]{Style.RESET_ALL} "
+              f"{Fore.CYAN}({lang}){Style.RESET_ALL} {' '.join(text.split())}")
+        print(f"    {Fore.MAGENTA}{link or path}{Style.RESET_ALL}")
+    print(f"\n{Fore.CYAN}{Style.BRIGHT}{len(rows)} match(es) in {elapsed * 1000:.1f} ms{Style.RESET_ALL}")
+
+# -----------------------------------------------
+# Main Program Execution
+# -----------------------------------------------
+def parse_args():
+    parser = argparse.ArgumentParser(description="Search downloaded subtitles and print timestamped links.")
+    parser.add_argument('query', nargs='?', help="phrase to search for")
+    parser.add_argument('--update', action='store_true',
+                        help="index new or changed .srt files under Downloaded/ first")
+    parser.add_argument('--lang', help="only search subtitles in this language")
+    parser.add_argument('--limit', type=int, default=20, help="maximum number of matches (default: 20)")
+    parser.add_argument('--raw', action='store_true',
+                        help="pass the query as FTS5 syntax (e.g. 'NEAR(network drop, 5)', 'pipe*')")
+    return parser.parse_args()
+
+def main(args):
+    conn = open_search_index()
+    try:
+        if args.update or not args.query:
+            started = time.perf_counter()
+            indexed, removed = update_index(conn)
+            print(f"{Fore.GREEN}{Style.BRIGHT}Index updated:{Style.RESET_ALL} {indexed} file(s) indexed, "
+                  f"{removed} removed in {time.perf_counter() - started:.1f}s")
+        if args.query:
+            started = time.perf_counter()
+            try:
+                rows = search(conn, args.query, args.lang, args.limit, args.raw)
+            except sqlite3.OperationalError as e:
+                print(f"{Fore.RED}{Style.BRIGHT}Invalid search query:{Style.RESET_ALL} {e}")
+                exit(1)
+            print_results(rows, time.perf_counter() - started)
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main(parse_args())
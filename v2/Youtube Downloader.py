@@ -1,209 +1,29 @@
 import os
-import yt_dlp
-from googletrans import Translator
+import sys
 import re
+import random
+import argparse
 from datetime import timedelta
-import subprocess
-import time
-
-# -----------------------------------------------
-# Import colorama for colored console output
-# -----------------------------------------------
-try:
-    import colorama
-    from colorama import Fore, Style
-    colorama.init(autoreset=True)  # Auto-reset colors after each print
-except ImportError:
-    # Define fallback if colorama is not installed
-    class _NoColor:
-        def __getattr__(self, item):
-            return ''
-    Fore = Style = _NoColor()
-
-# -----------------------------------------------
-# Custom logger to minimize yt-dlp verbosity
-# -----------------------------------------------
-class MinimalLogger:
-    def debug(self, msg):
-        pass  # Suppress debug messages
-    def info(self, msg):
-        pass  # Suppress info messages
-    def warning(self, msg):
-        print(f"{Fore.YELLOW}{Style.BRIGHT}[Warning]{Style.RESET_ALL} {msg}")
-    def error(self, msg):
-        print(f"{Fore.RED}{Style.BRIGHT}[Error]{Style.RESET_ALL} {msg}")
-
-# -----------------------------------------------
-# Initialize translator for subtitle translation
-# -----------------------------------------------
-translator = Translator()
-
-# -----------------------------------------------
-# Utility Functions
-# -----------------------------------------------
-def sanitize_filename(filename):
-    """Remove invalid characters from filenames."""
-    invalid_chars = r'[<>:"/\\|?*]'
-    return re.sub(invalid_chars, '_', filename)
-
-def convert_vtt_to_srt(vtt_file):
-    """Convert VTT to SRT using ffmpeg."""
-    srt_file = vtt_file.rsplit('.', 1)[0] + '.srt'
-    try:
-        cmd = ['ffmpeg', '-y', '-i', vtt_file, srt_file]
-        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        print(f"{Fore.GREEN}{Style.BRIGHT}Converted subtitles to:{Style.RESET_ALL} {srt_file}")
-        return srt_file
-    except Exception as e:
-        print(f"{Fore.RED}{Style.BRIGHT}Error converting {vtt_file} to srt:{Style.RESET_ALL} {e}")
-        return None
-
-def translate_srt(src_file, subtitle_lang, target_lang, batch_size=10):
-    """Translate SRT subtitles in batches to handle large files and avoid timeouts."""
-    try:
-        with open(src_file, 'r', encoding='utf-8') as f:
-            srt_content = f.read()
-        
-        # Split SRT content into individual subtitle blocks
-        blocks = srt_content.strip().split('\n\n')
-        translated_blocks = []
-        
-        # Process subtitles in batches
-        for i in range(0, len(blocks), batch_size):
-            batch = blocks[i:i + batch_size]
-            batch_text = '\n\n'.join([block.split('\n', 2)[2] for block in batch if len(block.split('\n')) >= 3])
-            if not batch_text:
-                continue
-            
-            # Translate the batch
-            translated_batch = translator.translate(batch_text, src=subtitle_lang, dest=target_lang).text
-            if target_lang == 'ar':
-                translated_batch = "\u202B" + translated_batch + "\u202C"  # RTL support for Arabic
-            
-            # Reconstruct translated blocks with timing
-            translated_lines = translated_batch.split('\n\n')
-            for j, translated_text in enumerate(translated_lines):
-                if i + j < len(blocks):
-                    lines = blocks[i + j].split('\n')
-                    if len(lines) >= 3:
-                        index = lines[0]
-                        timing = lines[1]
-                        translated_blocks.append(f"{index}\n{timing}\n{translated_text}")
-            
-            time.sleep(0.5)  # Avoid rate limits with a small delay
-        
-        # Write translated subtitles to a new file
-        translated_srt = '\n\n'.join(translated_blocks)
-        translated_file = src_file.replace(f'.{subtitle_lang}.srt', f'.{target_lang}.srt')
-        
-        with open(translated_file, 'w', encoding='utf-8') as f:
-            f.write(translated_srt)
-        print(f"{Fore.GREEN}{Style.BRIGHT}Translated subtitles saved to:{Style.RESET_ALL} {translated_file}")
-    except Exception as e:
-        print(f"{Fore.RED}{Style.BRIGHT}Error translating subtitles:{Style.RESET_ALL} {e}")
-
-def clean_srt_duplicates(srt_file):
-    """Remove duplicate or merged lines in SRT files."""
-    with open(srt_file, 'r', encoding='utf-8') as f:
-        lines = f.readlines()
-    
-    cleaned_blocks = []
-    prev_text = None
-    prev_end_time = None
-    prev_start_time = None
-    index = 1
-    
-    i = 0
-    while i < len(lines):
-        if lines[i].strip().isdigit():  # Start of a subtitle block
-            timing_line = lines[i + 1].split(' align:')[0].strip()
-            start_time, end_time = timing_line.split(' --> ')
-            
-            text_lines = []
-            j = i + 2
-            while j < len(lines) and lines[j].strip() and not lines[j].strip().isdigit():
-                text_lines.append(lines[j].strip())
-                j += 1
-            text = '\n'.join(text_lines)
-            
-            if text == prev_text and prev_end_time == start_time:
-                cleaned_blocks[-1] = f"{index-1}\n{prev_start_time} --> {end_time}\n{prev_text}\n"
-            else:
-                cleaned_blocks.append(f"{index}\n{timing_line}\n{text}\n")
-                prev_text = text
-                prev_end_time = end_time
-                prev_start_time = start_time
-                index += 1
-            
-            i = j
-        else:
-            i += 1
-    
-    with open(srt_file, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(cleaned_blocks))
-    print(f"{Fore.GREEN}{Style.BRIGHT}Cleaned subtitles saved to:{Style.RESET_ALL} {srt_file}")
 
-# -----------------------------------------------
-# Progress Hook for Download Feedback
-# -----------------------------------------------
-def progress_hook(d, subtitle_lang, translate_subtitles, target_lang, video_duration=None):
-    """Display download progress and handle subtitle post-processing."""
-    if d['status'] == 'downloading':
-        filename_raw = d.get('filename', 'Unknown file')
-        filename_colored = f"{Fore.MAGENTA}{os.path.basename(filename_raw)}{Style.RESET_ALL}"
-        downloaded = d.get('downloaded_bytes', 0)
-        total = d.get('total_bytes', 0)
-        speed = d.get('speed', 0) or 0
-        if total:
-            progress = (downloaded / total) * 100
-            progress_str = f"{Fore.BLUE}{progress:.2f}%{Style.RESET_ALL}"
-            speed_str = f"{Fore.GREEN}{speed / 1024:.2f} KB/s{Style.RESET_ALL}"
-            print(f"\rDownloading {filename_colored} - {progress_str} at {speed_str}", end='')
-        else:
-            downloaded_str = f"{Fore.BLUE}{downloaded / 1024:.2f} KB{Style.RESET_ALL}"
-            speed_str = f"{Fore.GREEN}{speed / 1024:.2f} KB/s{Style.RESET_ALL}"
-            print(f"\rDownloading {filename_colored} - {downloaded_str} (Unknown size) at {speed_str}", end='')
-    elif d['status'] == 'finished':
-        filename_colored = f"{Fore.MAGENTA}{d.get('filename', 'Unknown file')}{Style.RESET_ALL}"
-        print(f"\n{Fore.GREEN}{Style.BRIGHT}Download completed:{Style.RESET_ALL} {filename_colored}")
-        if subtitle_lang and 'filename' in d and (d['filename'].endswith('.srt') or d['filename'].endswith('.vtt')):
-            subtitle_filename = d['filename']
-            if subtitle_filename.endswith('.vtt'):
-                new_filename = convert_vtt_to_srt(subtitle_filename)
-                if new_filename:
-                    subtitle_filename = new_filename
-            clean_srt_duplicates(subtitle_filename)
-            if translate_subtitles:
-                print(f"{Fore.CYAN}{Style.BRIGHT}Translating subtitles from {subtitle_lang} to {target_lang}...{Style.RESET_ALL}")
-                translate_srt(subtitle_filename, subtitle_lang, target_lang)
-
-# -----------------------------------------------
-# Prompt Function with Validation
-# -----------------------------------------------
-def prompt_with_validation(prompt, valid_options, allow_quit=True):
-    while True:
-        print(f"\n{Fore.CYAN}{Style.BRIGHT}{'─'*60}{Style.RESET_ALL}")
-        lines = prompt.split('\n')
-        for line in lines:
-            print(f"{Fore.CYAN}{Style.BRIGHT}{line}{Style.RESET_ALL}")
-        if allow_quit:
-            print(f"{Fore.YELLOW}[q] Quit{Style.RESET_ALL}")
-        print(f"{Fore.CYAN}{Style.BRIGHT}{'─'*60}{Style.RESET_ALL}")
-        choice = input(f"{Fore.YELLOW}{Style.BRIGHT}Enter your choice: {Style.RESET_ALL}").strip().lower()
-
-        if allow_quit and choice == 'q':
-            print(f"{Fore.RED}{Style.BRIGHT}Exiting program.{Style.RESET_ALL}")
-            exit()
+import yt_dlp
 
-        if choice in valid_options:
-            return choice
+# The youtube_downloader package lives at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-        print(f"{Fore.RED}{Style.BRIGHT}Invalid choice. Please try again.\n{Style.RESET_ALL}")
+from youtube_downloader import DownloadConfig, Session, TranslatorClient, read_failure_report
+from youtube_downloader.console import ConsoleReporter, Fore, Style, print_plan, prompt_with_validation
+from youtube_downloader.planning import (DEFAULT_ASSUMED_SPEED, DEFAULT_FAIRNESS_INTERVAL, DEFAULT_RESERVE_MB,
+                                         ORDER_POLICIES, parse_priorities)
+from youtube_downloader.subtitles import SUBTITLE_PREFERENCES, parse_subtitle_preference
+from youtube_downloader.translation import SUBTITLE_OUTPUTS
+from youtube_downloader.turbo import DEFAULT_MAX_CONNECTIONS
+from youtube_downloader.watch import DEFAULT_WATCH_INTERVAL, FEED_URL, WATCH_STATE, WatchState, read_watch_list
 
 # -----------------------------------------------
 # Gather User Inputs
 # -----------------------------------------------
-def get_user_inputs():
+def get_user_inputs(session, watch=False):
+    """Prompt for the download settings; `watch` skips the content type and link (watch mode)."""
     config = {}
 
     choice = prompt_with_validation(
@@ -212,41 +32,37 @@ def get_user_inputs():
     )
     config['download_type'] = 'video' if choice == '1' else 'audio'
 
-    choice = prompt_with_validation(
-        "Choose content type:\n1. Single Video\n2. Playlist\n3. Channel",
-        ['1', '2', '3']
-    )
-    config['content_type'] = ['single', 'playlist', 'channel'][int(choice) - 1]
+    if watch:
+        # New uploads of the watched channels are downloaded one by one into their uploader's folder
+        config['content_type'] = 'channel'
+        config['link'] = None
+    else:
+        choice = prompt_with_validation(
+            "Choose content type:\n1. Single Video\n2. Playlist\n3. Channel",
+            ['1', '2', '3']
+        )
+        config['content_type'] = ['single', 'playlist', 'channel'][int(choice) - 1]
 
-    while True:
-        print(f"\n{Fore.CYAN}{Style.BRIGHT}{'─'*60}{Style.RESET_ALL}")
-        print(f"{Fore.CYAN}{Style.BRIGHT}Enter the YouTube link:{Style.RESET_ALL}")
-        print(f"{Fore.YELLOW}[q] Quit{Style.RESET_ALL}")
-        print(f"{Fore.CYAN}{Style.BRIGHT}{'─'*60}{Style.RESET_ALL}")
-        link = input(f"{Fore.YELLOW}{Style.BRIGHT}Link: {Style.RESET_ALL}").strip()
+        while True:
+            print(f"\n{Fore.CYAN}{Style.BRIGHT}{'─'*60}{Style.RESET_ALL}")
+            print(f"{Fore.CYAN}{Style.BRIGHT}Enter the YouTube link:{Style.RESET_ALL}")
+            print(f"{Fore.YELLOW}[q] Quit{Style.RESET_ALL}")
+            print(f"{Fore.CYAN}{Style.BRIGHT}{'─'*60}{Style.RESET_ALL}")
+            link = input(f"{Fore.YELLOW}{Style.BRIGHT}Link: {Style.RESET_ALL}").strip()
 
-        if link.lower() == 'q':
-            print(f"{Fore.RED}{Style.BRIGHT}Exiting program.{Style.RESET_ALL}")
-            exit()
+            if link.lower() == 'q':
+                print(f"{Fore.RED}{Style.BRIGHT}Exiting program.{Style.RESET_ALL}")
+                exit()
 
-        if 'youtube.com' in link or 'youtu.be' in link:
-            config['link'] = link
-            break
+            if 'youtube.com' in link or 'youtu.be' in link:
+                config['link'] = link
+                break
 
-        print(f"{Fore.RED}{Style.BRIGHT}Invalid YouTube link. Please try again.\n{Style.RESET_ALL}")
+            print(f"{Fore.RED}{Style.BRIGHT}Invalid YouTube link. Please try again.\n{Style.RESET_ALL}")
 
     if config['content_type'] == 'playlist':
-        ydl_opts_flat = {
-            'quiet': True,
-            'extract_flat': True,
-            'no_warnings': True,
-            'logger': MinimalLogger()
-        }
         print(f"{Fore.CYAN}{Style.BRIGHT}\nRetrieving playlist info...{Style.RESET_ALL}")
-        with yt_dlp.YoutubeDL(ydl_opts_flat) as ydl:
-            info_flat = ydl.extract_info(config['link'], download=False)
-            entries = info_flat.get('entries')
-            total_videos = len(entries) if entries else 0
+        total_videos = len(session.extract(config['link']).get('entries') or [])
         if total_videos == 0:
             print(f"{Fore.RED}{Style.BRIGHT}No videos found in the playlist.{Style.RESET_ALL}")
             exit()
@@ -296,15 +112,8 @@ def get_user_inputs():
         config['playlist_items'] = None
 
     if config['content_type'] == 'single' and config['download_type'] == 'video':
-        ydl_opts_video = {
-            'quiet': True,
-            'noplaylist': True,
-            'no_warnings': True,
-            'logger': MinimalLogger()
-        }
         print(f"{Fore.CYAN}{Style.BRIGHT}\nRetrieving video info...{Style.RESET_ALL}")
-        with yt_dlp.YoutubeDL(ydl_opts_video) as ydl:
-            info_video = ydl.extract_info(config['link'], download=False)
+        info_video = session.extract(config['link'], extract_flat=False, noplaylist=True)
 
         config['video_duration'] = info_video.get('duration', 0)
         config['raw_title'] = info_video.get('title', 'No title available')
@@ -373,14 +182,14 @@ def get_user_inputs():
     if subtitle_choice == '1':
         while True:
             print(f"\n{Fore.CYAN}{Style.BRIGHT}{'─'*60}{Style.RESET_ALL}")
-            print(f"{Fore.CYAN}{Style.BRIGHT}Enter subtitle language code (e.g., 'en' for English, 'ar' for Arabic):{Style.RESET_ALL}")
+            print(f"{Fore.CYAN}{Style.BRIGHT}Enter subtitle language code (e.g., 'en' for English, 'ar' for Arabic, 'pt-br'):{Style.RESET_ALL}")
             print(f"{Fore.YELLOW}[q] Quit{Style.RESET_ALL}")
             print(f"{Fore.CYAN}{Style.BRIGHT}{'─'*60}{Style.RESET_ALL}")
             subtitle_lang = input(f"{Fore.YELLOW}{Style.BRIGHT}Language code: {Style.RESET_ALL}").strip().lower()
             if subtitle_lang == 'q':
                 print(f"{Fore.RED}{Style.BRIGHT}Exiting program.{Style.RESET_ALL}")
                 exit()
-            if len(subtitle_lang) == 2 and subtitle_lang.isalpha():
+            if re.fullmatch(r'[a-z]{2,3}(-[a-z0-9]{2,4})?', subtitle_lang):
                 config['subtitle_lang'] = subtitle_lang
                 break
             print(f"{Fore.RED}{Style.BRIGHT}Invalid language code. Please try again.\n{Style.RESET_ALL}")
@@ -399,111 +208,221 @@ def get_user_inputs():
             config['translate_subtitles'] = True
             while True:
                 print(f"\n{Fore.CYAN}{Style.BRIGHT}{'─'*60}{Style.RESET_ALL}")
-                print(f"{Fore.CYAN}{Style.BRIGHT}Enter target language code (e.g., 'ar', 'en'):{Style.RESET_ALL}")
+                print(f"{Fore.CYAN}{Style.BRIGHT}Enter target language code(s), comma-separated (e.g., 'ar' or 'ar,fr,de'):{Style.RESET_ALL}")
                 print(f"{Fore.YELLOW}[q] Quit{Style.RESET_ALL}")
                 print(f"{Fore.CYAN}{Style.BRIGHT}{'─'*60}{Style.RESET_ALL}")
-                target_lang = input(f"{Fore.YELLOW}{Style.BRIGHT}Target language code: {Style.RESET_ALL}").strip().lower()
-                if target_lang == 'q':
+                target_input = input(f"{Fore.YELLOW}{Style.BRIGHT}Target language code(s): {Style.RESET_ALL}").strip().lower()
+                if target_input == 'q':
                     print(f"{Fore.RED}{Style.BRIGHT}Exiting program.{Style.RESET_ALL}")
                     exit()
-                if len(target_lang) == 2 and target_lang.isalpha():
-                    config['target_lang'] = target_lang
+                target_langs = list(dict.fromkeys(code.strip() for code in target_input.split(',') if code.strip()))
+                if target_langs and all(len(code) == 2 and code.isalpha() for code in target_langs):
+                    config['target_langs'] = target_langs
                     break
                 print(f"{Fore.RED}{Style.BRIGHT}Invalid language code. Please try again.\n{Style.RESET_ALL}")
+            output_choice = prompt_with_validation(
+                "Choose translated subtitle output:\n1. Separate file per language\n2. Bilingual SRT (original above translation)\n3. Bilingual ASS (styled, original above translation)",
+                ['1', '2', '3']
+            )
+            config['subtitle_output'] = SUBTITLE_OUTPUTS[int(output_choice) - 1]
         else:
             config['translate_subtitles'] = False
-            config['target_lang'] = None
+            config['target_langs'] = []
+            config['subtitle_output'] = 'separate'
+
+        config['embed_subs'] = False
+        if config['download_type'] == 'video':
+            embed_choice = prompt_with_validation(
+                "Embed the subtitles into the MP4 (muxed during the video+audio merge)?\n1. Yes\n2. No",
+                ['1', '2']
+            )
+            config['embed_subs'] = embed_choice == '1'
     else:
         config['subtitle_lang'] = None
         config['auto_subs'] = '2'
         config['translate_subtitles'] = False
-        config['target_lang'] = None
+        config['target_langs'] = []
+        config['subtitle_output'] = 'separate'
+        config['embed_subs'] = False
 
-    return config
+    return DownloadConfig.from_dict(config)
+
+# -----------------------------------------------
+# Command-line Options
+# -----------------------------------------------
+def parse_sections(section_args, chapter_args, precise=False):
+    """Turn --section/--chapter values into the config['sections'] entry."""
+    ranges = []
+    for value in section_args or []:
+        start, sep, end = value.partition('-')
+        start_seconds = yt_dlp.utils.parse_duration(start) if start else 0
+        end_seconds = yt_dlp.utils.parse_duration(end) if end else None  # None: until the end
+        if not sep or start_seconds is None or (end and (end_seconds is None or end_seconds <= start_seconds)):
+            raise SystemExit(f"{Fore.RED}{Style.BRIGHT}Invalid section:{Style.RESET_ALL} {value} (expected START-END)")
+        ranges.append([start_seconds, end_seconds])
+    return {'ranges': ranges, 'chapters': list(chapter_args or []), 'precise': precise}
+
+def subtitle_preference_arg(value):
+    try:
+        return parse_subtitle_preference(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Download YouTube videos, playlists and channels with subtitles.")
+    parser.add_argument('--retry-from', metavar='FILE',
+                        help="re-download the items listed in a failure report instead of prompting")
+    parser.add_argument('--max-retry-passes', type=int, default=3, metavar='N',
+                        help="deferred retry passes for transient failures (default: 3)")
+    parser.add_argument('--plan', action='store_true',
+                        help="print the estimated size and time of every item without downloading")
+    parser.add_argument('--assumed-speed', type=float, default=DEFAULT_ASSUMED_SPEED, metavar='MB/S',
+                        help=f"download speed used for time estimates (default: {DEFAULT_ASSUMED_SPEED})")
+    parser.add_argument('--section', action='append', metavar='START-END',
+                        help="download only this time range, e.g. 1:30-2:45 (repeatable)")
+    parser.add_argument('--chapter', action='append', metavar='REGEX',
+                        help="download only chapters whose title matches (repeatable)")
+    parser.add_argument('--precise-cuts', action='store_true',
+                        help="re-encode around section cuts instead of cutting at keyframes")
+    parser.add_argument('--order', choices=ORDER_POLICIES, default='index',
+                        help="queue order for playlists and channels (default: index); 'size' resolves "
+                             "every item's formats first, like --plan")
+    parser.add_argument('--priority', action='append', metavar='ID_OR_INDEX=N',
+                        help="explicit priority for --order priority; higher runs first (repeatable)")
+    parser.add_argument('--fairness-interval', type=int, default=DEFAULT_FAIRNESS_INTERVAL, metavar='N',
+                        help="give every Nth slot to the oldest waiting item, 0 disables "
+                             f"(default: {DEFAULT_FAIRNESS_INTERVAL})")
+    parser.add_argument('--min-free-space', type=int, default=DEFAULT_RESERVE_MB, metavar='MB',
+                        help=f"free space to keep on the target volume (default: {DEFAULT_RESERVE_MB})")
+    parser.add_argument('--subtitle-preference', type=subtitle_preference_arg, metavar='STEPS',
+                        help="comma-separated order for picking a subtitle track (default: "
+                             f"{','.join(SUBTITLE_PREFERENCES)})")
+    parser.add_argument('--translator-url', metavar='URL',
+                        help="LibreTranslate-compatible server to translate with instead of Google")
+    parser.add_argument('--translator-pool', type=int, default=4, metavar='N',
+                        help="keep-alive translator connections shared by the workers (default: 4)")
+    parser.add_argument('--translator-timeout', type=float, default=10.0, metavar='SECONDS',
+                        help="per-request translator timeout (default: 10)")
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help="overlap extraction, downloads and translation in an asyncio pipeline")
+    parser.add_argument('--download-workers', type=int, default=2, metavar='N',
+                        help="concurrent downloads with --async (default: 2)")
+    parser.add_argument('--translate-workers', type=int, default=2, metavar='N',
+                        help="subtitle files translated at once with --async (default: 2)")
+    parser.add_argument('--queue-size', type=int, default=4, metavar='N',
+                        help="items buffered between --async stages (default: 4)")
+    parser.add_argument('--staging-dir', metavar='DIR',
+                        help="download and process on this (fast, local) directory and publish only finished "
+                             "files to Downloaded")
+    parser.add_argument('--layout', choices=('titles', 'sharded'),
+                        help="'sharded' stores files by video ID under Downloaded/_by_id with a catalog "
+                             "(default: titles)")
+    parser.add_argument('--rebuild-views', action='store_true',
+                        help="recreate the Downloaded/_views links of the sharded layout from the catalog and exit")
+    parser.add_argument('--turbo', type=int, default=0, metavar='N',
+                        help="download large files over N parallel connections (range requests, or concurrent "
+                             "fragments for DASH/HLS)")
+    parser.add_argument('--max-connections', type=int, default=DEFAULT_MAX_CONNECTIONS, metavar='N',
+                        help="cap on turbo connections (range segments and DASH/HLS fragments) across all "
+                             f"downloads (default: {DEFAULT_MAX_CONNECTIONS})")
+    parser.add_argument('--encode-workers', type=int, default=os.cpu_count() or 1, metavar='N',
+                        help="cores used to encode long MP3 extractions in chunks, 1 disables "
+                             "(default: all CPUs)")
+    parser.add_argument('--verify', action='store_true',
+                        help="check every finished file with ffprobe/ffmpeg; broken files are quarantined and "
+                             "downloaded again")
+    parser.add_argument('--verify-workers', type=int, default=max(1, (os.cpu_count() or 2) // 2), metavar='N',
+                        help="verification processes running alongside downloads (default: half the CPUs)")
+    parser.add_argument('--watch', metavar='FILE',
+                        help="poll the channels listed in FILE (URLs or channel IDs, one per line) and download "
+                             "new uploads")
+    parser.add_argument('--watch-interval', type=int, default=DEFAULT_WATCH_INTERVAL, metavar='SECONDS',
+                        help=f"time between two polls of a channel (default: {DEFAULT_WATCH_INTERVAL})")
+    parser.add_argument('--watch-workers', type=int, default=16, metavar='N',
+                        help="feeds polled at once (default: 16)")
+    parser.add_argument('--watch-once', action='store_true',
+                        help="poll every due channel once and exit (for cron)")
+    parser.add_argument('--feed-url', default=FEED_URL, metavar='TEMPLATE',
+                        help="feed URL with a {channel_id} placeholder (default: the YouTube channel feed)")
+    parser.add_argument('--profile', action='store_true',
+                        help="write per-stage cProfile files and memory statistics to Downloaded/_reports")
+    parser.add_argument('--profile-sample', type=float, default=0.0, metavar='FRACTION',
+                        help="profile only this fraction of runs, e.g. 0.05 (default: off)")
+    return parser.parse_args()
 
 # -----------------------------------------------
 # Main Program Execution
 # -----------------------------------------------
-def main():
+def main(args):
     os.makedirs("Downloaded", exist_ok=True)
-    config = get_user_inputs()
-
-    if config['content_type'] == 'single':
-        output_template = 'Downloaded/%(title)s.%(ext)s'
-    elif config['content_type'] == 'playlist':
-        ydl_opts_flat = {
-            'quiet': True,
-            'extract_flat': True,
-            'no_warnings': True,
-            'logger': MinimalLogger()
-        }
-        print(f"{Fore.CYAN}{Style.BRIGHT}\nRetrieving playlist info...{Style.RESET_ALL}")
-        with yt_dlp.YoutubeDL(ydl_opts_flat) as ydl:
-            info_flat = ydl.extract_info(config['link'], download=False)
-            entries = info_flat.get('entries')
-            total_videos = len(entries) if entries else 1
-        num_digits = max(2, len(str(total_videos)))
-        output_template = f"Downloaded/%(playlist_title)s/%(playlist_index)0{num_digits}d - %(title)s.%(ext)s"
-    else:
-        output_template = 'Downloaded/%(uploader)s/%(title)s.%(ext)s'
-
-    ydl_opts = {
-        'outtmpl': output_template,
-        'progress_hooks': [lambda d: progress_hook(
-            d,
-            config.get('subtitle_lang'),
-            config.get('translate_subtitles'),
-            config.get('target_lang')
-        )],
-        'format': config['format_option'],
-        'merge_output_format': 'mp4' if config['download_type'] == 'video' else None,
-        'encoding': 'utf-8',
-        'no_clean_info': True,
-        'ignoreerrors': True,
-        'retries': 10,
-        'fragment_retries': 10,
-        'socket_timeout': 60,
-        'quiet': True,
-        'no_warnings': True,
-        'logger': MinimalLogger()
-    }
-
-    if config['content_type'] == 'single':
-        ydl_opts['noplaylist'] = True
-
-    if config['download_type'] == 'audio':
-        ydl_opts.update({
-            'format': 'bestaudio',
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
-        })
-
-    if config['subtitle_lang']:
-        ydl_opts.update({
-            'writesubtitles': True,
-            'subtitleslangs': [config['subtitle_lang']],
-            'writeautomaticsub': config['auto_subs'] == '1',
-            'skip_download': False,
-            'convertsubtitles': 'srt',
-        })
-
-    if config['content_type'] == 'playlist' and config['playlist_items']:
-        ydl_opts['playlist_items'] = config['playlist_items']
-
-    print(f"\n{Fore.GREEN}{Style.BRIGHT}All questions have been answered. Starting download...{Style.RESET_ALL}\n")
+    translator = TranslatorClient(args.translator_url, args.translator_pool, args.translator_timeout)
+    session = Session(ConsoleReporter(), translator, args.max_connections,
+                      args.verify_workers if args.verify else 0, args.profile or random.random() < args.profile_sample)
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([config['link']])
-    except Exception as e:
-        print(f"{Fore.RED}{Style.BRIGHT}An error occurred during download:{Style.RESET_ALL} {e}")
-        exit(1)
+        if args.rebuild_views:
+            session.rebuild_views()
+            return
+
+        watch_state = None
+        if args.watch:
+            # The download settings are asked once and reused by every later watch run
+            watch_state = WatchState()
+            config = watch_state.load_config()
+            if config is None:
+                config = get_user_inputs(session, watch=True)
+                watch_state.save_config(config)
+            else:
+                print(f"{Fore.CYAN}{Style.BRIGHT}Using the download settings saved in {WATCH_STATE}.{Style.RESET_ALL}")
+            previous = None
+        elif args.retry_from:
+            config, previous = read_failure_report(args.retry_from)
+        else:
+            config = get_user_inputs(session)
+            previous = None
+
+        if args.subtitle_preference:
+            config.subtitle_preference = args.subtitle_preference
+        if args.turbo:
+            config.turbo = min(args.turbo, args.max_connections)
+        if args.encode_workers > 1:
+            config.encode_workers = args.encode_workers
+        if args.layout:
+            config.layout = args.layout
+        if args.staging_dir:
+            config.staging_dir = args.staging_dir
+        if args.section or args.chapter:
+            config.sections = parse_sections(args.section, args.chapter, args.precise_cuts)
+        reserve_bytes = args.min_free_space * 1024 ** 2
+
+        if args.plan:
+            print(f"{Fore.CYAN}{Style.BRIGHT}\nResolving formats for the download plan...{Style.RESET_ALL}")
+            print_plan(session.plan(config, args.assumed_speed), "Downloaded", reserve_bytes)
+            return
+
+        if args.watch:
+            try:
+                session.watch(config, read_watch_list(args.watch), watch_state, args.feed_url, args.watch_workers,
+                              args.watch_interval, args.watch_once, reserve_bytes, args.max_retry_passes)
+            finally:
+                watch_state.close()
+            return
+
+        print(f"\n{Fore.GREEN}{Style.BRIGHT}All questions have been answered. Starting download...{Style.RESET_ALL}\n")
+        try:
+            session.download(config, previous, reserve_bytes, args.order, parse_priorities(args.priority),
+                             args.fairness_interval, args.use_async, args.download_workers, args.translate_workers,
+                             args.queue_size, args.max_retry_passes)
+        except Exception as e:
+            print(f"{Fore.RED}{Style.BRIGHT}An error occurred during download:{Style.RESET_ALL} {e}")
+            exit(1)
+    finally:
+        session.write_profile()  # Also for --plan, --watch and failed runs
+        session.close()
+        translator.close()
 
 if __name__ == "__main__":
     try:
-        main()
+        main(parse_args())
     except KeyboardInterrupt:
         print(f"\n{Fore.RED}{Style.BRIGHT}Program interrupted by user. Exiting.{Style.RESET_ALL}")
         exit()
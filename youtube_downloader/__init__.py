@@ -0,0 +1,20 @@
+"""Download YouTube videos, playlists and channels with subtitle translation, as a library.
+
+The interactive scripts are thin frontends over this package; a service can
+use it directly::
+
+    from youtube_downloader import DownloadConfig, Session
+
+    with Session(on_event=print) as session:
+        result = session.download(DownloadConfig(link='https://youtu.be/...', subtitle_lang='en'))
+"""
+from .config import DownloadConfig
+from .events import Event, EventCollector, discard
+from .failures import read_failure_report
+from .session import DownloadResult, RefreshResult, Session
+from .translation import TranslationCache, TranslatorClient
+
+__all__ = [
+    'DownloadConfig', 'DownloadResult', 'Event', 'EventCollector', 'RefreshResult', 'Session',
+    'TranslationCache', 'TranslatorClient', 'discard', 'read_failure_report',
+]
@@ -0,0 +1,61 @@
+"""The download configuration: what the interactive prompts (or a service request) decide."""
+import dataclasses
+from typing import List, Optional
+
+from .subtitles import SUBTITLE_PREFERENCES
+from .translation import SUBTITLE_OUTPUTS
+
+DOWNLOAD_TYPES = ('video', 'audio')
+CONTENT_TYPES = ('single', 'playlist', 'channel')
+LAYOUTS = ('titles', 'sharded')
+
+@dataclasses.dataclass
+class DownloadConfig:
+    """Settings of one download job.
+
+    The first group is what get_user_inputs() asks for; the rest are the
+    command-line extras. `link` may be None for jobs that pass their own URLs
+    (watch mode, retries). Failure reports and the watch state store the
+    to_dict() form; from_dict() also reads the older prompt-style values
+    ('1'/'2' for auto_subs).
+    """
+    download_type: str = 'video'
+    content_type: str = 'single'
+    link: Optional[str] = None
+    playlist_items: Optional[str] = None   # yt-dlp selection such as '5-30' or '5,8,9'
+    format_option: str = 'best'            # yt-dlp format selector
+    subtitle_lang: Optional[str] = None
+    auto_subs: bool = True                 # Fall back to auto-generated captions
+    translate_subtitles: bool = False
+    target_langs: List[str] = dataclasses.field(default_factory=list)
+    subtitle_output: str = 'separate'
+    embed_subs: bool = False
+
+    subtitle_preference: List[str] = dataclasses.field(default_factory=lambda: list(SUBTITLE_PREFERENCES))
+    sections: Optional[dict] = None        # {'ranges': [[start, end]], 'chapters': [regex], 'precise': bool}
+    turbo: int = 0                         # Parallel connections per large file, 0 = off
+    encode_workers: int = 0                # Cores for long MP3 extractions, 0/1 = single encode
+    layout: str = 'titles'
+    staging_dir: Optional[str] = None
+
+    def __post_init__(self):
+        for name, allowed in (('download_type', DOWNLOAD_TYPES), ('content_type', CONTENT_TYPES),
+                              ('subtitle_output', SUBTITLE_OUTPUTS), ('layout', LAYOUTS)):
+            if getattr(self, name) not in allowed:
+                raise ValueError(f"{name} must be one of {', '.join(allowed)}, not {getattr(self, name)!r}")
+        unknown = [step for step in self.subtitle_preference if step not in SUBTITLE_PREFERENCES]
+        if unknown:
+            raise ValueError(f"unknown subtitle preference step(s): {', '.join(unknown)}")
+        self.target_langs = list(self.target_langs or [])
+
+    @classmethod
+    def from_dict(cls, values):
+        """Build a config from a plain dict (a saved report or a request body); unknown keys are ignored."""
+        names = {field.name for field in dataclasses.fields(cls)}
+        values = {key: value for key, value in values.items() if key in names and value is not None}
+        if isinstance(values.get('auto_subs'), str):
+            values['auto_subs'] = values['auto_subs'] == '1'
+        return cls(**values)
+
+    def to_dict(self):
+        return dataclasses.asdict(self)
@@ -0,0 +1,116 @@
+"""Console frontend helpers: colors, the event printer and the shared prompt."""
+import os
+import shutil
+import threading
+from datetime import timedelta
+
+from .utils import format_bytes
+
+# -----------------------------------------------
+# Import colorama for colored console output
+# -----------------------------------------------
+try:
+    import colorama
+    from colorama import Fore, Style
+    colorama.init(autoreset=True)  # Auto-reset colors after each print
+except ImportError:
+    # Define fallback if colorama is not installed
+    class _NoColor:
+        def __getattr__(self, item):
+            return ''
+    Fore = Style = _NoColor()
+
+LEVEL_STYLES = {
+    'info': f"{Fore.CYAN}{Style.BRIGHT}",
+    'success': f"{Fore.GREEN}{Style.BRIGHT}",
+    'warning': f"{Fore.YELLOW}{Style.BRIGHT}",
+    'error': f"{Fore.RED}{Style.BRIGHT}",
+}
+
+# -----------------------------------------------
+# Event printer
+# -----------------------------------------------
+class ConsoleReporter:
+    """Event callback that prints each event as one colored line.
+
+    Download progress rewrites a single line, which is ended before the next
+    message. A lock keeps lines from several download threads apart.
+    """
+    def __init__(self, progress=True):
+        self.progress = progress
+        self._progress_open = False
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        with self._lock:
+            if event.level == 'progress':
+                if self.progress:
+                    print(f"\r{self.format_progress(event.data)}", end='')
+                    self._progress_open = True
+                return
+            if self._progress_open:
+                print()
+                self._progress_open = False
+            style = LEVEL_STYLES.get(event.level, '')
+            if event.detail:
+                print(f"{style}{event.message}:{Style.RESET_ALL} {event.detail}")
+            else:
+                print(f"{style}{event.message}{Style.RESET_ALL}")
+
+    @staticmethod
+    def format_progress(data):
+        filename_colored = f"{Fore.MAGENTA}{os.path.basename(data.get('filename') or 'Unknown file')}{Style.RESET_ALL}"
+        speed_str = f"{Fore.GREEN}{(data.get('speed') or 0) / 1024:.2f} KB/s{Style.RESET_ALL}"
+        downloaded, total = data.get('downloaded_bytes') or 0, data.get('total_bytes')
+        if total:
+            progress_str = f"{Fore.BLUE}{downloaded / total * 100:.2f}%{Style.RESET_ALL}"
+            return f"Downloading {filename_colored} - {progress_str} at {speed_str}"
+        downloaded_str = f"{Fore.BLUE}{downloaded / 1024:.2f} KB{Style.RESET_ALL}"
+        return f"Downloading {filename_colored} - {downloaded_str} (Unknown size) at {speed_str}"
+
+# -----------------------------------------------
+# Prompt Function with Validation
+# -----------------------------------------------
+def prompt_with_validation(prompt, valid_options, allow_quit=True):
+    while True:
+        print(f"\n{Fore.CYAN}{Style.BRIGHT}{'─'*60}{Style.RESET_ALL}")
+        lines = prompt.split('\n')
+        for line in lines:
+            print(f"{Fore.CYAN}{Style.BRIGHT}{line}{Style.RESET_ALL}")
+        if allow_quit:
+            print(f"{Fore.YELLOW}[q] Quit{Style.RESET_ALL}")
+        print(f"{Fore.CYAN}{Style.BRIGHT}{'─'*60}{Style.RESET_ALL}")
+        choice = input(f"{Fore.YELLOW}{Style.BRIGHT}Enter your choice: {Style.RESET_ALL}").strip().lower()
+
+        if allow_quit and choice == 'q':
+            print(f"{Fore.RED}{Style.BRIGHT}Exiting program.{Style.RESET_ALL}")
+            exit()
+
+        if choice in valid_options:
+            return choice
+
+        print(f"{Fore.RED}{Style.BRIGHT}Invalid choice. Please try again.\n{Style.RESET_ALL}")
+
+# -----------------------------------------------
+# Download Plan Output
+# -----------------------------------------------
+def print_plan(plan, target_dir, reserve_bytes):
+    print(f"\n{Fore.CYAN}{Style.BRIGHT}{'─'*60}{Style.RESET_ALL}")
+    print(f"{Fore.CYAN}{Style.BRIGHT}Download plan:{Style.RESET_ALL}")
+    for item in plan:
+        size = format_bytes(item.size) if item.size else 'unknown size'
+        eta = timedelta(seconds=int(item.seconds)) if item.seconds else '?'
+        print(f"  {item.index or '-':>4}  {size:>10}  ~{eta}  {Fore.MAGENTA}{item.title}{Style.RESET_ALL}")
+    known = [item for item in plan if item.size]
+    total_bytes = sum(item.size for item in known)
+    peak = max((item.required_bytes for item in known), default=0)
+    total_seconds = sum(item.seconds for item in known)
+    free = shutil.disk_usage(target_dir).free
+    print(f"{Fore.CYAN}{Style.BRIGHT}{'─'*60}{Style.RESET_ALL}")
+    print(f"{Fore.GREEN}{Style.BRIGHT}Items:{Style.RESET_ALL} {len(plan)} ({len(plan) - len(known)} without size information)")
+    print(f"{Fore.GREEN}{Style.BRIGHT}Estimated total:{Style.RESET_ALL} {format_bytes(total_bytes)}, "
+          f"~{timedelta(seconds=int(total_seconds))}")
+    print(f"{Fore.GREEN}{Style.BRIGHT}Free space:{Style.RESET_ALL} {format_bytes(free)} "
+          f"(largest item needs {format_bytes(peak)} with merge headroom)")
+    if total_bytes + reserve_bytes > free:
+        print(f"{Fore.RED}{Style.BRIGHT}Not everything fits: items will be skipped once space runs out.{Style.RESET_ALL}")
@@ -0,0 +1,248 @@
+"""One configured download: yt-dlp options, a download pass and the deferred retry passes."""
+import os
+import random
+import time
+
+import yt_dlp
+
+from .failures import RETRYABLE_CATEGORIES, FailureCollectingLogger, MinimalLogger, TrackCurrentItemPP
+from .planning import DEFAULT_RESERVE_MB, ItemRecord, make_admission_filter
+from .postprocessors import (CollectResultsPP, IntegrityCheckPP, SubtitleIndexPP, SubtitleMuxingYoutubeDL,
+                             SubtitlePP)
+from .search import index_subtitles
+from .storage import SHARDED_TEMPLATE, CatalogPP, ShardPP
+from .subtitles import SubtitleResolverPP, translation_targets
+from .translation import translate_srt_batch
+
+# -----------------------------------------------
+# Download Execution and Retry Passes
+# -----------------------------------------------
+def fetch_flat_entries(session, link):
+    """Return an ItemRecord (index, ID, title, duration) for every entry of a flat extraction."""
+    info_flat = session.extract(link)
+    return [
+        ItemRecord(i, entry.get('id'), entry.get('title'), entry.get('duration'), entry.get('url'))
+        for i, entry in enumerate(info_flat.get('entries') or [], 1) if entry
+    ]
+
+def build_output_template(session, config, list_entries=False):
+    """Return the yt-dlp output template and, for playlists, the flat entry list."""
+    entries = []
+    if config.content_type == 'single':
+        output_template = 'Downloaded/%(title)s.%(ext)s'
+    elif config.content_type == 'playlist':
+        session.emit('extracting', "\nRetrieving playlist info...", 'info', link=config.link)
+        entries = fetch_flat_entries(session, config.link)
+        total_videos = entries[-1].index if entries else 1
+        num_digits = max(2, len(str(total_videos)))
+        output_template = f"Downloaded/%(playlist_title)s/%(playlist_index)0{num_digits}d - %(title)s.%(ext)s"
+    else:
+        if list_entries:
+            session.emit('extracting', "\nRetrieving channel info...", 'info', link=config.link)
+            entries = fetch_flat_entries(session, config.link)
+        output_template = 'Downloaded/%(uploader)s/%(title)s.%(ext)s'
+    if config.layout == 'sharded':
+        # Stored by video ID; --rebuild-views links them under readable names in Downloaded/_views
+        output_template = SHARDED_TEMPLATE
+    return output_template, entries
+
+def build_ydl_opts(session, config, output_template):
+    """Translate the configuration into yt-dlp options."""
+    ydl_opts = {
+        'outtmpl': output_template,
+        'progress_hooks': [session.progress_hook],
+        'format': config.format_option,
+        'merge_output_format': 'mp4' if config.download_type == 'video' else None,
+        'encoding': 'utf-8',
+        'extract_flat': 'discard_in_playlist',  # Free each playlist entry's info dict once it is processed
+        'ignoreerrors': True,
+        'retries': 10,
+        'fragment_retries': 10,
+        'socket_timeout': 60,
+        'quiet': True,
+        'no_warnings': True,
+        'logger': MinimalLogger(session.emit)
+    }
+
+    if config.content_type == 'single':
+        ydl_opts['noplaylist'] = True
+
+    if config.download_type == 'audio':
+        ydl_opts.update({
+            'format': 'bestaudio',
+            'postprocessors': [{
+                'key': 'FFmpegExtractAudio',
+                'preferredcodec': 'mp3',
+                'preferredquality': '192',
+            }],
+        })
+
+    if config.subtitle_lang:
+        ydl_opts.update({
+            'writesubtitles': True,
+            'subtitleslangs': [config.subtitle_lang],
+            'writeautomaticsub': config.auto_subs,
+            'skip_download': False,
+            'convertsubtitles': 'srt',
+        })
+
+    if config.content_type == 'playlist' and config.playlist_items:
+        ydl_opts['playlist_items'] = config.playlist_items
+
+    if config.staging_dir:
+        # Download, merge and post-process under the staging dir; PublishFilesPP moves the results
+        ydl_opts['paths'] = {'temp': config.staging_dir}
+
+    if config.download_type == 'audio' and config.encode_workers > 1:
+        ydl_opts['encode_workers'] = config.encode_workers
+
+    if config.turbo:
+        # Range-segmented progressive downloads, and concurrent fragments for DASH/HLS; both hold session connections
+        ydl_opts.update({'turbo_connections': config.turbo, 'concurrent_fragment_downloads': config.turbo})
+
+    sections = config.sections
+    if sections:
+        # Only the requested ranges/chapters are fetched; each section gets its own file
+        ydl_opts.update({
+            'download_ranges': yt_dlp.utils.download_range_func(
+                sections['chapters'],
+                [(start, float('inf') if end is None else end) for start, end in sections['ranges']]),
+            'force_keyframes_at_cuts': sections['precise'],
+            'outtmpl': output_template.replace('.%(ext)s', ' [%(section_start)s-%(section_end)s].%(ext)s'),
+        })
+
+    return ydl_opts
+
+def make_subtitle_pp(session, config, defer_translation=False):
+    """The SubtitlePP for the configuration, translating with the session's client."""
+    return SubtitlePP(config.subtitle_lang, config.translate_subtitles, config.target_langs, config.subtitle_output,
+                      config.embed_subs, defer_translation, session.translator, session.profiler, session.emit)
+
+def run_download(session, config, ydl_opts, urls, failures=None, reserve_bytes=DEFAULT_RESERVE_MB * 1024 ** 2,
+                 subtitle_pp=None, results=None, deferred=None, extra_info=None):
+    """Run one yt-dlp pass and return the failures it recorded, keyed by video ID.
+
+    `subtitle_pp` replaces the default SubtitlePP built from the configuration.
+    Finished items are appended to `results` when a list is given. With a
+    `deferred` list, subtitles are prepared but not translated; their entries
+    are added to the list for translate_deferred(). `extra_info` fills info
+    fields the extraction leaves unset (e.g. playlist_index for an entry URL).
+    """
+    if config.subtitle_lang and subtitle_pp is None:
+        subtitle_pp = make_subtitle_pp(session, config, defer_translation=deferred is not None)
+    staging = session.staging_for(config, reserve_bytes)
+    catalog = session.catalog_for(config)
+    logger = FailureCollectingLogger(session.emit)
+    admission_filter = make_admission_filter(logger, "Downloaded", reserve_bytes, staging, catalog)
+    ydl_opts = dict(ydl_opts, logger=logger, match_filter=admission_filter)
+    with SubtitleMuxingYoutubeDL(ydl_opts, session, staging) as ydl:
+        ydl.add_post_processor(TrackCurrentItemPP(logger), when='pre_process')
+        if config.layout == 'sharded':
+            ydl.add_post_processor(ShardPP(), when='pre_process')
+        if config.subtitle_lang:
+            ydl.add_post_processor(SubtitleResolverPP(config.subtitle_lang, config.auto_subs,
+                                                      config.subtitle_preference, session.emit),
+                                   when='pre_process')
+            ydl.add_post_processor(subtitle_pp, when='before_dl')
+            ydl.add_post_processor(SubtitleIndexPP(session.profiler, session.emit), when='after_move')
+        if catalog:
+            ydl.add_post_processor(CatalogPP(catalog), when='after_move')
+        integrity_pp = None
+        if session.verify_executor:
+            integrity_pp = IntegrityCheckPP(session.verify_executor, emit=session.emit)
+            ydl.add_post_processor(integrity_pp, when='after_move')
+        if results is not None:
+            ydl.add_post_processor(CollectResultsPP(results), when='after_move')
+        try:
+            with session.profiler.stage('download'):
+                if extra_info:
+                    for url in urls:
+                        ydl.extract_info(url, extra_info=extra_info)
+                else:
+                    ydl.download(urls)
+        finally:
+            if staging:
+                staging.release(admission_filter.admitted)
+            if deferred is not None and subtitle_pp:
+                deferred.extend(subtitle_pp.prepared)
+    if integrity_pp:
+        with session.profiler.stage('verify'):
+            broken = integrity_pp.collect(session.emit)
+        if catalog:
+            catalog.forget([entry['id'] for entry in broken.values() if entry.get('id')])
+        if results is not None:
+            results[:] = [item for item in results if item['id'] not in broken]
+        logger.failures.update(broken)
+    for key, entry in logger.failures.items():
+        previous = (failures or {}).get(key)
+        entry['attempts'] = (previous['attempts'] if previous else 0) + 1
+    return logger.failures
+
+def retry_targets(config, ydl_opts, items, index_by_id):
+    """Return (options, urls) that re-download exactly the given failed items."""
+    for item in items:
+        item['playlist_index'] = item.get('playlist_index') or index_by_id.get(item['id'])
+    if config.content_type == 'playlist' and all(item['playlist_index'] for item in items):
+        # Re-enter through the playlist so the numbered output template still applies
+        indices = ','.join(str(item['playlist_index']) for item in items)
+        return dict(ydl_opts, playlist_items=indices), [config.link]
+    urls = [item.get('url') or f"https://www.youtube.com/watch?v={item['id']}" for item in items]
+    return dict(ydl_opts, noplaylist=True), urls
+
+def retry_transient_failures(session, config, ydl_opts, failures, index_by_id, max_passes=3, base_delay=5.0,
+                             reserve_bytes=DEFAULT_RESERVE_MB * 1024 ** 2, results=None, deferred=None):
+    """Retry transient failures in deferred passes with exponential backoff."""
+    for attempt in range(1, max_passes + 1):
+        retryable = [f for f in failures.values() if f['category'] in RETRYABLE_CATEGORIES and f['id']]
+        if not retryable:
+            break
+        delay = min(base_delay * 2 ** (attempt - 1), 300) + random.uniform(0, 1)
+        session.emit('retry_pass', f"\nRetry pass {attempt}/{max_passes}: {len(retryable)} item(s) "
+                     f"after {delay:.1f}s...", 'info', attempt=attempt, items=len(retryable), delay=delay)
+        time.sleep(delay)
+        opts, urls = retry_targets(config, ydl_opts, retryable, index_by_id)
+        previous = {f['id']: failures.pop(f['id']) for f in retryable}
+        for key, entry in run_download(session, config, opts, urls, previous, reserve_bytes,
+                                       results=results, deferred=deferred).items():
+            failures[key] = entry
+    return failures
+
+# -----------------------------------------------
+# Run-level Translation
+# -----------------------------------------------
+def batches_translation(config):
+    """True when translation can wait for the end of the run and share requests across files.
+
+    Embedded subtitles have to be translated before their item's merge.
+    """
+    return bool(config.subtitle_lang and config.translate_subtitles and config.target_langs
+                and not config.embed_subs)
+
+def register_translations(session, config, video_id, paths, results=None):
+    """Index translated files written after their item finished and add them to the catalog and results."""
+    index_subtitles(paths, video_id, session.emit)
+    catalog = session.catalog_for(config)
+    if catalog and video_id:
+        catalog.add_subtitles(video_id, paths)
+    for item in results if results is not None else ():
+        if item['id'] == video_id:
+            item['subtitles'].extend(paths)
+
+def translate_deferred(session, config, deferred, results=None):
+    """Translate the subtitles prepared during the run's passes in one cross-file batch."""
+    jobs, video_ids = [], {}
+    for subtitle_file, video_id, source_lang in deferred:
+        targets = translation_targets(source_lang, config.subtitle_lang, config.target_langs,
+                                      config.translate_subtitles)
+        if targets and os.path.exists(subtitle_file):  # Items that failed never published their subtitles
+            jobs.append((subtitle_file, source_lang, targets))
+            video_ids[subtitle_file] = video_id
+    if not jobs:
+        return
+    targets = list(dict.fromkeys(target for _, _, item_targets in jobs for target in item_targets))
+    session.emit('translation_started', f"\nTranslating {len(jobs)} subtitle file(s) to {', '.join(targets)}...",
+                 'info', files=len(jobs), targets=targets)
+    with session.profiler.stage('translate'):
+        written = translate_srt_batch(jobs, session.translator, output=config.subtitle_output, emit=session.emit)
+    for subtitle_file, paths in written.items():
+        register_translations(session, config, video_ids[subtitle_file], paths, results)
@@ -0,0 +1,210 @@
+"""Chunked parallel MP3 encoding for long audio extractions."""
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+from yt_dlp.postprocessor import FFmpegExtractAudioPP
+
+from .profiling import NullProfiler
+
+CHUNKED_ENCODE_MIN_SIZE = 64 * 1024 ** 2  # Sources below this (about an hour of audio) keep the single encode
+CHUNK_FRAMES = 40 * 60 * 5                # MP3 frames per chunk, about 4-5 minutes
+CHUNK_OVERLAP_FRAMES = 8                  # Encoded before and after each chunk so the encoder state is warm
+MP3_FRAME_ALIGN = 1152                    # Chunk boundaries fall on MPEG-1 frames (two MPEG-2 frames)
+LAME_SAMPLE_RATES = (8000, 11025, 12000, 16000, 22050, 24000, 32000, 44100, 48000)
+MP3_BITRATES = {
+    True: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),  # MPEG-1 layer III
+    False: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),    # MPEG-2/2.5 layer III
+}
+MP3_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+def mp3_frames(data):
+    """(offset, length, samples per frame) of every layer III frame in a raw MP3 stream."""
+    frames, pos = [], 0
+    while pos + 4 <= len(data):
+        header = int.from_bytes(data[pos:pos + 4], 'big')
+        version, layer = (header >> 19) & 3, (header >> 17) & 3
+        bitrate_index, rate_index = (header >> 12) & 15, (header >> 10) & 3
+        if header >> 21 != 0x7FF or version == 1 or layer != 1 or bitrate_index in (0, 15) or rate_index == 3:
+            raise ValueError(f"no MP3 frame at byte {pos}")
+        mpeg1 = version == 3
+        bitrate = MP3_BITRATES[mpeg1][bitrate_index] * 1000
+        length = (144 if mpeg1 else 72) * bitrate // MP3_SAMPLE_RATES[version][rate_index] + ((header >> 9) & 1)
+        frames.append((pos, length, 1152 if mpeg1 else 576))
+        pos += length
+    return frames
+
+def lame_crc16(data):
+    """CRC-16 (0x8005, reflected) as used for the LAME tag checksum."""
+    crc = 0
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return crc
+
+def patch_info_frame(frame, frame_sizes, total_samples):
+    """Rewrite the Xing/LAME header of the first chunk for the whole joined stream."""
+    frame = bytearray(frame)
+    xing = max(frame.find(b'Xing'), frame.find(b'Info'))
+    if xing < 0:
+        raise ValueError("the first chunk has no Xing/Info header")
+    flags = int.from_bytes(frame[xing + 4:xing + 8], 'big')
+    field = xing + 8
+    total_bytes = len(frame) + sum(frame_sizes)
+    if flags & 1:
+        frame[field:field + 4] = len(frame_sizes).to_bytes(4, 'big')
+        field += 4
+    if flags & 2:
+        frame[field:field + 4] = total_bytes.to_bytes(4, 'big')
+        field += 4
+    if flags & 4:
+        # Seek table: byte position (in 1/256ths of the file) at each percent of the duration
+        offsets, position = [], len(frame)
+        for size in frame_sizes:
+            offsets.append(position)
+            position += size
+        frame[field:field + 100] = bytes(
+            min(255, offsets[min(len(offsets) - 1, len(offsets) * i // 100)] * 256 // total_bytes) for i in range(100))
+        field += 100
+    if flags & 8:
+        field += 4
+    if frame[field:field + 4] in (b'LAME', b'Lavf', b'Lavc'):
+        # Gapless info: keep the encoder delay, recompute the end padding for the joined stream
+        samples_per_frame = 1152 if (frame[1] >> 3) & 3 == 3 else 576
+        delay = int.from_bytes(frame[field + 21:field + 24], 'big') >> 12
+        padding = max(0, len(frame_sizes) * samples_per_frame - delay - total_samples)
+        frame[field + 21:field + 24] = ((delay << 12) | min(padding, 0xFFF)).to_bytes(3, 'big')
+        frame[field + 28:field + 32] = total_bytes.to_bytes(4, 'big')
+        frame[field + 34:field + 36] = lame_crc16(frame[:field + 34]).to_bytes(2, 'big')
+    return bytes(frame)
+
+def audio_stream_layout(ffmpeg, path):
+    """(sample rate, channels) to decode `path` to for libmp3lame, or None if ffmpeg shows no audio stream."""
+    result = subprocess.run([ffmpeg, '-hide_banner', '-i', path], capture_output=True, text=True, errors='replace')
+    match = re.search(r'Stream #.*?Audio: .*?(\d+) Hz, ([^,]+)', result.stderr)
+    if not match:
+        return None
+    rate = int(match.group(1))
+    rate = rate if rate in LAME_SAMPLE_RATES else min(LAME_SAMPLE_RATES, key=lambda r: abs(r - rate))
+    return rate, 1 if match.group(2).strip() == 'mono' else 2
+
+class ChunkedExtractAudioPP(FFmpegExtractAudioPP):
+    """FFmpegExtractAudioPP that encodes long MP3 extractions on several cores.
+
+    The source is decoded once to PCM and cut into chunks on MP3 frame
+    boundaries. Each chunk is encoded by its own ffmpeg with a few frames of
+    overlap on both sides (dropped afterwards) and without the bit reservoir,
+    so its frames are self-contained. The frames are then joined in order
+    behind the first chunk's Xing/LAME header, patched with the total frame
+    count and end padding, so the duration and gapless playback stay exact.
+    Smaller files and other codecs use the normal single encode.
+    """
+    def __init__(self, downloader=None, preferredcodec=None, preferredquality=None, nopostoverwrites=False,
+                 workers=2, min_size=CHUNKED_ENCODE_MIN_SIZE, profiler=None):
+        super().__init__(downloader, preferredcodec, preferredquality, nopostoverwrites)
+        self.workers = workers
+        self.min_size = min_size
+        self.profiler = profiler or NullProfiler()
+
+    def run_ffmpeg(self, path, out_path, codec, more_opts):
+        if codec != 'libmp3lame' or self.workers < 2 or os.path.getsize(path) < self.min_size:
+            return super().run_ffmpeg(path, out_path, codec, more_opts)
+        layout = audio_stream_layout(self.executable, path)
+        if layout:
+            try:
+                with self.profiler.stage('encode'):
+                    return self.encode_chunked(path, out_path, more_opts, *layout)
+            except (OSError, ValueError, subprocess.CalledProcessError) as e:
+                self.report_warning(f'Chunked encoding failed ({e}), encoding in one piece')
+        return super().run_ffmpeg(path, out_path, codec, more_opts)
+
+    def encode_chunk(self, pcm_path, mp3_path, rate, channels, more_opts, first):
+        subprocess.run([self.executable, '-y', '-loglevel', 'error', '-f', 's16le', '-ar', str(rate),
+                        '-ac', str(channels), '-i', pcm_path, '-c:a', 'libmp3lame', *more_opts, '-reservoir', '0',
+                        '-id3v2_version', '0', '-write_xing', '1' if first else '0', '-f', 'mp3', mp3_path],
+                       check=True, capture_output=True)
+        os.remove(pcm_path)
+
+    def encode_chunked(self, path, out_path, more_opts, rate, channels):
+        sample_bytes = 2 * channels
+        chunk_bytes = CHUNK_FRAMES * MP3_FRAME_ALIGN * sample_bytes
+        overlap_bytes = CHUNK_OVERLAP_FRAMES * MP3_FRAME_ALIGN * sample_bytes
+        work_dir = tempfile.mkdtemp(prefix='.chunks-', dir=os.path.dirname(os.path.abspath(out_path)))
+        decoder = subprocess.Popen([self.executable, '-loglevel', 'error', '-i', path, '-vn', '-f', 's16le',
+                                    '-ar', str(rate), '-ac', str(channels), '-'],
+                                   stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        chunks, pending = [], set()
+        self.to_screen(f'Encoding in chunks of {CHUNK_FRAMES * MP3_FRAME_ALIGN // rate // 60} min on {self.workers} '
+                       f'workers')
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                # buffer holds the decoded PCM from byte `buffer_start` of the stream onwards
+                buffer, buffer_start, decoded, eof = bytearray(), 0, 0, False
+                while True:
+                    start = len(chunks) * chunk_bytes
+                    end = start + chunk_bytes
+                    while not eof and buffer_start + len(buffer) < end + overlap_bytes:
+                        block = decoder.stdout.read(1024 ** 2)
+                        eof = not block
+                        buffer += block
+                        decoded += len(block)
+                    if decoded <= start:
+                        break
+                    last = eof and decoded <= end + overlap_bytes
+                    lead = min(start, overlap_bytes)
+                    pcm_path = os.path.join(work_dir, f'{len(chunks):05d}.pcm')
+                    with open(pcm_path, 'wb') as f:
+                        f.write(buffer[start - lead - buffer_start:None if last else end + overlap_bytes - buffer_start])
+                    mp3_path = pcm_path[:-4] + '.mp3'
+                    chunks.append((mp3_path, lead // sample_bytes, None if last else chunk_bytes // sample_bytes))
+                    del buffer[:end - overlap_bytes - buffer_start]
+                    buffer_start = end - overlap_bytes
+                    if len(pending) > self.workers:
+                        # Bounds the PCM waiting on disk to about one chunk per worker
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            future.result()
+                    pending.add(pool.submit(self.encode_chunk, pcm_path, mp3_path, rate, channels, more_opts,
+                                            len(chunks) == 1))
+                    if last:
+                        break
+                if decoder.wait():
+                    raise subprocess.CalledProcessError(decoder.returncode, 'ffmpeg decode')
+                for future in pending:
+                    future.result()
+            self.join_chunks(chunks, out_path, decoded // sample_bytes)
+        finally:
+            if decoder.poll() is None:
+                decoder.kill()
+            decoder.stdout.close()
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def join_chunks(self, chunks, out_path, total_samples):
+        """Concatenate the kept frames of every chunk behind the patched header of the first one."""
+        if not chunks:
+            raise ValueError("no audio was decoded")
+        ranges, frame_sizes = [], []
+        for i, (mp3_path, lead_samples, samples) in enumerate(chunks):
+            with open(mp3_path, 'rb') as f:
+                data = f.read()
+            frames = mp3_frames(data)
+            if i == 0:
+                info_frame = data[:frames[0][1]]
+                frames = frames[1:]
+            first = lead_samples // frames[0][2]
+            count = len(frames) - first if samples is None else samples // frames[0][2]
+            if first + count > len(frames):
+                raise ValueError(f"chunk {i} is {first + count - len(frames)} frame(s) short")
+            frames = frames[first:first + count]
+            ranges.append((mp3_path, frames[0][0], frames[-1][0] + frames[-1][1]))
+            frame_sizes.extend(length for _, length, _ in frames)
+        with open(out_path, 'wb') as out:
+            out.write(patch_info_frame(info_frame, frame_sizes, total_samples))
+            for mp3_path, start, end in ranges:
+                with open(mp3_path, 'rb') as f:
+                    f.seek(start)
+                    out.write(f.read(end - start))
@@ -0,0 +1,39 @@
+"""Events: what the pipeline reports instead of printing.
+
+Every function that used to print takes an `emit` callable with the
+signature of `discard` below. A Session turns each call into an Event and
+hands it to its callbacks; the command-line scripts pass a ConsoleReporter
+(see console.py), services can log, forward or collect the events instead.
+Callbacks are called from download and worker threads.
+"""
+import dataclasses
+
+LEVELS = ('info', 'success', 'warning', 'error', 'progress')
+
+@dataclasses.dataclass
+class Event:
+    """One status update.
+
+    `kind` is a stable name to dispatch on ('subtitles_translated',
+    'download_progress', ...), `message` a short human-readable summary and
+    `detail` the path or value it is about. `data` holds the structured
+    fields (paths, video IDs, byte counts) for programmatic consumers.
+    """
+    kind: str
+    message: str
+    level: str = 'info'
+    detail: str = ''
+    data: dict = dataclasses.field(default_factory=dict)
+
+def discard(kind, message, level='info', detail='', **data):
+    """Default `emit` of the library functions: report nothing."""
+
+class EventCollector:
+    """Callback that keeps every event, e.g. to return them with a service response."""
+    def __init__(self, levels=LEVELS):
+        self.levels = set(levels)
+        self.events = []
+
+    def __call__(self, event):
+        if event.level in self.levels:
+            self.events.append(event)
@@ -0,0 +1,125 @@
+"""yt-dlp logging and failure tracking for the deferred retry passes."""
+import json
+import os
+import re
+
+from yt_dlp.postprocessor import PostProcessor
+
+from .events import discard
+
+REPORT_DIR = os.path.join("Downloaded", "_reports")
+FAILURE_REPORT = os.path.join(REPORT_DIR, "failed_items.json")
+
+# Checked in order: the first pattern that matches decides the category
+ERROR_CATEGORIES = [
+    ('disk_space', r'insufficient disk space|no space left on device'),
+    ('restricted', r'sign in to confirm your age|age[- ]restricted|inappropriate for some users'
+                   r'|not available in your country|geo[- ]?restrict|blocked it in your country'),
+    ('unavailable', r'video unavailable|private video|has been removed|no longer available|members[- ]only'
+                    r'|join this channel|account associated .* terminated|premieres in|live event will begin'
+                    r'|does not exist'),
+    ('postprocess', r'postprocessing|ffmpeg|ffprobe|conversion failed'),
+    ('transient', r'http error (?:5\d\d|429|403)|timed? ?out|connection (?:reset|refused|aborted)'
+                  r'|temporary failure|remote end closed|incompleteread|unable to download|getaddrinfo'
+                  r'|ssl|network is unreachable|giving up after|did not get any data'),
+]
+RETRYABLE_CATEGORIES = {'transient', 'integrity'}
+
+# -----------------------------------------------
+# Custom logger to minimize yt-dlp verbosity
+# -----------------------------------------------
+class MinimalLogger:
+    """yt-dlp logger that drops debug and info output and emits warnings and errors as events."""
+    def __init__(self, emit=discard):
+        self.emit = emit
+
+    def debug(self, msg):
+        pass  # Suppress debug messages
+    def info(self, msg):
+        pass  # Suppress info messages
+    def warning(self, msg):
+        self.emit('ytdlp_warning', "Warning", 'warning', msg)
+    def error(self, msg):
+        self.emit('ytdlp_error', "Error", 'error', msg)
+
+def classify_error(message):
+    """Map a yt-dlp error message to one of the ERROR_CATEGORIES names."""
+    for category, pattern in ERROR_CATEGORIES:
+        if re.search(pattern, message, re.IGNORECASE):
+            return category
+    return 'unknown'
+
+class FailureCollectingLogger(MinimalLogger):
+    """MinimalLogger that also records which item each error belongs to."""
+    def __init__(self, emit=discard):
+        super().__init__(emit)
+        self.failures = {}
+        self.current = {}  # Item being processed, set by TrackCurrentItemPP
+
+    def error(self, msg):
+        super().error(msg)
+        self.record(msg)
+
+    def record(self, msg, item=None):
+        msg = re.sub(r'\x1b\[[0-9;]*m', '', msg)
+        msg = re.sub(r'^ERROR:\s*', '', msg).strip()
+        match = re.search(r'\[[\w:]+\] ([\w-]{6,}): ', msg)
+        item = item or (({'id': match.group(1)} if match else None) or self.current)
+        key = item.get('id') or msg
+        entry = self.failures.setdefault(key, {
+            'id': item.get('id'),
+            'title': item.get('title'),
+            'playlist_index': item.get('playlist_index'),
+            'url': item.get('webpage_url'),
+            'attempts': 0,
+        })
+        entry['category'] = classify_error(msg)
+        entry['message'] = msg
+
+class TrackCurrentItemPP(PostProcessor):
+    """Tell the logger which item is active so id-less errors can be attributed."""
+    def __init__(self, logger, downloader=None):
+        super().__init__(downloader)
+        self._logger = logger
+
+    def run(self, info):
+        self._logger.current = {
+            'id': info.get('id'),
+            'title': info.get('title'),
+            'playlist_index': info.get('playlist_index'),
+            'webpage_url': info.get('webpage_url'),
+        }
+        return [], info
+
+def write_failure_report(config, failures, path=FAILURE_REPORT):
+    """Write the remaining failures as JSON that can be passed back via --retry-from."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    report = {
+        'config': config.to_dict(),
+        'failures': sorted(failures.values(), key=lambda f: (f.get('playlist_index') or 0, f.get('id') or '')),
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    return path
+
+def report_failures(emit, failures, report_path):
+    """Emit the end-of-run summary: the failure counts per category and how to retry them."""
+    if not failures:
+        emit('run_succeeded', "\nAll items completed without errors.", 'success')
+        return
+    counts = {}
+    for entry in failures.values():
+        counts[entry['category']] = counts.get(entry['category'], 0) + 1
+    summary = ', '.join(f"{category}: {count}" for category, count in sorted(counts.items()))
+    emit('run_failed', f"\n{len(failures)} item(s) failed ({summary}).", 'error', counts=counts, report=report_path)
+    if report_path:
+        emit('failure_report', "Failure list saved to", 'warning', report_path, path=report_path)
+        emit('retry_hint', "Re-run them with", 'warning', f'--retry-from "{report_path}"')
+
+def read_failure_report(path):
+    """(config, failures keyed like run_download's) from a report written by write_failure_report."""
+    from .config import DownloadConfig
+    with open(path, 'r', encoding='utf-8') as f:
+        report = json.load(f)
+    failures = {entry.get('id') or entry['message']: entry for entry in report['failures']}
+    return DownloadConfig.from_dict(report['config']), failures
@@ -0,0 +1,131 @@
+"""Async pipeline: extraction, download and translation stages."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from .download import make_subtitle_pp, register_translations, run_download
+from .planning import DEFAULT_RESERVE_MB, ItemRecord
+from .subtitles import translation_targets
+from .translation import translate_srt_async
+
+def list_queue_items(session, config, ydl_opts):
+    """Flat-extract the link into ItemRecords, honouring playlist_items and queue order.
+
+    Returns (items, playlist fields); the fields are the playlist_* values an
+    item downloaded through the playlist would carry, for the output template.
+    """
+    if config.content_type == 'single':
+        return [ItemRecord(url=config.link)], {}
+    info = session.extract(config.link, playlist_items=ydl_opts.get('playlist_items'))
+    entries = info.get('entries') or []
+    indices = info.get('requested_entries') or range(1, len(entries) + 1)
+    items = [ItemRecord(index, entry.get('id'), entry.get('title'), entry.get('duration'), entry.get('url'))
+             for index, entry in zip(indices, entries) if entry]
+    playlist = {
+        'playlist': info.get('title') or info.get('id'),
+        'playlist_title': info.get('title'),
+        'playlist_id': info.get('id'),
+        'playlist_uploader': info.get('uploader'),
+        'playlist_uploader_id': info.get('uploader_id'),
+        'playlist_channel': info.get('channel'),
+        'playlist_channel_id': info.get('channel_id'),
+        'playlist_webpage_url': info.get('webpage_url'),
+        'playlist_count': info.get('playlist_count') or len(entries),
+    }
+    return items, playlist
+
+class AsyncPipeline:
+    """Run the configured download as three stages joined by bounded queues.
+
+    extract   - one flat extraction (executor) feeds the download queue
+    download  - yt-dlp downloads, one item per executor thread; subtitles are
+                converted, cleaned and clipped there
+    translate - subtitle translation as coroutines on the event loop
+
+    Bounded queues give backpressure: extraction stalls while downloads are
+    behind, and downloads stall while translation is behind. When subtitles
+    are embedded, translation has to finish before the merge, so it stays in
+    the download stage.
+    """
+    def __init__(self, session, config, ydl_opts, index_by_id=None, reserve_bytes=DEFAULT_RESERVE_MB * 1024 ** 2,
+                 download_workers=2, translate_workers=2, queue_size=4, results=None):
+        self.session = session
+        self.config = config
+        self.ydl_opts = ydl_opts
+        self.index_by_id = index_by_id or {}
+        self.reserve_bytes = reserve_bytes
+        self.download_workers = download_workers
+        self.translate_workers = translate_workers
+        self.queue_size = queue_size
+        self.results = results
+        self.inline_translation = config.embed_subs
+        self.playlist = {}  # playlist_* fields of the flat extraction, set by extract_stage
+        self.failures = {}
+
+    def download_item(self, item):
+        """Blocking: download one item and return its (cleaned subtitle file, video ID, language) entries."""
+        config = self.config
+        opts, extra_info = self.ydl_opts, None
+        if item.id or item.index:
+            # The entry's own URL, so the playlist is not extracted again for every item
+            opts = dict(opts, noplaylist=True)
+            extra_info = dict(self.playlist, playlist_index=item.index or self.index_by_id.get(item.id))
+        url = item.url or f"https://www.youtube.com/watch?v={item.id}"
+        subtitle_pp = None
+        if config.subtitle_lang:
+            subtitle_pp = make_subtitle_pp(self.session, config, defer_translation=not self.inline_translation)
+        self.failures.update(run_download(self.session, config, opts, [url], reserve_bytes=self.reserve_bytes,
+                                          subtitle_pp=subtitle_pp, results=self.results, extra_info=extra_info))
+        return subtitle_pp.prepared if subtitle_pp else []
+
+    async def extract_stage(self, loop, executor, downloads):
+        items, self.playlist = await loop.run_in_executor(executor, list_queue_items, self.session, self.config,
+                                                          self.ydl_opts)
+        catalog = self.session.catalog_for(self.config)
+        for item in items:
+            if catalog and item.id and catalog.contains(item.id):
+                continue  # Already downloaded, not worth a queue slot or an extraction
+            await downloads.put(item)
+        for _ in range(self.download_workers):
+            await downloads.put(None)
+
+    async def download_stage(self, loop, executor, downloads, translations):
+        while (item := await downloads.get()) is not None:
+            try:
+                subtitle_files = await loop.run_in_executor(executor, self.download_item, item)
+            except Exception as e:
+                self.session.emit('download_stage_error', "Download stage error", 'error', str(e),
+                                  id=item.id, url=item.url)
+                continue
+            if not self.inline_translation:
+                for subtitle in subtitle_files:
+                    await translations.put(subtitle)
+
+    async def translate_stage(self, translations):
+        config, session = self.config, self.session
+        while (subtitle := await translations.get()) is not None:
+            subtitle_file, video_id, source_lang = subtitle
+            targets = translation_targets(source_lang, config.subtitle_lang, config.target_langs,
+                                          config.translate_subtitles)
+            if not targets:
+                continue
+            session.emit('translation_started', f"Translating subtitles from {source_lang} to {', '.join(targets)}...",
+                         'info', source=subtitle_file, source_lang=source_lang, targets=targets)
+            translated = await translate_srt_async(subtitle_file, source_lang, targets, session.translator,
+                                                   output=config.subtitle_output, emit=session.emit)
+            register_translations(session, config, video_id, translated, self.results)
+
+    async def run(self):
+        """Run all stages to completion and return the failures, keyed by video ID."""
+        loop = asyncio.get_running_loop()
+        downloads = asyncio.Queue(maxsize=self.queue_size)
+        translations = asyncio.Queue(maxsize=self.queue_size)
+        with ThreadPoolExecutor(max_workers=self.download_workers + 1) as executor:
+            translators = [asyncio.create_task(self.translate_stage(translations))
+                           for _ in range(self.translate_workers)]
+            await asyncio.gather(self.extract_stage(loop, executor, downloads),
+                                 *(self.download_stage(loop, executor, downloads, translations)
+                                   for _ in range(self.download_workers)))
+            for _ in translators:
+                await translations.put(None)
+            await asyncio.gather(*translators)
+        return self.failures
@@ -0,0 +1,243 @@
+"""Pre-flight planning, disk admission and queue ordering."""
+import re
+import shutil
+
+import yt_dlp
+
+from .events import discard
+from .failures import MinimalLogger
+from .utils import format_bytes
+
+# -----------------------------------------------
+# Pre-flight Planning and Disk Admission
+# -----------------------------------------------
+DEFAULT_RESERVE_MB = 500      # Always keep this much free on the target volume
+DEFAULT_ASSUMED_SPEED = 5.0   # MB/s used for time estimates in --plan
+MERGE_RATE = 100 * 1024 ** 2  # Bytes/s for the ffmpeg remux of separate video+audio
+AUDIO_ENCODE_SPEED = 50       # Seconds of audio encoded to mp3 per second
+
+def estimate_item_bytes(info):
+    """Estimate the download size of a processed info dict from its selected formats."""
+    total = 0
+    for fmt in info.get('requested_formats') or [info]:
+        size = fmt.get('filesize') or fmt.get('filesize_approx')
+        if not size and fmt.get('tbr') and info.get('duration'):
+            size = fmt['tbr'] * 1000 / 8 * info['duration']  # tbr is in KBit/s
+        if not size:
+            return None
+        total += size
+    return int(total)
+
+def required_disk_bytes(info, size):
+    """Space an item needs while downloading, including merge/transcode headroom."""
+    if len(info.get('requested_formats') or []) > 1:
+        return size * 2  # Separate streams and the merged output exist side by side
+    return int(size * 1.2)
+
+def estimate_item_seconds(info, size, assumed_speed=DEFAULT_ASSUMED_SPEED):
+    seconds = size / (assumed_speed * 1024 ** 2)
+    if len(info.get('requested_formats') or []) > 1:
+        seconds += size / MERGE_RATE
+    if info.get('acodec') != 'none' and info.get('vcodec') == 'none':
+        seconds += (info.get('duration') or 0) / AUDIO_ENCODE_SPEED
+    return seconds
+
+class ItemRecord:
+    """The few fields the pipeline uses per item, so full info dicts can be released.
+
+    A YouTube info dict carries every format, thumbnail and caption URL (tens
+    of KB); on a channel with thousands of videos keeping them adds up to
+    gigabytes. Flat listings fill index/id/title/duration/url, planning also
+    fills the chosen format, size estimates and subtitle tracks.
+    """
+    __slots__ = ('index', 'id', 'title', 'duration', 'url', 'format_id', 'size', 'required_bytes', 'seconds',
+                 'subtitle_tracks')
+
+    def __init__(self, index=None, id=None, title=None, duration=None, url=None, format_id=None, size=None,
+                 required_bytes=None, seconds=None, subtitle_tracks=()):
+        self.index = index
+        self.id = id
+        self.title = title
+        self.duration = duration
+        self.url = url
+        self.format_id = format_id
+        self.size = size
+        self.required_bytes = required_bytes
+        self.seconds = seconds
+        self.subtitle_tracks = subtitle_tracks
+
+    @classmethod
+    def from_info(cls, info, assumed_speed=DEFAULT_ASSUMED_SPEED):
+        """Record for a processed (format-selected) info dict."""
+        size = estimate_item_bytes(info)
+        return cls(info.get('playlist_index'), info.get('id'), info.get('title'), info.get('duration'),
+                   info.get('webpage_url'), info.get('format_id'), size,
+                   required_disk_bytes(info, size) if size else None,
+                   estimate_item_seconds(info, size, assumed_speed) if size else None,
+                   tuple(info.get('requested_subtitles') or ()))
+
+    def failure_item(self):
+        """The dict shape retry_targets() and the failure report use."""
+        return {'id': self.id, 'title': self.title, 'playlist_index': self.index, 'url': self.url}
+
+class PlanningYoutubeDL(yt_dlp.YoutubeDL):
+    """Keeps an ItemRecord per resolved video instead of the processed info dicts.
+
+    Used with extract_flat='discard_in_playlist', so each full dict is freed
+    as soon as its record has been taken.
+    """
+    def __init__(self, params=None, assumed_speed=DEFAULT_ASSUMED_SPEED):
+        super().__init__(params)
+        self.assumed_speed = assumed_speed
+        self.records = []
+
+    def process_video_result(self, info_dict, download=True):
+        info_dict = super().process_video_result(info_dict, download)
+        self.records.append(ItemRecord.from_info(info_dict, self.assumed_speed))
+        return info_dict
+
+def plan_downloads(ydl_opts, link, assumed_speed=DEFAULT_ASSUMED_SPEED):
+    """Resolve formats without downloading and return an ItemRecord per item."""
+    opts = dict(ydl_opts, logger=MinimalLogger(), progress_hooks=[], extract_flat='discard_in_playlist')
+    with PlanningYoutubeDL(opts, assumed_speed) as ydl:
+        ydl.extract_info(link, download=False)
+        return ydl.records
+
+def resolve_entry_sizes(ydl_opts, link, entries, assumed_speed=DEFAULT_ASSUMED_SPEED):
+    """Fill each flat entry's size from its selected formats (one full extraction per item, as --plan)."""
+    sizes = {record.id: record.size for record in plan_downloads(ydl_opts, link, assumed_speed)}
+    for entry in entries:
+        entry.size = sizes.get(entry.id) or entry.size
+    return entries
+
+def make_admission_filter(logger, target_dir, reserve_bytes, staging=None, catalog=None):
+    """yt-dlp match_filter that only admits an item when its estimated size fits on disk.
+
+    With a staging area the merge headroom is needed there (and reserved), and
+    only the finished file has to fit in target_dir. Reserved keys are
+    collected in `admission_filter.admitted`. Videos already in the catalog are
+    skipped while still incomplete, so playlist entries are not even extracted.
+    """
+    def admission_filter(info, *, incomplete):
+        if incomplete:
+            if catalog and info.get('id') and catalog.contains(info['id']):
+                return f"{info['id']}: already downloaded (catalog)"
+            return None  # Formats are not selected yet
+        size = estimate_item_bytes(info)
+        if not size:
+            return None
+        working = required_disk_bytes(info, size)
+        needed = (size if staging else working) + reserve_bytes
+        free = shutil.disk_usage(target_dir).free
+        if needed <= free and staging:
+            available = staging.reserve(info.get('id'), working)
+            if available is None:
+                admission_filter.admitted.append(info.get('id'))
+                return None
+            msg = (f"[admission] {info.get('id')}: insufficient disk space in staging "
+                   f"(needs {format_bytes(working)}, {format_bytes(available)} available)")
+        elif needed <= free:
+            return None
+        else:
+            msg = (f"[admission] {info.get('id')}: insufficient disk space "
+                   f"(needs {format_bytes(needed)}, {format_bytes(free)} free)")
+        logger.record(msg, {'id': info.get('id'), 'title': info.get('title'),
+                            'playlist_index': info.get('playlist_index'),
+                            'webpage_url': info.get('webpage_url')})
+        return msg
+    admission_filter.admitted = []
+    return admission_filter
+
+# -----------------------------------------------
+# Queue Ordering Policies
+# -----------------------------------------------
+ORDER_POLICIES = ('index', 'shortest', 'size', 'priority')
+DEFAULT_FAIRNESS_INTERVAL = 10  # Every Nth slot goes to the oldest waiting item
+
+# Rough average bitrates (Mbit/s) per resolution cap, used when only the duration is known
+ESTIMATED_MBPS = {144: 0.1, 240: 0.25, 360: 0.5, 480: 1.0, 720: 2.5, 1080: 5.0,
+                  1440: 10.0, 2160: 20.0, 4320: 45.0}
+ESTIMATED_AUDIO_MBPS = 0.16
+
+def parse_playlist_items(spec):
+    """Expand a '5-30' or '5,8,9' selection into a set of indices (None means all)."""
+    if not spec:
+        return None
+    indices = set()
+    for part in spec.split(','):
+        start, _, end = part.partition('-')
+        indices.update(range(int(start), int(end or start) + 1))
+    return indices
+
+def estimate_size_from_duration(duration, config):
+    """Approximate bytes from duration and the configured resolution cap."""
+    if config.download_type == 'audio':
+        mbps = ESTIMATED_AUDIO_MBPS
+    else:
+        match = re.search(r'height<=(\d+)', config.format_option)
+        mbps = ESTIMATED_MBPS.get(int(match.group(1)), 5.0) if match else 5.0
+    return duration * mbps * 1e6 / 8
+
+def job_cost(entry, policy, config, priorities):
+    """Sort key for a job; lower runs first. Unknown durations go last.
+
+    'size' uses the size of the selected formats when the entry has one
+    (see resolve_entry_sizes) and only falls back to the duration estimate
+    without it.
+    """
+    if policy == 'priority':
+        return -priorities.get(entry.id, priorities.get(str(entry.index), 0))
+    if policy == 'size' and entry.size:
+        return entry.size
+    if entry.duration is None:
+        return float('inf')
+    if policy == 'size':
+        return estimate_size_from_duration(entry.duration, config)
+    return entry.duration
+
+def order_entries(entries, policy, config, priorities=None, fairness_interval=DEFAULT_FAIRNESS_INTERVAL):
+    """Order queue entries by policy while guaranteeing progress for deferred items.
+
+    Every ``fairness_interval``-th slot is handed to the waiting entry with the
+    lowest playlist index, so a long item is never pushed back indefinitely.
+    """
+    if policy == 'index':
+        return list(entries)
+    priorities = priorities or {}
+    by_cost = sorted(entries, key=lambda e: (job_cost(e, policy, config, priorities), e.index))
+    by_index = sorted(entries, key=lambda e: e.index)
+    ordered, taken = [], set()
+    cost_pos = index_pos = 0
+    while len(ordered) < len(entries):
+        use_oldest = fairness_interval and (len(ordered) + 1) % fairness_interval == 0
+        if use_oldest:
+            while by_index[index_pos].index in taken:
+                index_pos += 1
+            entry = by_index[index_pos]
+        else:
+            while by_cost[cost_pos].index in taken:
+                cost_pos += 1
+            entry = by_cost[cost_pos]
+        taken.add(entry.index)
+        ordered.append(entry)
+    return ordered
+
+def parse_priorities(values):
+    """Turn ['ID_OR_INDEX=N', ...] into a lookup dict."""
+    priorities = {}
+    for value in values or []:
+        key, _, level = value.partition('=')
+        priorities[key.strip()] = int(level)
+    return priorities
+
+def apply_queue_order(config, ydl_opts, entries, policy, priorities, fairness_interval, emit=discard):
+    """Reorder the download queue through yt-dlp's playlist_items, which keeps the given order."""
+    if policy == 'index' or not entries or config.content_type == 'single':
+        return ydl_opts
+    selected = parse_playlist_items(config.playlist_items)
+    queue = [e for e in entries if selected is None or e.index in selected]
+    ordered = order_entries(queue, policy, config, priorities, fairness_interval)
+    emit('queue_ordered', f"Queue order ({policy})", 'info',
+         f"{', '.join(str(e.index) for e in ordered[:20])}{' ...' if len(ordered) > 20 else ''}",
+         policy=policy, order=[e.index for e in ordered])
+    return dict(ydl_opts, playlist_items=','.join(str(e.index) for e in ordered))
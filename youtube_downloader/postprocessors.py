@@ -0,0 +1,330 @@
+"""yt-dlp post-processors and the YoutubeDL subclass the download passes run on."""
+import json
+import os
+import shutil
+import subprocess
+import time
+
+import yt_dlp
+from yt_dlp.downloader import get_suitable_downloader
+from yt_dlp.downloader.fragment import FragmentFD
+from yt_dlp.postprocessor import PostProcessor, FFmpegMergerPP, FFmpegExtractAudioPP
+
+from .encoding import ChunkedExtractAudioPP
+from .events import discard
+from .profiling import NullProfiler
+from .search import index_subtitles
+from .storage import PublishFilesPP, published_path
+from .subtitles import (clean_srt_duplicates, clip_srt_file, convert_vtt_to_srt, subtitle_track_language,
+                        translation_targets)
+from .translation import translate_srt
+from .turbo import SegmentedHttpFD, capped_fragment_downloader
+
+# -----------------------------------------------
+# Subtitle Post-processing
+# -----------------------------------------------
+class SubtitlePP(PostProcessor):
+    """Convert, clean, clip and translate the subtitles yt-dlp wrote for an item.
+
+    Runs at the 'before_dl' stage: the subtitle files exist by then and, unlike
+    in a progress hook, the full info dict (sections, chapters, ID) is available.
+    With embed=True the finished tracks are recorded in the info dict so they
+    can be muxed during the video+audio merge. Every output is registered for
+    publishing, so with a staging area it all moves to the final folder with
+    the media; SubtitleIndexPP indexes it there.
+    """
+    def __init__(self, subtitle_lang, translate_subtitles, target_langs, output='separate', embed=False,
+                 defer_translation=False, client=None, profiler=None, emit=discard, downloader=None):
+        super().__init__(downloader)
+        self.subtitle_lang = subtitle_lang
+        self.translate_subtitles = translate_subtitles
+        self.target_langs = target_langs
+        self.output = output
+        self.embed = embed
+        self.defer_translation = defer_translation  # Leave translation to the caller (async pipeline)
+        self.client = client
+        self.profiler = profiler or NullProfiler()
+        self.emit = emit
+        self.prepared = []  # (published source subtitle file, video ID, its language), in processing order
+
+    def run(self, info):
+        tracks = []
+        files_to_move = info.setdefault('__files_to_move', {})
+        info['__subtitle_outputs'] = []
+        source_lang = (info.get('__subtitle_choice') or {}).get('source_lang', self.subtitle_lang)
+        targets = translation_targets(source_lang, self.subtitle_lang, self.target_langs, self.translate_subtitles)
+        if self.defer_translation:
+            targets = []
+        for sub in (info.get('requested_subtitles') or {}).values():
+            subtitle_filename = sub.get('filepath')
+            if not subtitle_filename or not os.path.exists(subtitle_filename):
+                continue
+            if subtitle_filename.endswith('.vtt'):
+                with self.profiler.stage('convert'):
+                    new_filename = convert_vtt_to_srt(subtitle_filename, self.emit)
+                if new_filename:
+                    files_to_move.pop(subtitle_filename, None)
+                    os.remove(subtitle_filename)  # Would otherwise be left behind in the staging dir
+                    subtitle_filename = new_filename
+            with self.profiler.stage('clean'):
+                clean_srt_duplicates(subtitle_filename, self.emit)
+                if info.get('section_start') is not None or info.get('section_end') is not None:
+                    clip_srt_file(subtitle_filename, info.get('section_start'), info.get('section_end'), self.emit)
+            self.prepared.append((published_path(info, subtitle_filename), info.get('id'), source_lang))
+            if self.output == 'separate' or not targets:
+                tracks.append(subtitle_filename)
+            translated = []
+            if targets:
+                self.emit('translation_started', f"Translating subtitles from {source_lang} to {', '.join(targets)}...",
+                          'info', source=subtitle_filename, source_lang=source_lang, targets=targets)
+                with self.profiler.stage('translate'):
+                    translated = translate_srt(subtitle_filename, source_lang, targets, self.client,
+                                               output=self.output, emit=self.emit)
+                tracks.extend(translated)
+            for path in [subtitle_filename] + translated:
+                files_to_move[path] = published_path(info, path)
+                info['__subtitle_outputs'].append(published_path(info, path))
+        if self.embed and tracks:
+            info['__subtitle_tracks'] = tracks
+        return [], info
+
+class SubtitleIndexPP(PostProcessor):
+    """Index the item's finished subtitle files once they are at their final path."""
+    def __init__(self, profiler=None, emit=discard, downloader=None):
+        super().__init__(downloader)
+        self.profiler = profiler or NullProfiler()
+        self.emit = emit
+
+    def run(self, info):
+        outputs = [path for path in info.get('__subtitle_outputs') or [] if os.path.exists(path)]
+        if outputs:
+            with self.profiler.stage('index'):
+                index_subtitles(outputs, info.get('id'), self.emit)
+        return [], info
+
+class CollectResultsPP(PostProcessor):
+    """Append a {'id', 'title', 'playlist_index', 'filepath', 'subtitles'} record per finished item to `results`."""
+    def __init__(self, results, downloader=None):
+        super().__init__(downloader)
+        self.results = results
+
+    def run(self, info):
+        path = info.get('filepath')
+        if path and os.path.exists(path):
+            self.results.append({
+                'id': info.get('id'),
+                'title': info.get('title'),
+                'playlist_index': info.get('playlist_index'),
+                'filepath': path,
+                'subtitles': [p for p in info.get('__subtitle_outputs') or [] if os.path.exists(p)],
+            })
+        return [], info
+
+# -----------------------------------------------
+# Single-pass Subtitle Muxing
+# -----------------------------------------------
+class MergeWithSubtitlesPP(FFmpegMergerPP):
+    """FFmpegMergerPP that also muxes the finished subtitle tracks in the same ffmpeg run.
+
+    Without a merge (single progressive file) the tracks are muxed in one remux instead.
+    """
+    def __init__(self, downloader=None, profiler=None):
+        super().__init__(downloader)
+        self.profiler = profiler or NullProfiler()
+
+    def run(self, info):
+        tracks = [path for path in info.get('__subtitle_tracks') or [] if os.path.exists(path)]
+        if '__files_to_merge' not in info and not tracks:
+            return [], info
+        filename = info['filepath']
+        temp_filename = yt_dlp.utils.prepend_extension(filename, 'temp')
+        args = ['-c', 'copy']
+        if '__files_to_merge' in info:
+            inputs = list(info['__files_to_merge'])
+            audio_streams = 0
+            for (i, fmt) in enumerate(info['requested_formats']):
+                if fmt.get('acodec') != 'none':
+                    args.extend(['-map', f'{i}:a:0'])
+                    if fmt['protocol'].startswith('m3u8') and self.get_audio_codec(fmt['filepath']) == 'aac':
+                        args.extend([f'-bsf:a:{audio_streams}', 'aac_adtstoasc'])
+                    audio_streams += 1
+                if fmt.get('vcodec') != 'none':
+                    args.extend(['-map', f'{i}:v:0'])
+            to_delete = list(inputs)
+        else:
+            inputs = [filename]
+            args.extend(['-map', '0:v?', '-map', '0:a?'])
+            to_delete = []
+        media_inputs = len(inputs)
+        args.extend(['-c:s', 'mov_text' if info.get('ext') in ('mp4', 'm4a', 'mov') else 'copy'])
+        for k, track in enumerate(tracks):
+            lang = subtitle_track_language(track)
+            iso = yt_dlp.utils.ISO639Utils.short2long(lang.split('-')[-1]) or lang
+            args.extend(['-map', f'{media_inputs + k}:0', f'-metadata:s:s:{k}', f'language={iso}',
+                         f'-metadata:s:s:{k}', f'title={lang}'])
+        inputs.extend(tracks)
+        self.to_screen(f'Merging formats and {len(tracks)} subtitle track(s) into "{filename}"')
+        with self.profiler.stage('merge'):
+            self.run_ffmpeg_multiple_files(inputs, temp_filename, args)
+        os.replace(temp_filename, filename)
+        return to_delete, info
+
+class SubtitleMuxingYoutubeDL(yt_dlp.YoutubeDL):
+    """YoutubeDL whose merge step also embeds subtitle tracks, avoiding a second remux.
+
+    Finished files are published with PublishFilesPP instead of yt-dlp's move.
+
+    With the `turbo_connections` param, progressive HTTP formats are downloaded by SegmentedHttpFD and
+    DASH/HLS fragments count against the same connection cap.
+    With `encode_workers`, long MP3 extractions are encoded in parallel chunks by ChunkedExtractAudioPP.
+    The session supplies the connection cap and the profiler; `staging` is released as items publish.
+    """
+    def __init__(self, params=None, session=None, staging=None, auto_init=True):
+        self.session = session
+        self.staging = staging
+        super().__init__(params, auto_init)
+
+    def add_post_processor(self, pp, when='post_process'):
+        if type(pp) is FFmpegExtractAudioPP and self.params.get('encode_workers', 0) > 1:
+            pp = ChunkedExtractAudioPP(self, pp.mapping, pp._preferredquality, pp._nopostoverwrites,
+                                       self.params['encode_workers'], profiler=self.session.profiler)
+        super().add_post_processor(pp, when)
+
+    def dl(self, name, info, subtitle=False, test=False):
+        if (not self.params.get('turbo_connections') or subtitle or test or name == '-'
+                or self.params.get('external_downloader')):
+            return super().dl(name, info, subtitle, test)
+        if info.get('protocol') in ('http', 'https'):
+            fd = SegmentedHttpFD(self, self.params)
+        else:
+            fd_class = get_suitable_downloader(info, self.params)
+            if not issubclass(fd_class, FragmentFD):
+                return super().dl(name, info, subtitle, test)
+            fd = capped_fragment_downloader(fd_class)(self, self.params)
+        for ph in self._progress_hooks:
+            fd.add_progress_hook(ph)
+        new_info = self._copy_infodict(info)
+        if new_info.get('http_headers') is None:
+            new_info['http_headers'] = self._calc_headers(new_info)
+        return fd.download(name, new_info, subtitle)
+
+    def post_process(self, filename, info, files_to_move=None):
+        pps = info.setdefault('__postprocessors', [])
+        merged = False
+        for i, pp in enumerate(pps):
+            if type(pp) is FFmpegMergerPP:
+                pps[i] = MergeWithSubtitlesPP(self, self.session.profiler)
+                merged = True
+        if not merged and info.get('__subtitle_tracks'):
+            pps.append(MergeWithSubtitlesPP(self, self.session.profiler))
+        # Same steps as YoutubeDL.post_process, with the atomic publish in place of the move
+        info['filepath'] = filename
+        info['__files_to_move'] = files_to_move or {}
+        info = self.run_all_pps('post_process', info, additional_pps=info.get('__postprocessors'))
+        info = self.run_pp(PublishFilesPP(self, staging=self.staging, profiler=self.session.profiler), info)
+        del info['__files_to_move']
+        return self.run_all_pps('after_move', info)
+
+# -----------------------------------------------
+# Post-download Integrity Verification
+# -----------------------------------------------
+QUARANTINE_DIR = os.path.join("Downloaded", "_quarantine")
+# A file may be this much shorter than the info dict's duration (seconds, fraction) before it counts as truncated
+DURATION_TOLERANCE = (2.0, 0.01)
+
+def verify_media_file(path, expected_duration=None, tolerance=DURATION_TOLERANCE):
+    """Return None if the file looks complete, otherwise why it failed.
+
+    Runs in a worker process: ffprobe reads the container duration, then
+    ffmpeg demuxes every packet without decoding, which catches truncated
+    or corrupt streams at close to disk speed.
+    """
+    try:
+        probe = subprocess.run(['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'json', path],
+                               capture_output=True, text=True, timeout=300)
+        if probe.returncode:
+            return f"ffprobe failed: {(probe.stderr.strip().splitlines() or ['unreadable file'])[-1]}"
+        duration = float((json.loads(probe.stdout).get('format') or {}).get('duration') or 0)
+        if expected_duration:
+            allowed = max(tolerance[0], expected_duration * tolerance[1])
+            if duration < expected_duration - allowed:
+                return f"duration {duration:.1f}s, expected {expected_duration:.1f}s"
+        scan = subprocess.run(['ffmpeg', '-v', 'error', '-i', path, '-map', '0', '-c', 'copy', '-f', 'null', '-'],
+                              capture_output=True, text=True, timeout=1800)
+        errors = scan.stderr.strip().splitlines()
+        if scan.returncode or errors:
+            return f"stream errors: {errors[0] if errors else f'ffmpeg exited with {scan.returncode}'}"
+    except (OSError, subprocess.SubprocessError, ValueError) as e:
+        return f"verification failed: {e}"
+    return None
+
+def expected_duration(info):
+    """Duration the finished file should have; a downloaded section only covers its range."""
+    if info.get('section_start') is not None and info.get('section_end') is not None:
+        return info['section_end'] - info['section_start']
+    return info.get('duration')
+
+def quarantine_file(path, video_id=None):
+    """Move a failed file to QUARANTINE_DIR as '<name> [<id>] <timestamp>.<ext>', never over an earlier one."""
+    os.makedirs(QUARANTINE_DIR, exist_ok=True)
+    stem, ext = os.path.splitext(os.path.basename(path))
+    tag = f" [{video_id}]" if video_id and video_id not in stem else ''
+    base = os.path.join(QUARANTINE_DIR, f"{stem}{tag} {time.strftime('%Y%m%d-%H%M%S')}")
+    target, counter = base + ext, 1
+    while os.path.exists(target):
+        counter += 1
+        target = f"{base}-{counter}{ext}"
+    shutil.move(path, target)
+    return target
+
+class IntegrityCheckPP(PostProcessor):
+    """Queue each finished file for verification in the process pool.
+
+    Runs 'after_move', so the check of one item overlaps the download of the
+    next. collect() waits for this pass's checks, moves failed files to
+    QUARANTINE_DIR and returns them as 'integrity' failures, which the
+    retry passes download again.
+    """
+    def __init__(self, executor, downloader=None, emit=discard):
+        super().__init__(downloader)
+        self.executor = executor
+        self.emit = emit
+        self.pending = []  # (future, item, path)
+
+    def run(self, info):
+        path = info.get('filepath')
+        if path and os.path.exists(path):
+            item = {'id': info.get('id'), 'title': info.get('title'), 'playlist_index': info.get('playlist_index'),
+                    'url': info.get('webpage_url')}
+            try:
+                future = self.executor.submit(verify_media_file, path, expected_duration(info))
+            except RuntimeError as e:  # BrokenProcessPool, or a pool that was shut down
+                self.skipped(self.emit, item, path, e)
+            else:
+                self.pending.append((future, item, path))
+        return [], info
+
+    @staticmethod
+    def skipped(emit, item, path, error):
+        """The check itself broke (not the file): keep the file and say it was not verified."""
+        reason = str(error) or type(error).__name__
+        emit('integrity_check_skipped', "Warning", 'warning', f"Could not verify {path}: {reason}",
+             id=item['id'], path=path, reason=reason)
+
+    def collect(self, emit=discard):
+        failures = {}
+        for future, item, path in self.pending:
+            try:
+                reason = future.result()
+            except Exception as e:  # The pool broke, or the check raised
+                self.skipped(emit, item, path, e)
+                continue
+            if reason is None:
+                continue
+            target = quarantine_file(path, item['id'])
+            emit('integrity_failed', "Integrity check failed", 'error', f"{path} ({reason}), moved to {target}",
+                 id=item['id'], path=path, quarantined=target, reason=reason)
+            failures[item['id'] or path] = dict(item, attempts=0, category='integrity',
+                                                message=f"integrity check failed: {reason}")
+        self.pending = []
+        return failures
@@ -0,0 +1,133 @@
+"""Per-stage profiling for --profile and sampled runs."""
+import contextlib
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+
+from .failures import REPORT_DIR
+
+class NullProfiler:
+    """Used when profiling is off: a stage costs one call and an empty context manager."""
+    def stage(self, name, profile=True):
+        return contextlib.nullcontext()
+
+class StageProfiler:
+    """One cProfile per stage (per thread, merged on write) plus tracemalloc peak and top allocations.
+
+    Only one cProfile can be active at a time (per process since Python 3.12,
+    which builds it on sys.monitoring), so entering a nested stage pauses the
+    enclosing stage's profiler and resumes it on exit: functions are
+    attributed to the innermost stage, wall times are inclusive. A stage that
+    starts while another thread is profiling, or while another profiling tool
+    is active, gets wall-clock timing only and is counted as unprofiled. A
+    memory snapshot is kept whenever the traced heap at a stage boundary has
+    grown by a quarter since the last one, so snapshots stay few on long runs.
+    """
+    def __init__(self, memory_frames=1):
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._profiles = []  # (stage, cProfile.Profile), one per stage and thread
+        self._owner = None  # Thread whose profiler is running
+        self.wall = {}
+        self.calls = {}
+        self.unprofiled = {}
+        self.snapshot = None
+        self.snapshot_bytes = 0
+        self.started = time.perf_counter()
+        tracemalloc.start(memory_frames)
+
+    @contextlib.contextmanager
+    def stage(self, name, profile=True):
+        """Time a stage; with profile=False it never takes the profiler (e.g. a stage spanning worker threads)."""
+        stack = self._local.__dict__.setdefault('stack', [])
+        profiles = self._local.__dict__.setdefault('profiles', {})
+        if name not in profiles:
+            profiles[name] = cProfile.Profile()
+            with self._lock:
+                self._profiles.append((name, profiles[name]))
+        if stack:
+            self._stop(stack[-1])
+        entry = [profiles[name], False, profile]  # [cProfile, running, wanted]
+        stack.append(entry)
+        started = time.perf_counter()
+        self._start(entry)
+        profiled = entry[1]
+        try:
+            yield
+        finally:
+            self._stop(entry)
+            stack.pop()
+            with self._lock:
+                self.wall[name] = self.wall.get(name, 0.0) + time.perf_counter() - started
+                self.calls[name] = self.calls.get(name, 0) + 1
+                if not profiled:
+                    self.unprofiled[name] = self.unprofiled.get(name, 0) + 1
+            self._maybe_snapshot()
+            if stack:
+                self._start(stack[-1])
+
+    def _start(self, entry):
+        if not entry[2]:
+            return
+        with self._lock:
+            if self._owner is not None:
+                return  # Another thread is profiling
+            try:
+                entry[0].enable()
+            except ValueError:  # Another profiling tool is already active
+                return
+            self._owner = threading.get_ident()
+            entry[1] = True
+
+    def _stop(self, entry):
+        if entry[1]:
+            entry[0].disable()
+            entry[1] = False
+            with self._lock:
+                self._owner = None
+
+    def _maybe_snapshot(self):
+        current = tracemalloc.get_traced_memory()[0]
+        if current > self.snapshot_bytes * 1.25:
+            self.snapshot, self.snapshot_bytes = tracemalloc.take_snapshot(), current
+
+    def write(self, report_dir=REPORT_DIR):
+        """Write <stage>.prof files (pstats/snakeviz), memory.tracemalloc and summary.json; returns the folder."""
+        current, peak = tracemalloc.get_traced_memory()
+        self._maybe_snapshot()
+        tracemalloc.stop()
+        out_dir = os.path.join(report_dir, time.strftime('profile-%Y%m%d-%H%M%S'))
+        os.makedirs(out_dir, exist_ok=True)
+        merged = {}
+        for name, profile in self._profiles:
+            try:
+                stats = pstats.Stats(profile)
+            except TypeError:  # Never enabled: its stage was only timed
+                continue
+            if name in merged:
+                merged[name].add(stats)
+            else:
+                merged[name] = stats
+        for name, stats in merged.items():
+            stats.dump_stats(os.path.join(out_dir, f"{name}.prof"))
+        top = []
+        if self.snapshot:
+            snapshot = self.snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+            snapshot.dump(os.path.join(out_dir, 'memory.tracemalloc'))
+            top = [{'location': str(stat.traceback), 'bytes': stat.size, 'count': stat.count}
+                   for stat in snapshot.statistics('lineno')[:25]]
+        summary = {
+            'total_seconds': round(time.perf_counter() - self.started, 3),
+            'stages': {name: {'wall_seconds': round(self.wall[name], 3), 'calls': self.calls[name],
+                              'unprofiled_calls': self.unprofiled.get(name, 0)}
+                       for name in sorted(self.wall, key=self.wall.get, reverse=True)},
+            'memory': {'peak_bytes': peak, 'end_bytes': current, 'snapshot_bytes': self.snapshot_bytes,
+                       'top_allocations': top},
+        }
+        with open(os.path.join(out_dir, 'summary.json'), 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2)
+        return out_dir
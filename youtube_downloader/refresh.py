@@ -0,0 +1,184 @@
+"""Subtitle-only runs: re-fetch caption tracks and reprocess only the ones that changed."""
+import hashlib
+import json
+import os
+import shutil
+
+import yt_dlp
+from yt_dlp.postprocessor import PostProcessor
+
+from .events import discard
+from .failures import MinimalLogger
+from .search import index_subtitles
+from .subtitles import clean_srt_duplicates, convert_vtt_to_srt, translation_targets
+from .translation import translate_srt, translate_srt_batch
+from .utils import atomic_write
+
+# -----------------------------------------------
+# Incremental Refresh with a Subtitle Manifest
+# -----------------------------------------------
+MANIFEST_FILE = os.path.join("Downloaded", ".subtitle_manifest.json")
+# yt-dlp fetches captions here first, so a re-fetch never overwrites processed files
+SUBTITLE_CACHE_DIR = os.path.join("Downloaded", ".subtitle_cache")
+
+def load_manifest():
+    try:
+        with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(manifest):
+    with atomic_write(MANIFEST_FILE) as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+
+class SubtitleRefreshPP(PostProcessor):
+    """Process each fetched caption track only if its payload changed since the last run.
+
+    The manifest keys tracks by (video ID, language, manual/auto) and stores
+    the SHA-256 of the fetched bytes, the settings used and the files produced.
+    An unchanged track whose outputs still exist skips conversion, cleaning
+    and translation. Runs at 'before_dl', while the fetched files are still
+    in SUBTITLE_CACHE_DIR. With `batch`, changed tracks are only cleaned here;
+    translate_pending() then translates them all in one cross-file batch.
+    """
+    def __init__(self, manifest, subtitle_lang, translate_subtitles, target_langs, output='separate',
+                 client=None, emit=discard, batch=False, downloader=None):
+        super().__init__(downloader)
+        self.manifest = manifest
+        self.subtitle_lang = subtitle_lang
+        self.translate_subtitles = translate_subtitles
+        self.target_langs = target_langs
+        self.output = output
+        self.client = client
+        self.emit = emit
+        self.batch = batch
+        self.pending = []  # (srt file, source language, targets, video ID, track language, manifest key, digest, title)
+        self.skipped = 0
+        self.processed = 0
+
+    def settings(self):
+        return {'translate': self.translate_subtitles, 'targets': self.target_langs, 'output': self.output}
+
+    def run(self, info):
+        files_to_move = info.get('__files_to_move') or {}
+        for lang, sub in (info.get('requested_subtitles') or {}).items():
+            fetched = sub.get('filepath')
+            if not fetched or not os.path.exists(fetched):
+                continue
+            files_to_move.pop(fetched, None)
+            choice = info.get('__subtitle_choice')
+            if choice:
+                kind = 'manual' if choice['kind'].startswith('manual') else 'auto'
+            else:
+                kind = 'manual' if lang in (info.get('subtitles') or {}) else 'auto'
+            key = f"{info['id']}:{lang}:{kind}"
+            with open(fetched, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+            entry = self.manifest.get(key)
+            if (entry and entry['sha256'] == digest and entry['settings'] == self.settings()
+                    and all(os.path.exists(path) for path in entry['outputs'])):
+                self.emit('subtitles_unchanged', f"Unchanged {kind} {lang} subtitles, skipped", 'info',
+                          info.get('title', info['id']), id=info['id'], lang=lang)
+                os.remove(fetched)
+                self.skipped += 1
+                continue
+            self.process(info, lang, sub, fetched, key, digest)
+        return [], info
+
+    def process(self, info, lang, sub, fetched, key, digest):
+        final_path = yt_dlp.utils.subtitles_filename(self._downloader.prepare_filename(info), lang,
+                                                     sub['ext'], info.get('ext'))
+        os.makedirs(os.path.dirname(final_path) or '.', exist_ok=True)
+        shutil.move(fetched, final_path)
+        self.emit('subtitles_updated', "\nSubtitles updated", 'success', final_path, id=info['id'], path=final_path)
+        subtitle_filename = final_path
+        if subtitle_filename.endswith('.vtt'):
+            subtitle_filename = convert_vtt_to_srt(subtitle_filename, self.emit)
+            if not subtitle_filename:
+                return
+        clean_srt_duplicates(subtitle_filename, self.emit)
+        outputs = [subtitle_filename]
+        source_lang = (info.get('__subtitle_choice') or {}).get('source_lang', self.subtitle_lang)
+        targets = translation_targets(source_lang, self.subtitle_lang, self.target_langs, self.translate_subtitles)
+        if targets and self.batch:
+            self.pending.append((subtitle_filename, source_lang, targets, info['id'], lang, key, digest,
+                                 info.get('title')))
+            return
+        if targets:
+            self.emit('translation_started', f"Translating subtitles from {source_lang} to {', '.join(targets)}...",
+                      'info', source=subtitle_filename, source_lang=source_lang, targets=targets)
+            translated = translate_srt(subtitle_filename, source_lang, targets, self.client, output=self.output,
+                                       emit=self.emit)
+            if len(translated) < len(targets):
+                return  # Leave the track out of the manifest so the next run retries it
+            outputs.extend(translated)
+        self.record(info['id'], lang, key, digest, outputs, info.get('title'))
+
+    def record(self, video_id, lang, key, digest, outputs, title):
+        # A manual track replacing an auto one (or the reverse) supersedes the old entry
+        for other_kind in ('manual', 'auto'):
+            self.manifest.pop(f"{video_id}:{lang}:{other_kind}", None)
+        self.manifest[key] = {'sha256': digest, 'settings': self.settings(), 'outputs': outputs, 'title': title}
+        save_manifest(self.manifest)
+        index_subtitles(outputs, video_id, self.emit)
+        self.processed += 1
+
+    def translate_pending(self):
+        """Translate the tracks collected in batch mode, sharing requests across all of them."""
+        if not self.pending:
+            return
+        targets = list(dict.fromkeys(target for _, _, track_targets, *_ in self.pending for target in track_targets))
+        self.emit('translation_started',
+                  f"\nTranslating {len(self.pending)} subtitle file(s) to {', '.join(targets)}...", 'info',
+                  files=len(self.pending), targets=targets)
+        written = translate_srt_batch([(path, source_lang, track_targets)
+                                       for path, source_lang, track_targets, *_ in self.pending],
+                                      self.client, output=self.output, emit=self.emit)
+        for path, _, track_targets, video_id, lang, key, digest, title in self.pending:
+            translated = written.get(path, [])
+            if len(translated) == len(track_targets):  # Otherwise the next run retries the track
+                self.record(video_id, lang, key, digest, [path] + translated, title)
+        self.pending = []
+
+def build_refresh_opts(session, config, output_template):
+    """yt-dlp options that fetch only the caption tracks, into SUBTITLE_CACHE_DIR."""
+    ydl_opts = {
+        'outtmpl': {'default': output_template, 'subtitle': '%(id)s.%(ext)s'},
+        'paths': {'temp': SUBTITLE_CACHE_DIR, 'subtitle': SUBTITLE_CACHE_DIR},
+        'overwrites': True,  # Always re-fetch; unchanged payloads are skipped by SubtitleRefreshPP
+        'progress_hooks': [session.progress_hook],
+        'skip_download': True,
+        'writesubtitles': True,
+        'subtitleslangs': [config.subtitle_lang],
+        'writeautomaticsub': config.auto_subs,
+        'convertsubtitles': 'srt',
+        'encoding': 'utf-8',
+        'extract_flat': 'discard_in_playlist',  # Free each playlist entry's info dict once it is processed
+        'ignoreerrors': True,
+        'retries': 10,
+        'fragment_retries': 10,
+        'socket_timeout': 60,
+        'quiet': True,
+        'no_warnings': True,
+        'logger': MinimalLogger(session.emit)
+    }
+
+    if config.content_type == 'single':
+        ydl_opts['noplaylist'] = True
+
+    if config.content_type == 'playlist' and config.playlist_items:
+        ydl_opts['playlist_items'] = config.playlist_items
+
+    return ydl_opts
+
+def refresh_output_template(session, config):
+    """Final subtitle paths: the same folders and names the downloader uses for the media."""
+    if config.content_type == 'single':
+        return 'Downloaded/%(title)s.%(ext)s'
+    if config.content_type == 'playlist':
+        session.emit('extracting', "\nRetrieving playlist info...", 'info', link=config.link)
+        total_videos = len(session.extract(config.link).get('entries') or []) or 1
+        num_digits = max(2, len(str(total_videos)))
+        return f"Downloaded/%(playlist_title)s/%(playlist_index)0{num_digits}d - %(title)s.%(ext)s"
+    return 'Downloaded/%(uploader)s/%(title)s.%(ext)s'
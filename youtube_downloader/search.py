@@ -0,0 +1,73 @@
+"""Subtitle search index (SQLite FTS5) kept up to date as subtitle files are written."""
+import os
+import sqlite3
+
+from .events import discard
+from .subtitles import parse_srt
+
+SEARCH_INDEX = os.path.join("Downloaded", ".subtitle_index.sqlite")
+
+def open_search_index(path=SEARCH_INDEX):
+    """Open (creating if needed) the cue index: a cue table plus an FTS5 index over its text."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30)
+    conn.execute("PRAGMA journal_mode=WAL")  # Searches keep working while downloads add files
+    conn.executescript("""
+        CREATE TABLE IF NOT EXISTS files (
+            path TEXT PRIMARY KEY, video_id TEXT, lang TEXT, mtime REAL, size INTEGER);
+        CREATE TABLE IF NOT EXISTS cues (
+            id INTEGER PRIMARY KEY, path TEXT NOT NULL, video_id TEXT, lang TEXT,
+            start REAL, end REAL, text TEXT);
+        CREATE INDEX IF NOT EXISTS cues_path ON cues(path);
+        CREATE VIRTUAL TABLE IF NOT EXISTS cue_text USING fts5(text, content='cues', content_rowid='id');
+        CREATE TRIGGER IF NOT EXISTS cues_ai AFTER INSERT ON cues BEGIN
+            INSERT INTO cue_text(rowid, text) VALUES (new.id, new.text);
+        END;
+        CREATE TRIGGER IF NOT EXISTS cues_ad AFTER DELETE ON cues BEGIN
+            INSERT INTO cue_text(cue_text, rowid, text) VALUES ('delete', old.id, old.text);
+        END;
+    """)
+    return conn
+
+def index_path(path):
+    """The form a path is stored in the index: relative to the working directory, like 'Downloaded/...'.
+
+    Staged downloads report absolute published paths, a directory scan
+    relative ones; both must map to the same row.
+    """
+    path = os.path.abspath(path)
+    try:
+        return os.path.relpath(path)
+    except ValueError:  # On another drive (Windows)
+        return path
+
+def index_subtitle_file(conn, path, video_id=None):
+    """(Re)index one .srt file if it changed since it was last indexed. Returns True if indexed."""
+    stat = os.stat(path)
+    path = index_path(path)
+    row = conn.execute("SELECT video_id, mtime, size FROM files WHERE path = ?", (path,)).fetchone()
+    if row and row[1] == stat.st_mtime and row[2] == stat.st_size and video_id in (None, row[0]):
+        return False
+    video_id = video_id or (row[0] if row else None)
+    lang = path.rsplit('.', 2)[-2]
+    with conn:
+        conn.execute("DELETE FROM cues WHERE path = ?", (path,))
+        conn.executemany(
+            "INSERT INTO cues (path, video_id, lang, start, end, text) VALUES (?, ?, ?, ?, ?, ?)",
+            [(path, video_id, lang, cue['start'], cue['end'], cue['text']) for cue in parse_srt(path)])
+        conn.execute("INSERT OR REPLACE INTO files (path, video_id, lang, mtime, size) VALUES (?, ?, ?, ?, ?)",
+                     (path, video_id, lang, stat.st_mtime, stat.st_size))
+    return True
+
+def index_subtitles(paths, video_id=None, emit=discard):
+    """Add freshly written subtitle files to the search index; never fails the download."""
+    try:
+        conn = open_search_index()
+        try:
+            for path in paths:
+                if path and path.endswith('.srt') and os.path.exists(path):
+                    index_subtitle_file(conn, path, video_id)
+        finally:
+            conn.close()
+    except sqlite3.Error as e:
+        emit('search_index_failed', "Warning", 'warning', f"Could not update the subtitle index: {e}")
@@ -0,0 +1,277 @@
+"""Session: the state a frontend or service keeps between download jobs."""
+import asyncio
+import dataclasses
+import os
+import queue
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+import yt_dlp
+
+from .download import (batches_translation, build_output_template, build_ydl_opts, retry_targets,
+                       retry_transient_failures, run_download, translate_deferred)
+from .events import Event
+from .failures import MinimalLogger, report_failures, write_failure_report
+from .pipeline import AsyncPipeline
+from .planning import (DEFAULT_ASSUMED_SPEED, DEFAULT_FAIRNESS_INTERVAL, DEFAULT_RESERVE_MB, apply_queue_order,
+                       plan_downloads, resolve_entry_sizes)
+from .profiling import NullProfiler, StageProfiler
+from .refresh import SubtitleRefreshPP, build_refresh_opts, load_manifest, refresh_output_template
+from .storage import VIEWS_DIR, Catalog, StagingArea, rebuild_views
+from .subtitles import SubtitleResolverPP
+from .translation import TranslatorClient, translate_srt
+from .turbo import DEFAULT_MAX_CONNECTIONS
+from .watch import DEFAULT_WATCH_INTERVAL, FEED_URL, FeedPoller, WatchState, watch_channels
+
+@dataclasses.dataclass
+class DownloadResult:
+    """Outcome of Session.download()."""
+    items: List[dict] = dataclasses.field(default_factory=list)  # {'id', 'title', 'playlist_index', 'filepath', 'subtitles'}
+    failures: Dict[str, dict] = dataclasses.field(default_factory=dict)  # Keyed by video ID, as in the report
+    report_path: Optional[str] = None
+
+    @property
+    def ok(self):
+        return not self.failures
+
+@dataclasses.dataclass
+class RefreshResult:
+    """Outcome of Session.refresh_subtitles()."""
+    processed: int = 0
+    skipped: int = 0
+
+class Session:
+    """Reusable downloader state for running many jobs in one process.
+
+    Holds the translator client (with its cache and rate limit), a pool of
+    quiet flat extractors, the turbo connection cap, the integrity-check
+    process pool and, once a job needs them, the staging areas and the
+    catalog. Status goes to the `on_event` callbacks as Event objects instead
+    of the console. Sessions share nothing with each other, and one session
+    can run jobs from several threads. close() (or leaving a `with` block)
+    releases the pools and connections.
+    """
+    def __init__(self, on_event=None, translator=None, max_connections=DEFAULT_MAX_CONNECTIONS, verify_workers=0,
+                 profile=False):
+        self.handlers = [on_event] if on_event else []
+        self.translator = translator or TranslatorClient()
+        self._owns_translator = translator is None
+        self.profiler = StageProfiler() if profile else NullProfiler()
+        self.turbo_connections = threading.BoundedSemaphore(max_connections)  # Open connections of all turbo downloads
+        self.max_connections = max_connections
+        self.verify_executor = None  # ProcessPoolExecutor shared by all passes
+        if verify_workers:
+            if shutil.which('ffprobe') and shutil.which('ffmpeg'):
+                self.verify_executor = ProcessPoolExecutor(max_workers=verify_workers)
+            else:
+                self.emit('verify_unavailable', "ffprobe/ffmpeg not found, skipping integrity checks.", 'warning')
+        self.catalog = None  # Opened by the first job with the sharded layout
+        self._staging = {}
+        self._extractors = queue.LifoQueue()
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    # -----------------------------------------------
+    # Events
+    # -----------------------------------------------
+    def emit(self, kind, message, level='info', detail='', **data):
+        """Hand one Event to every callback; the `emit` passed to the library functions."""
+        event = Event(kind, message, level, detail, data)
+        for handler in self.handlers:
+            handler(event)
+
+    def progress_hook(self, d):
+        """yt-dlp progress hook that reports through the session's events."""
+        if d['status'] == 'downloading':
+            self.emit('download_progress', "Downloading", 'progress', os.path.basename(d.get('filename') or ''),
+                      filename=d.get('filename'), downloaded_bytes=d.get('downloaded_bytes') or 0,
+                      total_bytes=d.get('total_bytes'), speed=d.get('speed'))
+        elif d['status'] == 'finished':
+            self.emit('download_finished', "Download completed", 'success', d.get('filename', 'Unknown file'),
+                      filename=d.get('filename'))
+
+    # -----------------------------------------------
+    # Shared resources
+    # -----------------------------------------------
+    def extract(self, url, process=True, **params):
+        """Info dict of `url` (flat by default) from one of the session's reusable extractors.
+
+        `params` are yt-dlp options for this call only, e.g. playlist_items,
+        playlistend, or noplaylist=True with extract_flat=False for full formats.
+        """
+        try:
+            ydl = self._extractors.get_nowait()
+        except queue.Empty:
+            ydl = yt_dlp.YoutubeDL({'quiet': True, 'extract_flat': True, 'no_warnings': True,
+                                    'logger': MinimalLogger(self.emit)})
+        saved = dict(ydl.params)
+        ydl.params.update(params)
+        try:
+            return ydl.extract_info(url, download=False, process=process)
+        finally:
+            ydl.params.clear()
+            ydl.params.update(saved)
+            self._extractors.put(ydl)
+
+    def staging_for(self, config, reserve_bytes=DEFAULT_RESERVE_MB * 1024 ** 2):
+        """The StagingArea of config.staging_dir, shared by every job that stages there."""
+        if not config.staging_dir:
+            return None
+        key = os.path.abspath(config.staging_dir)
+        with self._lock:
+            if key not in self._staging:
+                self._staging[key] = StagingArea(config.staging_dir, reserve_bytes)
+            return self._staging[key]
+
+    def catalog_for(self, config):
+        """The catalog for the sharded layout, or None for the title layout."""
+        if config.layout != 'sharded':
+            return None
+        with self._lock:
+            if self.catalog is None:
+                self.catalog = Catalog()
+            return self.catalog
+
+    # -----------------------------------------------
+    # Jobs
+    # -----------------------------------------------
+    def download(self, config, previous=None, reserve_bytes=DEFAULT_RESERVE_MB * 1024 ** 2, order='index',
+                 priorities=None, fairness_interval=DEFAULT_FAIRNESS_INTERVAL, use_async=False, download_workers=2,
+                 translate_workers=2, queue_size=4, max_retry_passes=3):
+        """Download what `config` describes and return a DownloadResult.
+
+        With `previous` (the failures of a report, see read_failure_report) only
+        those items are downloaded again. Transient failures get up to
+        `max_retry_passes` deferred retries; what is left is written to the
+        failure report. Subtitles are translated once all passes are done, in
+        one batch across the run's files, unless they are embedded or
+        `use_async` overlaps translation with the downloads. `use_async` runs
+        the AsyncPipeline on its own event loop, so call it from a thread that
+        is not running one.
+        """
+        os.makedirs("Downloaded", exist_ok=True)
+        with self.profiler.stage('extract'):
+            output_template, entries = build_output_template(self, config, list_entries=order != 'index')
+        index_by_id = {entry.id: entry.index for entry in entries if entry.id}
+        ydl_opts = build_ydl_opts(self, config, output_template)
+        items = []
+        deferred = [] if batches_translation(config) and not use_async else None
+        if previous is None:
+            if order == 'size' and entries:
+                self.emit('resolving_sizes', "\nResolving formats to order the queue by size...", 'info')
+                with self.profiler.stage('extract'):
+                    resolve_entry_sizes(ydl_opts, config.link, entries)
+            ordered_opts = apply_queue_order(config, ydl_opts, entries, order, priorities or {}, fairness_interval,
+                                             self.emit)
+            if use_async:
+                pipeline = AsyncPipeline(self, config, ordered_opts, index_by_id, reserve_bytes, download_workers,
+                                         translate_workers, queue_size, items)
+                with self.profiler.stage('pipeline', profile=False):  # The workers' stages take the profiler
+                    failures = asyncio.run(pipeline.run())
+            else:
+                failures = run_download(self, config, ordered_opts, [config.link], reserve_bytes=reserve_bytes,
+                                        results=items, deferred=deferred)
+        else:
+            retry = [entry for entry in previous.values() if entry.get('id')]
+            opts, urls = retry_targets(config, ydl_opts, retry, index_by_id)
+            failures = run_download(self, config, opts, urls, previous, reserve_bytes, results=items,
+                                    deferred=deferred) if retry else {}
+            # Items without an ID cannot be retried, keep them visible in the new report
+            failures.update({key: entry for key, entry in previous.items() if not entry.get('id')})
+        failures = retry_transient_failures(self, config, ydl_opts, failures, index_by_id, max_retry_passes,
+                                            reserve_bytes=reserve_bytes, results=items, deferred=deferred)
+        if deferred:
+            translate_deferred(self, config, deferred, items)
+        report_path = write_failure_report(config, failures)
+        report_failures(self.emit, failures, report_path)
+        return DownloadResult(items, failures, report_path)
+
+    def plan(self, config, assumed_speed=DEFAULT_ASSUMED_SPEED):
+        """Resolve formats without downloading; returns an ItemRecord per item."""
+        with self.profiler.stage('extract'):
+            output_template, _ = build_output_template(self, config)
+        return plan_downloads(build_ydl_opts(self, config, output_template), config.link, assumed_speed)
+
+    def watch(self, config, sources, state=None, feed_url=FEED_URL, workers=16, interval=DEFAULT_WATCH_INTERVAL,
+              once=False, reserve_bytes=DEFAULT_RESERVE_MB * 1024 ** 2, max_retry_passes=3):
+        """Poll the channels in `sources` and download their new uploads; see watch_channels."""
+        with self.profiler.stage('extract'):
+            output_template, _ = build_output_template(self, config)
+        ydl_opts = build_ydl_opts(self, config, output_template)
+        own_state = state is None
+        state = state or WatchState()
+        try:
+            return watch_channels(self, config, ydl_opts, sources, state, FeedPoller(feed_url), workers, interval,
+                                  once, reserve_bytes, max_retry_passes)
+        finally:
+            if own_state:
+                state.close()
+
+    def refresh_subtitles(self, config):
+        """Fetch the caption tracks only, reprocessing those that changed since the last run.
+
+        The changed tracks are translated together at the end, in one cross-file batch.
+        """
+        os.makedirs("Downloaded", exist_ok=True)
+        ydl_opts = build_refresh_opts(self, config, refresh_output_template(self, config))
+        refresh_pp = SubtitleRefreshPP(load_manifest(), config.subtitle_lang, config.translate_subtitles,
+                                       config.target_langs, config.subtitle_output, self.translator, self.emit,
+                                       batch=True)
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            ydl.add_post_processor(SubtitleResolverPP(config.subtitle_lang, config.auto_subs,
+                                                      config.subtitle_preference, self.emit),
+                                   when='pre_process')
+            ydl.add_post_processor(refresh_pp, when='before_dl')
+            ydl.download([config.link])
+        with self.profiler.stage('translate'):
+            refresh_pp.translate_pending()
+        self.emit('refresh_finished', f"\n{refresh_pp.processed} track(s) updated, {refresh_pp.skipped} unchanged.",
+                  'success', processed=refresh_pp.processed, skipped=refresh_pp.skipped)
+        return RefreshResult(refresh_pp.processed, refresh_pp.skipped)
+
+    def translate_file(self, path, subtitle_lang, target_langs, reflow=True, output='separate'):
+        """Translate one SRT file with the session's client; returns the files written."""
+        return translate_srt(path, subtitle_lang, target_langs, self.translator, reflow, output, self.emit)
+
+    def rebuild_views(self, views_dir=VIEWS_DIR):
+        """Recreate the sharded layout's views from the catalog. Returns (links, missing files dropped)."""
+        catalog = self.catalog or Catalog()
+        try:
+            links, missing = rebuild_views(catalog, views_dir)
+        finally:
+            if catalog is not self.catalog:
+                catalog.close()
+        self.emit('views_rebuilt', "Views rebuilt in", 'success',
+                  f"{views_dir} ({links} link(s), {missing} missing file(s) dropped from the catalog)",
+                  links=links, missing=missing)
+        return links, missing
+
+    def write_profile(self):
+        """Write the profile of a profiling session; returns its folder (None when not profiling)."""
+        if not isinstance(self.profiler, StageProfiler):
+            return None
+        path = self.profiler.write()
+        self.emit('profile_written', "Profile saved to", 'warning', path, path=path)
+        return path
+
+    def close(self):
+        if self.verify_executor:
+            self.verify_executor.shutdown()
+            self.verify_executor = None
+        if self.catalog:
+            self.catalog.close()
+            self.catalog = None
+        while True:
+            try:
+                self._extractors.get_nowait().close()
+            except queue.Empty:
+                break
+        if self._owns_translator:
+            self.translator.close()
@@ -0,0 +1,273 @@
+"""Where finished files go: the staging area, atomic publishing and the sharded layout."""
+import contextlib
+import errno
+import hashlib
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from yt_dlp.postprocessor import PostProcessor
+from yt_dlp.postprocessor.movefilesafterdownload import MoveFilesAfterDownloadPP
+
+from .profiling import NullProfiler
+from .subtitles import subtitle_track_language
+from .utils import sanitize_filename
+
+# -----------------------------------------------
+# Staging Area and Atomic Publish
+# -----------------------------------------------
+class StagingArea:
+    """Fast local directory where fragments, .part files, merges and subtitles are processed.
+
+    Passed to yt-dlp as the 'temp' path. Admission reserves each item's
+    working space (download plus merge headroom) until it is published or its
+    pass ends, so concurrent downloads cannot overflow the staging volume
+    together. The reservation is not reduced as files grow, which errs on
+    the side of admitting fewer items at once.
+    """
+    def __init__(self, path, reserve_bytes=0):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.reserve_bytes = reserve_bytes
+        self.reserved = {}
+        self.lock = threading.Lock()
+
+    def reserve(self, key, needed):
+        """Reserve `needed` bytes for an item; return None if it fits, else the bytes available."""
+        with self.lock:
+            available = shutil.disk_usage(self.path).free - sum(self.reserved.values()) - self.reserve_bytes
+            if needed > available:
+                return max(available, 0)
+            self.reserved[key] = needed
+            return None
+
+    def release(self, keys):
+        with self.lock:
+            for key in keys:
+                self.reserved.pop(key, None)
+
+def published_path(info, path):
+    """Where a file written next to the staged download ends up once published."""
+    # '__finaldir' is only set after 'before_dl'; '_filename' is the final media path
+    finaldir = info.get('__finaldir') or (info.get('_filename') and os.path.dirname(os.path.abspath(info['_filename'])))
+    if not finaldir or os.path.dirname(os.path.abspath(path)) == finaldir:
+        return path
+    return os.path.join(finaldir, os.path.basename(path))
+
+def publish_file(src, dst):
+    """Move src to dst so that dst only ever appears complete.
+
+    A rename on the same volume is already atomic. Across volumes the file is
+    copied to a hidden temp name next to dst, synced, and renamed into place.
+    """
+    os.makedirs(os.path.dirname(dst) or '.', exist_ok=True)
+    try:
+        os.replace(src, dst)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+    fd, temp_path = tempfile.mkstemp(prefix='.publish-', dir=os.path.dirname(dst) or '.')
+    try:
+        with os.fdopen(fd, 'wb') as out, open(src, 'rb') as f:
+            shutil.copyfileobj(f, out, 4 * 1024 ** 2)
+            out.flush()
+            os.fsync(out.fileno())
+        shutil.copymode(src, temp_path)  # mkstemp creates it 0600
+        stat = os.stat(src)
+        os.utime(temp_path, (stat.st_atime, stat.st_mtime))  # Keep yt-dlp's upload-date mtime
+        os.replace(temp_path, dst)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(temp_path)
+        raise
+    os.remove(src)
+
+class PublishFilesPP(MoveFilesAfterDownloadPP):
+    """MoveFilesAfterDownloadPP that publishes each finished file atomically.
+
+    yt-dlp's own move uses shutil.move, which leaves a growing partial file
+    at the final path while it copies across volumes. The item's staging
+    reservation is released once its files are published.
+    """
+    def __init__(self, downloader=None, downloaded=True, staging=None, profiler=None):
+        super().__init__(downloader, downloaded)
+        self.staging = staging
+        self.profiler = profiler or NullProfiler()
+
+    def run(self, info):
+        dl_path, dl_name = os.path.split(info['filepath'])
+        finaldir = info.get('__finaldir', dl_path)
+        finalpath = os.path.join(finaldir, dl_name)
+        if self._downloaded:
+            info['__files_to_move'][info['filepath']] = finalpath
+        for oldfile, newfile in info['__files_to_move'].items():
+            newfile = newfile or os.path.join(finaldir, os.path.basename(oldfile))
+            if os.path.abspath(oldfile) == os.path.abspath(newfile):
+                continue
+            if not os.path.exists(oldfile):
+                self.report_warning(f'File "{oldfile}" cannot be found')
+                continue
+            if os.path.exists(newfile) and not self.get_param('overwrites', True):
+                self.report_warning(f'Not publishing "{oldfile}" since "{newfile}" already exists')
+                continue
+            with self.profiler.stage('publish'):
+                publish_file(oldfile, newfile)
+        info['filepath'] = finalpath
+        if self.staging:
+            self.staging.release([info.get('id')])
+        return [], info
+
+# -----------------------------------------------
+# Sharded Layout and Catalog
+# -----------------------------------------------
+CATALOG = os.path.join("Downloaded", ".catalog.sqlite")
+VIEWS_DIR = os.path.join("Downloaded", "_views")
+SHARDED_TEMPLATE = 'Downloaded/_by_id/%(shard)s/%(id)s/%(id)s.%(ext)s'
+
+def shard_for(video_id):
+    """Two hex digits of a hash of the ID: 256 evenly filled shard directories."""
+    return hashlib.sha1(video_id.encode('utf-8')).hexdigest()[:2]
+
+class Catalog:
+    """Video ID -> title, uploader, playlist, files and subtitle languages of the sharded layout.
+
+    Paths are stored relative to the catalog's directory, so the library can be
+    mounted elsewhere. Download threads share one connection under a lock.
+    """
+    def __init__(self, path=CATALOG):
+        self.root = os.path.abspath(os.path.dirname(path) or '.')
+        os.makedirs(self.root, exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS videos (
+                video_id TEXT PRIMARY KEY, title TEXT, uploader TEXT, playlist TEXT, playlist_index INTEGER,
+                added REAL);
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY, video_id TEXT NOT NULL, kind TEXT NOT NULL, lang TEXT);
+            CREATE INDEX IF NOT EXISTS files_video ON files(video_id);
+        """)
+
+    def contains(self, video_id):
+        """True once a media file of the video has been downloaded."""
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM files WHERE video_id = ? AND kind = 'media' LIMIT 1",
+                                     (video_id,)).fetchone() is not None
+
+    def record(self, info, media_path, subtitle_paths=()):
+        video_id = info['id']
+        files = [(os.path.relpath(os.path.abspath(media_path), self.root), video_id, 'media', None)]
+        files.extend(self._subtitle_rows(video_id, subtitle_paths))
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO videos (video_id, title, uploader, playlist, playlist_index, added) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (video_id, info.get('title'), info.get('uploader') or info.get('channel'),
+                 info.get('playlist_title'), info.get('playlist_index'), time.time()))
+            self.conn.executemany("INSERT OR REPLACE INTO files (path, video_id, kind, lang) VALUES (?, ?, ?, ?)",
+                                  files)
+
+    def add_subtitles(self, video_id, paths):
+        """Record subtitle files written after the item was catalogued (batched translations)."""
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO files (path, video_id, kind, lang) VALUES (?, ?, ?, ?)",
+                                  self._subtitle_rows(video_id, paths))
+
+    def _subtitle_rows(self, video_id, paths):
+        return [(os.path.relpath(os.path.abspath(path), self.root), video_id, 'subtitle', subtitle_track_language(path))
+                for path in paths]
+
+    def forget(self, video_ids):
+        """Drop the videos so the next run downloads them again (e.g. after a failed integrity check)."""
+        with self.lock, self.conn:
+            for video_id in video_ids:
+                self.conn.execute("DELETE FROM files WHERE video_id = ?", (video_id,))
+                self.conn.execute("DELETE FROM videos WHERE video_id = ?", (video_id,))
+
+    def prune(self):
+        """Drop files that no longer exist on disk; returns how many."""
+        with self.lock:
+            paths = [row[0] for row in self.conn.execute("SELECT path FROM files")]
+            missing = [(path,) for path in paths if not os.path.exists(os.path.join(self.root, path))]
+            with self.conn:
+                self.conn.executemany("DELETE FROM files WHERE path = ?", missing)
+        return len(missing)
+
+    def videos(self):
+        """Every catalogued video as a dict, with its files as paths relative to the working directory."""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT v.video_id, v.title, v.uploader, v.playlist, v.playlist_index, f.path "
+                "FROM videos v JOIN files f USING (video_id) ORDER BY v.video_id, f.path").fetchall()
+        videos = {}
+        for video_id, title, uploader, playlist, playlist_index, path in rows:
+            video = videos.setdefault(video_id, {'id': video_id, 'title': title, 'uploader': uploader,
+                                                 'playlist': playlist, 'playlist_index': playlist_index,
+                                                 'files': []})
+            video['files'].append(os.path.relpath(os.path.join(self.root, path)))
+        return list(videos.values())
+
+    def close(self):
+        self.conn.close()
+
+class ShardPP(PostProcessor):
+    """Set the `shard` output template field before yt-dlp builds the filename."""
+    def run(self, info):
+        info['shard'] = shard_for(str(info.get('id')))
+        return [], info
+
+class CatalogPP(PostProcessor):
+    """Record the item's published media and subtitle files in the catalog."""
+    def __init__(self, catalog, downloader=None):
+        super().__init__(downloader)
+        self.catalog = catalog
+
+    def run(self, info):
+        path = info.get('filepath')
+        if info.get('id') and path and os.path.exists(path):
+            subtitles = [p for p in info.get('__subtitle_outputs') or [] if os.path.exists(p)]
+            self.catalog.record(info, path, subtitles)
+        return [], info
+
+def link_file(target, link_path):
+    """Relative symlink, or a hard link where symlinks are not allowed (Windows without developer mode)."""
+    os.makedirs(os.path.dirname(link_path), exist_ok=True)
+    try:
+        os.symlink(os.path.relpath(target, os.path.dirname(link_path)), link_path)
+    except OSError:
+        os.link(target, link_path)
+
+def rebuild_views(catalog, views_dir=VIEWS_DIR):
+    """Recreate the human-readable views from the catalog. Returns (links, missing files dropped).
+
+    by-uploader/<uploader>/<title> [<id>].<ext> and, for playlist items,
+    by-playlist/<playlist>/<index> - <title> [<id>].<ext>. The new tree is built
+    next to the old one and swapped in, so the views never show half a rebuild.
+    """
+    missing = catalog.prune()
+    building, retired = views_dir + '.new', views_dir + '.old'
+    shutil.rmtree(building, ignore_errors=True)
+    links = 0
+    for video in catalog.videos():
+        stem = sanitize_filename(f"{video['title'] or video['id']} [{video['id']}]")
+        names = [os.path.join(building, 'by-uploader', sanitize_filename(video['uploader'] or 'Unknown'), stem)]
+        if video['playlist']:
+            index = f"{video['playlist_index']:03d} - " if video['playlist_index'] else ''
+            names.append(os.path.join(building, 'by-playlist', sanitize_filename(video['playlist']), index + stem))
+        for path in video['files']:
+            suffix = os.path.basename(path)[len(video['id']):]  # '.mp4', '.en.srt', ' [10-20].mp4', ...
+            for name in names:
+                link_file(path, name + suffix)
+                links += 1
+    os.makedirs(building, exist_ok=True)
+    shutil.rmtree(retired, ignore_errors=True)
+    if os.path.exists(views_dir):
+        os.rename(views_dir, retired)
+    os.rename(building, views_dir)
+    shutil.rmtree(retired, ignore_errors=True)
+    return links, missing
@@ -0,0 +1,237 @@
+"""SRT files and picking the subtitle track to fetch for each item."""
+import re
+import subprocess
+
+import yt_dlp
+from yt_dlp.postprocessor import PostProcessor
+
+from .events import discard
+from .utils import atomic_write
+
+# -----------------------------------------------
+# SRT Files
+# -----------------------------------------------
+def convert_vtt_to_srt(vtt_file, emit=discard):
+    """Convert VTT to SRT using ffmpeg."""
+    srt_file = vtt_file.rsplit('.', 1)[0] + '.srt'
+    try:
+        cmd = ['ffmpeg', '-y', '-i', vtt_file, srt_file]
+        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        emit('subtitles_converted', "Converted subtitles to", 'success', srt_file, path=srt_file)
+        return srt_file
+    except Exception as e:
+        emit('subtitles_conversion_failed', f"Error converting {vtt_file} to srt", 'error', str(e), path=vtt_file)
+        return None
+
+def clean_srt_duplicates(srt_file, emit=discard):
+    """Remove duplicate or merged lines in SRT files."""
+    with open(srt_file, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    
+    cleaned_blocks = []
+    prev_text = None
+    prev_end_time = None
+    prev_start_time = None
+    index = 1
+    
+    i = 0
+    while i < len(lines):
+        if lines[i].strip().isdigit():  # Start of a subtitle block
+            timing_line = lines[i + 1].split(' align:')[0].strip()
+            start_time, end_time = timing_line.split(' --> ')
+            
+            text_lines = []
+            j = i + 2
+            while j < len(lines) and lines[j].strip() and not lines[j].strip().isdigit():
+                text_lines.append(lines[j].strip())
+                j += 1
+            text = '\n'.join(text_lines)
+            
+            if text == prev_text and prev_end_time == start_time:
+                cleaned_blocks[-1] = f"{index-1}\n{prev_start_time} --> {end_time}\n{prev_text}\n"
+            else:
+                cleaned_blocks.append(f"{index}\n{timing_line}\n{text}\n")
+                prev_text = text
+                prev_end_time = end_time
+                prev_start_time = start_time
+                index += 1
+            
+            i = j
+        else:
+            i += 1
+    
+    with open(srt_file, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(cleaned_blocks))
+    emit('subtitles_cleaned', "Cleaned subtitles saved to", 'success', srt_file, path=srt_file)
+
+def srt_time_to_seconds(value):
+    """Convert an SRT/VTT timestamp ('00:01:02,500') to seconds."""
+    hours, minutes, seconds = value.strip().replace(',', '.').split(':')
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+def seconds_to_srt_time(seconds):
+    """Convert seconds to an SRT timestamp ('00:01:02,500')."""
+    millis = max(0, round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d},{millis:03d}"
+
+def parse_srt(srt_file):
+    """Read an SRT file into a list of {'start', 'end', 'text'} cues (times in seconds)."""
+    with open(srt_file, 'r', encoding='utf-8') as f:
+        content = f.read()
+    cues = []
+    for block in re.split(r'\n\s*\n', content.strip()):
+        lines = block.split('\n')
+        if len(lines) < 3 or ' --> ' not in lines[1]:
+            continue
+        start, end = lines[1].split(' --> ')
+        cues.append({
+            'start': srt_time_to_seconds(start),
+            'end': srt_time_to_seconds(end.split()[0]),
+            'text': '\n'.join(lines[2:]).strip(),
+        })
+    return cues
+
+def write_srt(srt_file, cues):
+    """Write cues to an SRT file, renumbering them from 1."""
+    blocks = [
+        f"{i}\n{seconds_to_srt_time(cue['start'])} --> {seconds_to_srt_time(cue['end'])}\n{cue['text']}\n"
+        for i, cue in enumerate(cues, 1)
+    ]
+    with atomic_write(srt_file) as f:
+        f.write('\n'.join(blocks))
+
+def clip_cues(cues, start, end=None):
+    """Keep cues overlapping [start, end) and shift them so the clip starts at zero."""
+    clipped = []
+    for cue in cues:
+        if cue['end'] <= start or (end is not None and cue['start'] >= end):
+            continue
+        cue_end = cue['end'] if end is None else min(cue['end'], end)
+        clipped.append({
+            'start': max(cue['start'], start) - start,
+            'end': cue_end - start,
+            'text': cue['text'],
+        })
+    return clipped
+
+def clip_srt_file(srt_file, start, end=None, emit=discard):
+    """Clip an SRT file in place to a downloaded section and re-time it."""
+    write_srt(srt_file, clip_cues(parse_srt(srt_file), start or 0, end))
+    emit('subtitles_clipped', "Clipped subtitles to section", 'success', srt_file, path=srt_file)
+
+def subtitle_track_language(path):
+    """Language part of 'name.<lang>.srt' or 'name.<src>-<dst>.ass'."""
+    return path.rsplit('.', 2)[-2]
+
+# -----------------------------------------------
+# Subtitle Track Resolution from the Info Dict
+# -----------------------------------------------
+# Tried in this order (configurable); the first step with a matching track wins
+SUBTITLE_PREFERENCES = ('manual', 'manual-regional', 'auto-original', 'auto-regional', 'auto-translated',
+                        'local-translate')
+
+def base_language(code):
+    return code.split('-')[0].lower()
+
+def is_translated_caption(formats):
+    """YouTube serves machine-translated auto-captions with a tlang= query parameter."""
+    return any('tlang=' in (fmt.get('url') or '') for fmt in formats)
+
+def subtitle_candidates(info, lang, step, allow_auto=True):
+    """(track key, formats) pairs available in the info dict for one preference step."""
+    manual = {k: v for k, v in (info.get('subtitles') or {}).items() if k != 'live_chat' and v}
+    auto = {k: v for k, v in (info.get('automatic_captions') or {}).items() if v} if allow_auto else {}
+    lang, base = lang.lower(), base_language(lang)
+    if step == 'manual':
+        return [(k, v) for k, v in manual.items() if k.lower() == lang]
+    if step == 'manual-regional':
+        return [(k, v) for k, v in manual.items() if base_language(k) == base and k.lower() != lang]
+    original = {k: v for k, v in auto.items() if not is_translated_caption(v)}
+    if step == 'auto-original':
+        return [(k, v) for k, v in original.items() if k.lower() in (lang, f'{lang}-orig')]
+    if step == 'auto-regional':
+        return [(k, v) for k, v in original.items()
+                if base_language(k) == base and k.lower() not in (lang, f'{lang}-orig')]
+    if step == 'auto-translated':
+        return [(k, v) for k, v in auto.items() if k.lower() == lang and is_translated_caption(v)]
+    if step == 'local-translate':
+        # Fetch the video's own track in another language and translate it here
+        return list(manual.items()) + [(k, v) for k, v in original.items() if k.endswith('-orig')]
+    raise ValueError(f"unknown subtitle preference step: {step}")
+
+def pick_subtitle_format(formats, preference='best'):
+    """Choose a format like yt-dlp's `subtitlesformat` ('best' is the last one listed)."""
+    for wanted in (preference or 'best').split('/'):
+        if wanted == 'best':
+            return formats[-1]
+        for fmt in formats:
+            if (fmt.get('ext') or yt_dlp.utils.determine_ext(fmt.get('url'))) == wanted:
+                return fmt
+    return formats[-1]
+
+def resolve_subtitle_track(info, lang, preference=SUBTITLE_PREFERENCES, allow_auto=True, format_preference='best'):
+    """Return the best track for `lang` as {'track', 'kind', 'source_lang', 'format'}, or None."""
+    for step in preference:
+        for key, formats in subtitle_candidates(info, lang, step, allow_auto):
+            fmt = dict(pick_subtitle_format(formats, format_preference))
+            fmt.setdefault('ext', yt_dlp.utils.determine_ext(fmt.get('url')))
+            source_lang = base_language(key) if step == 'local-translate' else lang
+            return {'track': key, 'kind': step, 'source_lang': source_lang, 'format': fmt}
+    return None
+
+def parse_subtitle_preference(value):
+    steps = [step.strip() for step in value.split(',') if step.strip()]
+    unknown = [step for step in steps if step not in SUBTITLE_PREFERENCES]
+    if unknown or not steps:
+        raise ValueError(f"unknown step(s) {', '.join(unknown) or '(none)'}; choose from {', '.join(SUBTITLE_PREFERENCES)}")
+    return steps
+
+def translation_targets(source_lang, subtitle_lang, target_langs, translate):
+    """Languages to translate a fetched track into; a locally translated track also needs subtitle_lang."""
+    targets = list(target_langs) if translate else []
+    if source_lang != subtitle_lang:
+        targets = [subtitle_lang] + [lang for lang in targets if lang != subtitle_lang]
+    return [lang for lang in targets if lang != source_lang]
+
+class SubtitleResolverPP(PostProcessor):
+    """Pick each item's subtitle track from the info dict yt-dlp already fetched.
+
+    Runs at 'pre_process', after yt-dlp's own exact-code match and before any
+    subtitle is downloaded, and replaces `requested_subtitles` with the best
+    match for the preference order, so a playlist needs no second pass when
+    a video only has en-US, en-orig or auto-captions. Every choice is logged.
+    The track is saved under the requested code; a track that has to be
+    translated here is saved under its own language code instead.
+    """
+    def __init__(self, subtitle_lang, allow_auto=True, preference=SUBTITLE_PREFERENCES, emit=discard,
+                 downloader=None):
+        super().__init__(downloader)
+        self.emit = emit
+        self.subtitle_lang = subtitle_lang
+        self.allow_auto = allow_auto
+        self.preference = preference
+        self.choices = {}
+
+    def run(self, info):
+        title = info.get('title') or info.get('id')
+        choice = resolve_subtitle_track(info, self.subtitle_lang, self.preference, self.allow_auto,
+                                        self.get_param('subtitlesformat'))
+        self.choices[info.get('id')] = choice and {k: v for k, v in choice.items() if k != 'format'}
+        if not choice:
+            info['requested_subtitles'] = {}
+            self.emit('subtitle_track_missing', f"[Subtitles] {title}", 'warning',
+                      f"no {self.subtitle_lang} track ({len(info.get('subtitles') or {})} manual, "
+                      f"{len(info.get('automatic_captions') or {})} auto languages available)",
+                      id=info.get('id'), title=title, lang=self.subtitle_lang)
+            return [], info
+        key = choice['source_lang'] if choice['kind'] == 'local-translate' else self.subtitle_lang
+        info['requested_subtitles'] = {key: choice['format']}
+        info['__subtitle_choice'] = self.choices[info.get('id')]
+        note = (f", translated here to {self.subtitle_lang}" if choice['kind'] == 'local-translate' else '')
+        self.emit('subtitle_track_chosen', f"[Subtitles] {title}", 'info', f"{choice['track']} ({choice['kind']}{note})",
+                  id=info.get('id'), title=title, track=choice['track'], track_kind=choice['kind'],
+                  source_lang=choice['source_lang'])
+        return [], info
@@ -0,0 +1,584 @@
+"""Subtitle translation: the translator client, reflow, batching and the translated outputs.
+
+Every function takes the TranslatorClient to use; the client carries the
+translation cache and the rate limiter, so one client (and one Session)
+shares them between all jobs while separate sessions stay independent.
+"""
+import asyncio
+import functools
+import http.client
+import json
+import os
+import queue
+import re
+import threading
+import time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+from googletrans import Translator
+import httpx  # Installed with googletrans
+
+from .events import discard
+from .subtitles import parse_srt, write_srt
+from .utils import atomic_write
+
+# -----------------------------------------------
+# Translator client, cache and rate limiting
+# -----------------------------------------------
+class TranslationResult:
+    """Minimal stand-in for googletrans' Translated: only `.text` is used downstream."""
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+class GoogleBackend:
+    """One googletrans Translator; its httpx client keeps the connection alive between requests."""
+    def __init__(self, timeout):
+        self.translator = Translator(timeout=httpx.Timeout(timeout))  # httpx 0.13 wants a Timeout here
+
+    def translate(self, text, src, dest):
+        return self.translator.translate(text, src=src, dest=dest)
+
+    def close(self):
+        self.translator.client.close()
+
+class HttpBackend:
+    """One keep-alive connection to a LibreTranslate-compatible `POST /translate` endpoint."""
+    def __init__(self, url, timeout):
+        parts = urllib.parse.urlsplit(url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+        self.path = (parts.path.rstrip('/') or '') + '/translate'
+        self.connection = connection_class(parts.hostname, parts.port, timeout=timeout)
+
+    def translate(self, text, src, dest):
+        body = json.dumps({'q': text, 'source': src, 'target': dest, 'format': 'text'}).encode('utf-8')
+        try:
+            self.connection.request('POST', self.path, body, {'Content-Type': 'application/json'})
+            response = self.connection.getresponse()
+            payload = response.read()
+        except (http.client.HTTPException, ConnectionError):
+            # The server dropped an idle keep-alive connection; reconnect once and resend
+            self.connection.close()
+            self.connection.request('POST', self.path, body, {'Content-Type': 'application/json'})
+            response = self.connection.getresponse()
+            payload = response.read()
+        if response.status != 200:
+            raise RuntimeError(f"translator returned HTTP {response.status}: {payload[:200]!r}")
+        return TranslationResult(json.loads(payload)['translatedText'])
+
+    def close(self):
+        self.connection.close()
+
+class TranslatorClient:
+    """Thread-safe translator: a pool of keep-alive backends with a per-request timeout.
+
+    Each call borrows one backend, so a worker pool never shares a googletrans
+    client between threads, and warm connections are reused instead of paying
+    a fresh handshake per batch. With `url` set, requests go to a
+    LibreTranslate-compatible server instead of Google. The client also owns
+    the translation cache and the rate limiter used by everything that
+    translates through it.
+    """
+    def __init__(self, url=None, pool_size=4, timeout=10.0, keep_alive=True, rate=2, cache=None):
+        self.url = url
+        self.cache = cache or TranslationCache()
+        self.limiter = RateLimiter(rate)  # rate=2: the pace of the old fixed 0.5s pause between requests
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.keep_alive = keep_alive
+        self._idle = queue.LifoQueue()  # LIFO: the most recently used connection is the warmest
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _new_backend(self):
+        if self.url:
+            return HttpBackend(self.url, self.timeout)
+        return GoogleBackend(self.timeout)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._created < self.pool_size:
+                self._created += 1
+                return self._new_backend()
+        return self._idle.get()
+
+    def _release(self, backend, broken=False):
+        if broken or not self.keep_alive:
+            backend.close()
+            backend = self._new_backend()
+        self._idle.put(backend)
+
+    def translate(self, text, src='auto', dest='en'):
+        """Translate `text`; raises on timeout instead of hanging the worker."""
+        backend = self._acquire()
+        broken = False
+        try:
+            return backend.translate(text, src, dest)
+        except Exception:
+            broken = True
+            raise
+        finally:
+            self._release(backend, broken)
+
+    async def translate_async(self, text, src='auto', dest='en'):
+        """Awaitable variant; the blocking request runs in the loop's default executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.translate, text, src, dest))
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+class TranslationCache:
+    """Thread-safe (src, dest, text) -> translation memo shared by all translation jobs."""
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, src, dest, text):
+        with self._lock:
+            return self._entries.get((src, dest, text))
+
+    def put(self, src, dest, text, translation):
+        with self._lock:
+            self._entries[(src, dest, text)] = translation
+
+class RateLimiter:
+    """Space out translator requests across all threads to at most `rate` per second."""
+    def __init__(self, rate):
+        self.interval = 1.0 / rate
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Book the next free slot and return how long to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        return slot - now
+
+    def wait(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    async def wait_async(self):
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class TranslationCheckpoint:
+    """Sidecar of finished segment translations for one subtitle file and target.
+
+    Saved after every translated batch, so an interrupted translation resumes
+    from the last completed batch; removed once the final file is written.
+    """
+    def __init__(self, src_file, subtitle_lang, target_lang):
+        self.path = f"{src_file}.{target_lang}.checkpoint.json"
+        self.subtitle_lang = subtitle_lang
+        self.target_lang = target_lang
+        self.segments = {}
+        self._lock = threading.Lock()
+
+    def restore(self, cache):
+        """Load a previous run's translations into `cache`; returns how many were found."""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return 0
+        if (saved.get('source'), saved.get('target')) != (self.subtitle_lang, self.target_lang):
+            return 0
+        self.segments = saved.get('segments', {})
+        for segment, translation in self.segments.items():
+            cache.put(self.subtitle_lang, self.target_lang, segment, translation)
+        return len(self.segments)
+
+    def record(self, pairs):
+        """Add one batch of (segment, translation) pairs and save the sidecar."""
+        with self._lock:
+            self.segments.update(pairs)
+            with atomic_write(self.path) as f:
+                json.dump({'source': self.subtitle_lang, 'target': self.target_lang,
+                           'segments': self.segments}, f, ensure_ascii=False)
+
+    def discard(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+# -----------------------------------------------
+# Sentence reflow and request packing
+# -----------------------------------------------
+# Auto-captions cut sentences across several cues
+SENTENCE_END = re.compile(r'[.!?…。！？]["\'”’)\]]*$')
+MAX_SENTENCE_CUES = 8      # Force a break in unpunctuated captions
+MAX_SENTENCE_GAP = 1.5     # Seconds of silence that also end a sentence
+MAX_REQUEST_CHARS = 4500   # Stay under the translator's 5000 character limit
+
+def reflow_sentences(cues):
+    """Group consecutive cues into sentences. Returns lists of cue indices."""
+    groups, current = [], []
+    for i, cue in enumerate(cues):
+        if current and (cue['start'] - cues[current[-1]]['end'] > MAX_SENTENCE_GAP
+                        or len(current) >= MAX_SENTENCE_CUES):
+            groups.append(current)
+            current = []
+        current.append(i)
+        if SENTENCE_END.search(cue['text']):
+            groups.append(current)
+            current = []
+    if current:
+        groups.append(current)
+    return groups
+
+# Scripts written without spaces between words: Thai, Lao, Myanmar, Khmer, kana and CJK ideographs
+NO_SPACE_SCRIPT_RE = re.compile('[\u0e00-\u0eff\u1000-\u109f\u1780-\u17ff\u3040-\u30ff'
+                                '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]')
+
+def split_proportionally(text, weights):
+    """Split text into len(weights) parts sized like weights, at word boundaries when possible."""
+    if len(weights) == 1:
+        return [text]
+    words = text.split()
+    if len(words) >= len(weights):
+        units, joiner = words, ' '
+    elif NO_SPACE_SCRIPT_RE.search(text):
+        units, joiner = list(text.replace(' ', '')), ''  # Too few "words" only because there are no spaces
+    else:
+        # A short translation: whole words in the first cues, the rest stay empty and are merged by
+        # cues_from_texts()
+        return words + [''] * (len(weights) - len(words))
+    total_units = sum(len(unit) for unit in units) or 1
+    total_weight = sum(weights) or 1
+    parts = [[] for _ in weights]
+    boundary, part, consumed = weights[0] / total_weight, 0, 0
+    for unit in units:
+        midpoint = (consumed + len(unit) / 2) / total_units
+        while midpoint > boundary and part < len(weights) - 1:
+            part += 1
+            boundary += weights[part] / total_weight
+        parts[part].append(unit)
+        consumed += len(unit)
+    return [joiner.join(p) for p in parts]
+
+def pack_segments(segments, max_chars=MAX_REQUEST_CHARS):
+    """Pack segments into newline-joined requests of at most max_chars. Yields index lists."""
+    batch, size = [], 0
+    for i, segment in enumerate(segments):
+        if batch and size + len(segment) + 1 > max_chars:
+            yield batch
+            batch, size = [], 0
+        batch.append(i)
+        size += len(segment) + 1
+    if batch:
+        yield batch
+
+def translate_segments(segments, subtitle_lang, target_lang, client, checkpoint=None):
+    """Translate single-line segments, several per request, preserving order.
+
+    Identical segments are sent once and results are memoized in the client's
+    cache, so repeated lines and repeated runs cost no requests. Each finished
+    batch is also recorded in `checkpoint` when one is given.
+    """
+    cache = client.cache
+    unique = [seg for seg in dict.fromkeys(segments) if cache.get(subtitle_lang, target_lang, seg) is None]
+    for batch in pack_segments(unique):
+        client.limiter.wait()
+        request = '\n'.join(unique[i] for i in batch)
+        lines = client.translate(request, src=subtitle_lang, dest=target_lang).text.split('\n')
+        if len(lines) != len(batch):
+            # The translator merged or split lines: fall back to one request per segment
+            lines = []
+            for i in batch:
+                client.limiter.wait()
+                lines.append(client.translate(unique[i], src=subtitle_lang, dest=target_lang).text)
+        for i, line in zip(batch, lines):
+            cache.put(subtitle_lang, target_lang, unique[i], line.strip())
+        if checkpoint:
+            checkpoint.record({unique[i]: line.strip() for i, line in zip(batch, lines)})
+    return [cache.get(subtitle_lang, target_lang, seg) for seg in segments]
+
+async def translate_segments_async(segments, subtitle_lang, target_lang, client, checkpoint=None):
+    """Awaitable translate_segments: same packing, dedup and cache; requests run concurrently."""
+    cache = client.cache
+    unique = [seg for seg in dict.fromkeys(segments) if cache.get(subtitle_lang, target_lang, seg) is None]
+
+    async def translate_batch(batch):
+        await client.limiter.wait_async()
+        request = '\n'.join(unique[i] for i in batch)
+        lines = (await client.translate_async(request, src=subtitle_lang, dest=target_lang)).text.split('\n')
+        if len(lines) != len(batch):
+            lines = []
+            for i in batch:
+                await client.limiter.wait_async()
+                lines.append((await client.translate_async(unique[i], src=subtitle_lang, dest=target_lang)).text)
+        for i, line in zip(batch, lines):
+            cache.put(subtitle_lang, target_lang, unique[i], line.strip())
+        if checkpoint:
+            checkpoint.record({unique[i]: line.strip() for i, line in zip(batch, lines)})
+
+    # Let every batch finish (and reach the checkpoint) before surfacing the first error
+    results = await asyncio.gather(*(translate_batch(batch) for batch in pack_segments(unique)),
+                                   return_exceptions=True)
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    return [cache.get(subtitle_lang, target_lang, seg) for seg in segments]
+
+def translate_cue_texts(cues, subtitle_lang, target_lang, client, reflow=True, groups=None, checkpoint=None):
+    """Translate cues and return one translated text per source cue (may be empty).
+
+    With reflow, each sentence is translated as one segment and the translation
+    is spread back over the original cue timings in proportion to the length of
+    the source text of each cue. Precomputed sentence groups can be passed in.
+    """
+    if groups is None:
+        groups = reflow_sentences(cues) if reflow else [[i] for i in range(len(cues))]
+    translations = translate_segments(group_segments(cues, groups), subtitle_lang, target_lang, client,
+                                      checkpoint)
+    return spread_translations(cues, groups, translations, target_lang)
+
+def group_segments(cues, groups):
+    """One single-line segment of source text per sentence group."""
+    return [' '.join(cues[i]['text'].replace('\n', ' ') for i in group) for group in groups]
+
+def spread_translations(cues, groups, translations, target_lang):
+    """Spread each group's translation back over its cues; returns one text per cue."""
+    texts = [''] * len(cues)
+    for group, translation in zip(groups, translations):
+        weights = [len(cues[i]['text']) for i in group]
+        for i, text in zip(group, split_proportionally(translation, weights)):
+            if text and target_lang == 'ar':
+                text = "\u202B" + text + "\u202C"  # RTL support for Arabic, per cue
+            texts[i] = text
+    return texts
+
+def translate_cues(cues, subtitle_lang, target_lang, client, reflow=True, groups=None):
+    """Translate cues into a new cue list with the source timings."""
+    return cues_from_texts(cues, translate_cue_texts(cues, subtitle_lang, target_lang, client, reflow, groups))
+
+def cues_from_texts(cues, texts):
+    """Pair translated texts with the source timings, merging cues left without text."""
+    translated = []
+    for cue, text in zip(cues, texts):
+        if not text and translated:
+            translated[-1]['end'] = cue['end']  # Nothing left for this cue, extend the previous one
+            continue
+        translated.append({'start': cue['start'], 'end': cue['end'], 'text': text})
+    return translated
+
+# -----------------------------------------------
+# Translated outputs
+# -----------------------------------------------
+def seconds_to_ass_time(seconds):
+    """Convert seconds to an ASS timestamp ('0:01:02.50')."""
+    centis = max(0, round(seconds * 100))
+    hours, centis = divmod(centis, 360000)
+    minutes, centis = divmod(centis, 6000)
+    secs, centis = divmod(centis, 100)
+    return f"{hours}:{minutes:02d}:{secs:02d}.{centis:02d}"
+
+ASS_HEADER = """[Script Info]
+ScriptType: v4.00+
+PlayResX: 1920
+PlayResY: 1080
+WrapStyle: 0
+
+[V4+ Styles]
+Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding
+Style: Source,Arial,54,&H00FFFFFF,&H000000FF,&H00000000,&H64000000,0,0,0,0,100,100,0,0,1,2,1,2,60,60,50,1
+Style: Translation,Arial,54,&H0000FFFF,&H000000FF,&H00000000,&H64000000,0,0,0,0,100,100,0,0,1,2,1,2,60,60,50,1
+
+[Events]
+Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text
+"""
+
+def write_bilingual_srt(path, cues, translated_texts):
+    """Write source and translation stacked in one cue (source on top)."""
+    write_srt(path, [
+        {'start': cue['start'], 'end': cue['end'], 'text': f"{cue['text']}\n{text}" if text else cue['text']}
+        for cue, text in zip(cues, translated_texts)
+    ])
+
+def write_bilingual_ass(path, cues, translated_texts):
+    """Write source and translation stacked in one ASS event, each with its own style."""
+    events = []
+    for cue, text in zip(cues, translated_texts):
+        body = cue['text'].replace('\n', '\\N')
+        if text:
+            body += '\\N{\\rTranslation}' + text.replace('\n', '\\N')
+        events.append(f"Dialogue: 0,{seconds_to_ass_time(cue['start'])},{seconds_to_ass_time(cue['end'])},"
+                      f"Source,,0,0,0,,{body}")
+    with atomic_write(path) as f:
+        f.write(ASS_HEADER + '\n'.join(events) + '\n')
+
+SUBTITLE_OUTPUTS = ('separate', 'bilingual-srt', 'bilingual-ass')
+
+def write_translation(src_file, subtitle_lang, target_lang, cues, texts, output='separate', emit=discard):
+    """Write one target's translated texts in the chosen output mode and return the path."""
+    if output == 'separate':
+        translated_file = src_file.replace(f'.{subtitle_lang}.srt', f'.{target_lang}.srt')
+        write_srt(translated_file, cues_from_texts(cues, texts))
+    else:
+        ext = 'ass' if output == 'bilingual-ass' else 'srt'
+        translated_file = src_file.replace(f'.{subtitle_lang}.srt', f'.{subtitle_lang}-{target_lang}.{ext}')
+        writer = write_bilingual_ass if ext == 'ass' else write_bilingual_srt
+        writer(translated_file, cues, texts)
+    emit('subtitles_translated', "Translated subtitles saved to", 'success', translated_file,
+         path=translated_file, source=src_file, target_lang=target_lang)
+    return translated_file
+
+def resume_checkpoint(checkpoint, cache, emit=discard):
+    restored = checkpoint.restore(cache)
+    if restored:
+        emit('translation_resumed', f"Resuming {checkpoint.target_lang} translation", 'info',
+             f"{restored} segment(s) already done", path=checkpoint.path, segments=restored)
+
+def report_checkpointed_error(checkpoint, error, emit=discard):
+    emit('translation_failed', f"Error translating subtitles to {checkpoint.target_lang}", 'error', str(error),
+         target_lang=checkpoint.target_lang, checkpoint=checkpoint.path, segments=len(checkpoint.segments))
+    if checkpoint.segments:
+        emit('translation_checkpointed', f"{len(checkpoint.segments)} segment(s) kept in", 'warning',
+             f"{checkpoint.path}; run again to resume.", path=checkpoint.path)
+
+def translate_srt(src_file, subtitle_lang, target_langs, client, reflow=True, output='separate', emit=discard):
+    """Translate an SRT file into one or more languages.
+
+    The file is parsed and reflowed once; every target is then translated
+    concurrently from the same cue set. `output` selects one .<lang>.srt per
+    target ('separate') or stacked source+translation files named
+    .<src>-<lang>.srt / .ass. Returns the list of files written.
+    """
+    if isinstance(target_langs, str):
+        target_langs = [target_langs]
+    try:
+        cues = parse_srt(src_file)
+        groups = reflow_sentences(cues) if reflow else [[i] for i in range(len(cues))]
+    except Exception as e:
+        emit('translation_failed', "Error translating subtitles", 'error', str(e), source=src_file)
+        return []
+
+    def translate_one(target_lang):
+        checkpoint = TranslationCheckpoint(src_file, subtitle_lang, target_lang)
+        try:
+            resume_checkpoint(checkpoint, client.cache, emit)
+            texts = translate_cue_texts(cues, subtitle_lang, target_lang, client, reflow, groups, checkpoint)
+            translated_file = write_translation(src_file, subtitle_lang, target_lang, cues, texts, output, emit)
+            checkpoint.discard()
+            return translated_file
+        except Exception as e:
+            report_checkpointed_error(checkpoint, e, emit)
+            return None
+
+    with ThreadPoolExecutor(max_workers=len(target_langs) or 1) as pool:
+        return [path for path in pool.map(translate_one, target_langs) if path]
+
+async def translate_srt_async(src_file, subtitle_lang, target_langs, client, reflow=True, output='separate',
+                              emit=discard):
+    """Awaitable translate_srt; all targets and batches share the event loop."""
+    try:
+        cues = parse_srt(src_file)
+        groups = reflow_sentences(cues) if reflow else [[i] for i in range(len(cues))]
+    except Exception as e:
+        emit('translation_failed', "Error translating subtitles", 'error', str(e), source=src_file)
+        return []
+    segments = group_segments(cues, groups)
+
+    async def translate_one(target_lang):
+        checkpoint = TranslationCheckpoint(src_file, subtitle_lang, target_lang)
+        try:
+            resume_checkpoint(checkpoint, client.cache, emit)
+            translations = await translate_segments_async(segments, subtitle_lang, target_lang, client, checkpoint)
+            texts = spread_translations(cues, groups, translations, target_lang)
+            translated_file = write_translation(src_file, subtitle_lang, target_lang, cues, texts, output, emit)
+            checkpoint.discard()
+            return translated_file
+        except Exception as e:
+            report_checkpointed_error(checkpoint, e, emit)
+            return None
+
+    return [path for path in await asyncio.gather(*(translate_one(t) for t in target_langs)) if path]
+
+# -----------------------------------------------
+# Cross-file batching
+# -----------------------------------------------
+class SharedCheckpoint:
+    """Checkpoint of a cross-file batch: each finished segment goes to the checkpoint of every file using it."""
+    def __init__(self, owners):
+        self.owners = owners  # segment -> [TranslationCheckpoint]
+
+    def record(self, pairs):
+        by_checkpoint = {}
+        for segment, translation in pairs.items():
+            for checkpoint in self.owners[segment]:
+                by_checkpoint.setdefault(checkpoint, {})[segment] = translation
+        for checkpoint, subset in by_checkpoint.items():
+            checkpoint.record(subset)
+
+def translate_srt_batch(jobs, client, reflow=True, output='separate', emit=discard):
+    """Translate many SRT files with requests shared across files.
+
+    `jobs` is a list of (src_file, subtitle_lang, target_langs). The segments of
+    all files are pooled per language pair, identical lines are sent once and
+    the rest is packed into full-size requests, so a playlist of short clips
+    costs a handful of requests instead of a few per file. Each file is then
+    written from the cache exactly as translate_srt() would write it; anything
+    the shared pass could not translate is retried for that file alone.
+    Per-file checkpoints are kept throughout. Returns {src_file: [files written]}.
+    """
+    files = []
+    for src_file, subtitle_lang, target_langs in jobs:
+        try:
+            cues = parse_srt(src_file)
+            groups = reflow_sentences(cues) if reflow else [[i] for i in range(len(cues))]
+        except Exception as e:
+            emit('translation_failed', "Error translating subtitles", 'error', str(e), source=src_file)
+            continue
+        checkpoints = {}
+        for target_lang in target_langs:
+            checkpoints[target_lang] = TranslationCheckpoint(src_file, subtitle_lang, target_lang)
+            resume_checkpoint(checkpoints[target_lang], client.cache, emit)
+        files.append((src_file, subtitle_lang, cues, groups, group_segments(cues, groups), checkpoints))
+
+    pairs = {}  # (source, target) -> {segment: [checkpoints of the files that contain it]}
+    for _, subtitle_lang, _, _, segments, checkpoints in files:
+        for target_lang, checkpoint in checkpoints.items():
+            owners = pairs.setdefault((subtitle_lang, target_lang), {})
+            for segment in dict.fromkeys(segments):
+                owners.setdefault(segment, []).append(checkpoint)
+
+    def translate_pair(item):
+        (subtitle_lang, target_lang), owners = item
+        try:
+            translate_segments(list(owners), subtitle_lang, target_lang, client, SharedCheckpoint(owners))
+        except Exception as e:
+            emit('batch_translation_failed', f"Shared {target_lang} translation stopped", 'warning',
+                 f"{e}; finishing file by file", target_lang=target_lang)
+
+    with ThreadPoolExecutor(max_workers=len(pairs) or 1) as pool:
+        list(pool.map(translate_pair, pairs.items()))
+
+    written = {}
+    for src_file, subtitle_lang, cues, groups, segments, checkpoints in files:
+        written[src_file] = []
+        for target_lang, checkpoint in checkpoints.items():
+            try:
+                # Served from the cache; only segments the shared pass missed cost a request
+                translations = translate_segments(segments, subtitle_lang, target_lang, client, checkpoint)
+                texts = spread_translations(cues, groups, translations, target_lang)
+                written[src_file].append(write_translation(src_file, subtitle_lang, target_lang, cues, texts,
+                                                           output, emit))
+                checkpoint.discard()
+            except Exception as e:
+                report_checkpointed_error(checkpoint, e, emit)
+    return written
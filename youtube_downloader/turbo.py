@@ -0,0 +1,152 @@
+"""Turbo mode: segmented multi-connection downloads of large progressive files."""
+import functools
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import yt_dlp
+from yt_dlp.downloader.http import HttpFD
+
+from .utils import atomic_write
+
+TURBO_SEGMENT_SIZE = 8 * 1024 ** 2
+TURBO_MIN_SIZE = 32 * 1024 ** 2  # Smaller files are not worth splitting
+DEFAULT_MAX_CONNECTIONS = 16
+
+class SegmentedHttpFD(HttpFD):
+    """Download one progressive HTTP file over several connections with Range requests.
+
+    The file is preallocated and split into TURBO_SEGMENT_SIZE segments,
+    which `turbo_connections` worker threads (the ydl param) fetch and write
+    in place. Finished segments are recorded in a '<file>.segments.json'
+    sidecar, so an interrupted download only fetches the missing segments,
+    and a failed segment resumes from its last written byte. Small files and
+    servers without Range support use the normal single connection. Every
+    request, the size probe included, holds one of the session's
+    `turbo_connections`, which caps open connections across all downloads.
+    """
+    FD_NAME = 'turbo'
+
+    def real_download(self, filename, info_dict):
+        url = info_dict['url']
+        headers = dict(info_dict.get('http_headers') or {}, **{'Accept-Encoding': 'identity'})
+        size = self.probe_size(url, headers)
+        if not size or size < TURBO_MIN_SIZE:
+            return super().real_download(filename, info_dict)
+
+        tmpfilename = f'{filename}.segments.part'
+        state_file = f'{filename}.segments.json'
+        segments = [(start, min(start + TURBO_SEGMENT_SIZE, size) - 1) for start in range(0, size, TURBO_SEGMENT_SIZE)]
+        self.done = self.load_state(state_file, tmpfilename, size)
+        if not self.done:
+            with open(tmpfilename, 'wb') as f:
+                f.truncate(size)  # Preallocate; segments are written at their offsets
+        self.lock = threading.Lock()
+        self.progress = {'filename': filename, 'tmpfilename': tmpfilename, 'total_bytes': size,
+                         'downloaded_bytes': sum(end - start + 1 for i, (start, end) in enumerate(segments)
+                                                 if i in self.done),
+                         'started': time.time(), 'shown': 0.0}
+        self.resumed_bytes = self.progress['downloaded_bytes']
+        todo = [i for i in range(len(segments)) if i not in self.done]
+        workers = max(1, min(self.params.get('turbo_connections') or 1, len(todo)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(self.fetch_segment, url, headers, tmpfilename, state_file, size, i,
+                                       *segments[i], info_dict) for i in todo]
+            errors = [future.exception() for future in futures if future.exception()]
+        if errors:
+            self.report_error(f'{len(errors)} of {len(segments)} segment(s) failed, rerun to resume: {errors[0]}')
+            return False
+        self.try_rename(tmpfilename, filename)
+        self.try_remove(state_file)
+        self._hook_progress({'status': 'finished', 'filename': filename, 'downloaded_bytes': size,
+                             'total_bytes': size, 'elapsed': time.time() - self.progress['started']}, info_dict)
+        return True
+
+    def probe_size(self, url, headers):
+        """Total size if the server honours Range requests, else None."""
+        request = yt_dlp.networking.Request(url, headers=dict(headers, Range='bytes=0-0'))
+        try:
+            with self.ydl.session.turbo_connections, self.ydl.urlopen(request) as response:
+                content_range = response.headers.get('Content-Range') or ''
+                match = re.fullmatch(r'bytes 0-0/(\d+)', content_range.strip())
+                return int(match.group(1)) if response.status == 206 and match else None
+        except (yt_dlp.networking.exceptions.RequestError, OSError):
+            return None
+
+    def load_state(self, state_file, tmpfilename, size):
+        try:
+            with open(state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return set()
+        if (state.get('size'), state.get('segment_size')) != (size, TURBO_SEGMENT_SIZE) \
+                or not os.path.isfile(tmpfilename) or os.path.getsize(tmpfilename) != size:
+            return set()  # Different file or segmentation, start over
+        self.to_screen(f'[turbo] Resuming: {len(state["done"])} segment(s) already downloaded')
+        return set(state['done'])
+
+    def mark_done(self, state_file, size, index):
+        with self.lock:
+            self.done.add(index)
+            with atomic_write(state_file) as f:
+                json.dump({'size': size, 'segment_size': TURBO_SEGMENT_SIZE, 'done': sorted(self.done)}, f)
+
+    def advance(self, count, info_dict):
+        with self.lock:
+            progress = self.progress
+            progress['downloaded_bytes'] += count
+            now = time.time()
+            if now - progress['shown'] < 0.2 and progress['downloaded_bytes'] < progress['total_bytes']:
+                return
+            progress['shown'] = now
+            elapsed = now - progress['started']
+            speed = (progress['downloaded_bytes'] - self.resumed_bytes) / elapsed if elapsed else None
+            status = {key: progress[key] for key in ('filename', 'tmpfilename', 'total_bytes', 'downloaded_bytes')}
+            status.update(status='downloading', elapsed=elapsed, speed=speed,
+                          eta=self.calc_eta(speed, progress['total_bytes'] - progress['downloaded_bytes']))
+        self._hook_progress(status, info_dict)
+
+    def fetch_segment(self, url, headers, tmpfilename, state_file, size, index, start, end, info_dict):
+        position, retries, error = start, self.params.get('retries', 10), None
+        for attempt in range(retries + 1):
+            if attempt:
+                self.to_screen(f'[turbo] Segment {index}: {error}. Retrying ({attempt}/{retries})...')
+                time.sleep(min(2 ** attempt, 30) * random.uniform(0.5, 1))
+            try:
+                with self.ydl.session.turbo_connections, open(tmpfilename, 'r+b') as f:
+                    request = yt_dlp.networking.Request(url, headers=dict(headers, Range=f'bytes={position}-{end}'))
+                    with self.ydl.urlopen(request) as response:
+                        if response.status != 206:
+                            raise OSError(f'server ignored the Range request (HTTP {response.status})')
+                        f.seek(position)
+                        while position <= end:
+                            chunk = response.read(min(256 * 1024, end - position + 1))
+                            if not chunk:
+                                break
+                            f.write(chunk)
+                            position += len(chunk)
+                            self.advance(len(chunk), info_dict)
+                    f.flush()
+                    os.fsync(f.fileno())
+                if position > end:
+                    self.mark_done(state_file, size, index)
+                    return
+                error = 'connection closed early'
+            except (yt_dlp.networking.exceptions.RequestError, OSError) as e:
+                error = e
+        raise yt_dlp.utils.DownloadError(f'segment {index} ({start}-{end}): {error}')
+
+@functools.lru_cache(maxsize=None)
+def capped_fragment_downloader(fd_class):
+    """A subclass of the FragmentFD `fd_class` (DASH, HLS) whose fragment requests hold session connections.
+
+    Concurrent fragments then count against the same `turbo_connections` cap as SegmentedHttpFD.
+    """
+    def _download_fragment(self, *args, **kwargs):
+        with self.ydl.session.turbo_connections:
+            return fd_class._download_fragment(self, *args, **kwargs)
+    return type(f'Capped{fd_class.__name__}', (fd_class,), {'_download_fragment': _download_fragment})
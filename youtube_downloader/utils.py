@@ -0,0 +1,46 @@
+"""Small file and formatting helpers shared by the other modules."""
+import contextlib
+import os
+import re
+import stat
+import tempfile
+
+def sanitize_filename(filename):
+    """Remove invalid characters from filenames."""
+    invalid_chars = r'[<>:"/\\|?*]'
+    return re.sub(invalid_chars, '_', filename)
+
+def _read_umask():
+    umask = os.umask(0)  # Reading it means setting it, so this runs once at import, before any threads
+    os.umask(umask)
+    return umask
+
+# The mode open(path, 'w') gives a new file
+NEW_FILE_MODE = 0o666 & ~_read_umask()
+
+@contextlib.contextmanager
+def atomic_write(path, encoding='utf-8'):
+    """Write through a temp file next to `path`; it replaces `path` only if the block succeeds."""
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', prefix='.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            mode = stat.S_IMODE(os.stat(path).st_mode)  # Rewrites keep the file's mode
+        except FileNotFoundError:
+            mode = NEW_FILE_MODE  # mkstemp creates the temp file 0600
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def format_bytes(num):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if abs(num) < 1024:
+            return f"{num:.1f} {unit}"
+        num /= 1024
+    return f"{num:.1f} TB"
@@ -0,0 +1,343 @@
+"""Watch mode: poll channel feeds for new uploads."""
+import functools
+import gzip
+import http.client
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import urllib.parse
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import yt_dlp
+
+from .config import DownloadConfig
+from .download import batches_translation, retry_transient_failures, run_download, translate_deferred
+from .failures import REPORT_DIR, RETRYABLE_CATEGORIES, report_failures, write_failure_report
+from .planning import DEFAULT_RESERVE_MB
+
+FEED_URL = 'https://www.youtube.com/feeds/videos.xml?channel_id={channel_id}'
+WATCH_STATE = os.path.join("Downloaded", ".watch_state.sqlite")
+DEFAULT_WATCH_INTERVAL = 900    # Seconds between two polls of the same channel
+MAX_WATCH_BACKOFF = 6 * 3600    # Longest wait before polling a failing channel again
+LISTING_FALLBACK_SIZE = 15      # Entries read from the uploads tab when a channel has no feed
+MAX_WATCH_ATTEMPTS = 5          # Rounds a failing upload is downloaded in before it is given up on
+# Failures worth another round; anything else (unavailable, private, members-only...) is final
+WATCH_RETRY_CATEGORIES = RETRYABLE_CATEGORIES | {'disk_space'}
+CHANNEL_ID_RE = re.compile(r'UC[\w-]{22}')
+ATOM_NS = {'atom': 'http://www.w3.org/2005/Atom', 'yt': 'http://www.youtube.com/xml/schemas/2015'}
+
+class WatchState:
+    """Feed validators, backoff and already-seen video IDs of every watched channel (SQLite)."""
+    def __init__(self, path=WATCH_STATE):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS sources (source TEXT PRIMARY KEY, channel_id TEXT NOT NULL);
+            CREATE TABLE IF NOT EXISTS channels (
+                channel_id TEXT PRIMARY KEY, etag TEXT, last_modified TEXT,
+                failures INTEGER NOT NULL DEFAULT 0, next_poll REAL NOT NULL DEFAULT 0,
+                seeded INTEGER NOT NULL DEFAULT 0);
+            CREATE TABLE IF NOT EXISTS seen (
+                channel_id TEXT, video_id TEXT, PRIMARY KEY (channel_id, video_id)) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS retries (video_id TEXT PRIMARY KEY, attempts INTEGER NOT NULL);
+        """)
+
+    def load_config(self):
+        row = self.conn.execute("SELECT value FROM settings WHERE key = 'config'").fetchone()
+        return DownloadConfig.from_dict(json.loads(row[0])) if row else None
+
+    def save_config(self, config):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO settings (key, value) VALUES ('config', ?)",
+                              (json.dumps(config.to_dict(), ensure_ascii=False),))
+
+    def cached_channel_id(self, source):
+        row = self.conn.execute("SELECT channel_id FROM sources WHERE source = ?", (source,)).fetchone()
+        return row[0] if row else None
+
+    def remember_source(self, source, channel_id):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO sources (source, channel_id) VALUES (?, ?)",
+                              (source, channel_id))
+
+    def channels(self, channel_ids):
+        """Return {channel_id: row dict}; channels that were never polled get a fresh row."""
+        wanted = set(channel_ids)
+        rows = {cid: {'channel_id': cid, 'etag': None, 'last_modified': None, 'failures': 0, 'next_poll': 0,
+                      'seeded': 0} for cid in wanted}
+        for row in self.conn.execute(
+                "SELECT channel_id, etag, last_modified, failures, next_poll, seeded FROM channels"):
+            if row[0] in wanted:
+                rows[row[0]] = dict(zip(('channel_id', 'etag', 'last_modified', 'failures', 'next_poll',
+                                         'seeded'), row))
+        return rows
+
+    def seen(self, channel_id, video_ids):
+        """The subset of `video_ids` already recorded for the channel."""
+        if not video_ids:
+            return set()
+        placeholders = ','.join('?' * len(video_ids))
+        return {row[0] for row in self.conn.execute(
+            f"SELECT video_id FROM seen WHERE channel_id = ? AND video_id IN ({placeholders})",
+            [channel_id, *video_ids])}
+
+    def update(self, channel, video_ids=()):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO channels (channel_id, etag, last_modified, failures, next_poll, seeded) "
+            "VALUES (:channel_id, :etag, :last_modified, :failures, :next_poll, :seeded)", channel)
+        self.conn.executemany("INSERT OR IGNORE INTO seen (channel_id, video_id) VALUES (?, ?)",
+                              [(channel['channel_id'], video_id) for video_id in video_ids])
+
+    def record_failures(self, video_ids):
+        """Count one more failed round for each upload; returns {video_id: failed rounds so far}."""
+        self.conn.executemany(
+            "INSERT INTO retries (video_id, attempts) VALUES (?, 1) "
+            "ON CONFLICT (video_id) DO UPDATE SET attempts = attempts + 1", [(video_id,) for video_id in video_ids])
+        return {video_id: self.conn.execute("SELECT attempts FROM retries WHERE video_id = ?",
+                                            (video_id,)).fetchone()[0] for video_id in video_ids}
+
+    def clear_failures(self, video_ids):
+        self.conn.executemany("DELETE FROM retries WHERE video_id = ?", [(video_id,) for video_id in video_ids])
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+class FeedPoller:
+    """Conditional GETs of channel feeds over one keep-alive connection per worker thread."""
+    def __init__(self, feed_url=FEED_URL, timeout=15.0):
+        self.feed_url = feed_url
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self, parts):
+        if getattr(self._local, 'origin', None) != (parts.scheme, parts.netloc):
+            connection_class = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+            self._local.connection = connection_class(parts.hostname, parts.port, timeout=self.timeout)
+            self._local.origin = (parts.scheme, parts.netloc)
+        return self._local.connection
+
+    def fetch(self, channel_id, etag=None, last_modified=None):
+        """Return (status, body, headers); the body is empty for 304 Not Modified."""
+        parts = urllib.parse.urlsplit(self.feed_url.format(channel_id=channel_id))
+        path = parts.path + (f'?{parts.query}' if parts.query else '')
+        headers = {'Accept-Encoding': 'gzip', 'User-Agent': 'Mozilla/5.0'}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        connection = self._connection(parts)
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            payload = response.read()
+        except (http.client.HTTPException, ConnectionError):
+            # The server dropped an idle keep-alive connection; reconnect once and resend
+            connection.close()
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            payload = response.read()
+        if response.getheader('Content-Encoding') == 'gzip':
+            payload = gzip.decompress(payload)
+        return response.status, payload, response.headers
+
+def parse_feed(payload):
+    """(video_id, url) for every entry of a channel's Atom feed, newest first."""
+    entries = []
+    for entry in ET.fromstring(payload).iterfind('atom:entry', ATOM_NS):
+        video_id = entry.findtext('yt:videoId', namespaces=ATOM_NS)
+        link = entry.find("atom:link[@rel='alternate']", ATOM_NS)
+        if video_id:
+            url = link.get('href') if link is not None else None
+            entries.append((video_id, url or f"https://www.youtube.com/watch?v={video_id}"))
+    return entries
+
+def latest_uploads(session, channel_id, limit=LISTING_FALLBACK_SIZE):
+    """First entries of the channel's uploads tab, for channels whose feed is unavailable."""
+    info = session.extract(f"https://www.youtube.com/channel/{channel_id}/videos", playlistend=limit)
+    return [(entry['id'], entry.get('url') or f"https://www.youtube.com/watch?v={entry['id']}")
+            for entry in (info or {}).get('entries') or [] if entry and entry.get('id')]
+
+def poll_channel(session, poller, channel):
+    """Poll one channel. `entries` is None when the feed is unchanged; failures set `error` instead."""
+    try:
+        status, payload, headers = poller.fetch(channel['channel_id'], channel['etag'], channel['last_modified'])
+        if status == 304:
+            return {'entries': None, 'etag': channel['etag'], 'last_modified': channel['last_modified']}
+        if status == 200:
+            return {'entries': parse_feed(payload), 'etag': headers.get('ETag'),
+                    'last_modified': headers.get('Last-Modified')}
+        if status == 404:
+            return {'entries': latest_uploads(session, channel['channel_id']), 'etag': None, 'last_modified': None}
+        retry_after = headers.get('Retry-After', '')
+        return {'error': f"HTTP {status}", 'retry_after': int(retry_after) if retry_after.isdigit() else 0}
+    except (OSError, http.client.HTTPException, ET.ParseError, yt_dlp.utils.YoutubeDLError) as e:
+        return {'error': str(e) or type(e).__name__, 'retry_after': 0}
+
+def next_poll_time(now, interval, failures=0, retry_after=0):
+    """When to poll a channel again: every `interval`, backing off exponentially while it fails."""
+    delay = interval if not failures else min(max(interval, 60) * 2 ** failures, MAX_WATCH_BACKOFF)
+    # Jitter spreads thousands of channels over the interval instead of polling them in bursts
+    return now + max(delay, retry_after) * random.uniform(0.9, 1.1)
+
+def read_watch_list(path):
+    """Channel URLs or IDs, one per line; blank lines and '#' comments are skipped."""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = (line.strip() for line in f)
+        return list(dict.fromkeys(line for line in lines if line and not line.startswith('#')))
+
+def resolve_channel_id(session, source):
+    """The channel ID in a watch-list line, or one flat lookup for handle and custom URLs."""
+    match = CHANNEL_ID_RE.search(source)
+    if match:
+        return match.group(0)
+    try:
+        info = session.extract(source, process=False)
+    except yt_dlp.utils.YoutubeDLError:
+        return None
+    return (info or {}).get('channel_id')
+
+def resolve_watch_list(session, sources, state, pool):
+    """Map watch-list lines to channel IDs; lookups are cached in the watch state."""
+    cached = {source: state.cached_channel_id(source) for source in sources}
+    missing = [source for source, channel_id in cached.items() if not channel_id]
+    for source, channel_id in zip(missing, pool.map(functools.partial(resolve_channel_id, session), missing)):
+        if channel_id:
+            state.remember_source(source, channel_id)
+            cached[source] = channel_id
+        else:
+            session.emit('watch_source_unresolved', "Warning", 'warning', f"No channel found for {source}, skipping.",
+                         source=source)
+    return list(dict.fromkeys(channel_id for channel_id in cached.values() if channel_id))
+
+def round_report_path():
+    """A new failure report path for this watch round, e.g. failed_items-watch-20240101-120000.json."""
+    stem = os.path.join(REPORT_DIR, time.strftime('failed_items-watch-%Y%m%d-%H%M%S'))
+    path, counter = f"{stem}.json", 1
+    while os.path.exists(path):
+        counter += 1
+        path = f"{stem}-{counter}.json"
+    return path
+
+def failed_uploads(failures, queued):
+    """{video_id: failure entry} for the queued uploads still failing after the retry passes."""
+    by_id = {entry.get('id'): entry for entry in failures.values() if entry.get('id')}
+    by_url = {entry.get('url'): entry for entry in failures.values() if entry.get('url')}
+    failed = {}
+    for video_id, url in queued.items():
+        entry = by_id.get(video_id) or by_url.get(url)
+        if entry:
+            failed[video_id] = entry
+    return failed
+
+def settle_failures(session, state, failures, queued):
+    """Decide which failed uploads get another round; returns (their IDs, whether any failure is new).
+
+    Only WATCH_RETRY_CATEGORIES are retried, each in at most MAX_WATCH_ATTEMPTS
+    rounds; every other failure is final and its upload is marked as seen.
+    """
+    failed = failed_uploads(failures, queued)
+    retry = {video_id for video_id, entry in failed.items() if entry['category'] in WATCH_RETRY_CATEGORIES}
+    attempts = state.record_failures(sorted(retry))
+    exhausted = {video_id for video_id, count in attempts.items() if count >= MAX_WATCH_ATTEMPTS}
+    if exhausted:
+        session.emit('watch_retries_exhausted', "Giving up on", 'warning',
+                     f"{len(exhausted)} upload(s) after {MAX_WATCH_ATTEMPTS} failed rounds: "
+                     f"{', '.join(sorted(exhausted))}", ids=sorted(exhausted))
+    state.clear_failures([video_id for video_id in queued if video_id not in retry or video_id in exhausted])
+    # Unmatched failures and final ones are reported once; retried ones only in their first failed round
+    is_new = len(failed) < len(failures) or any(attempts.get(video_id, 1) == 1 for video_id in failed)
+    return retry - exhausted, is_new
+
+def watch_round(session, config, ydl_opts, channel_ids, state, poller, pool, interval=DEFAULT_WATCH_INTERVAL,
+                reserve_bytes=DEFAULT_RESERVE_MB * 1024 ** 2, max_retry_passes=3):
+    """Poll every due channel once, download the new uploads and return the round's counts."""
+    now = time.time()
+    due = [channel for channel in state.channels(channel_ids).values() if channel['next_poll'] <= now]
+    counts = {'polled': len(due), 'unchanged': 0, 'errors': 0, 'seeded': 0, 'new': 0, 'failed': 0}
+    queued, updates, errors = {}, [], []
+    for channel, outcome in zip(due, pool.map(functools.partial(poll_channel, session, poller), due)):
+        if 'error' in outcome:
+            errors.append(f"{channel['channel_id']}: {outcome['error']}")
+            channel['failures'] += 1
+            channel['next_poll'] = next_poll_time(now, interval, channel['failures'], outcome['retry_after'])
+            updates.append((channel, []))
+            continue
+        video_ids = []
+        if outcome['entries'] is None:
+            counts['unchanged'] += 1
+        else:
+            video_ids = [video_id for video_id, _ in outcome['entries']]
+            seen = state.seen(channel['channel_id'], video_ids)
+            if not channel['seeded']:
+                counts['seeded'] += 1  # First poll: the uploads already there are only marked as seen
+            else:
+                for video_id, url in reversed(outcome['entries']):  # Oldest first
+                    if video_id not in seen:
+                        queued.setdefault(video_id, url)
+            channel['seeded'] = 1
+        channel.update(etag=outcome['etag'], last_modified=outcome['last_modified'], failures=0,
+                       next_poll=next_poll_time(now, interval))
+        updates.append((channel, video_ids))
+
+    if errors:
+        session.emit('watch_feeds_failed', f"{len(errors)} feed(s) failed, backing off", 'warning',
+                     f"{'; '.join(errors[:3])}{' ...' if len(errors) > 3 else ''}", errors=errors)
+    if queued:
+        counts['new'] = len(queued)
+        session.emit('watch_new_uploads', f"\n{len(queued)} new upload(s) found. Downloading...\n", 'info',
+                     urls=list(queued.values()))
+        opts = dict(ydl_opts, noplaylist=True)
+        deferred = [] if batches_translation(config) else None
+        failures = run_download(session, config, opts, list(queued.values()), reserve_bytes=reserve_bytes,
+                                deferred=deferred)
+        failures = retry_transient_failures(session, config, opts, failures, {}, max_retry_passes,
+                                            reserve_bytes=reserve_bytes, deferred=deferred)
+        if deferred:
+            translate_deferred(session, config, deferred)
+        counts['failed'] = len(failures)
+        failed, is_new = settle_failures(session, state, failures, queued)
+        report_path = None
+        if failures and is_new:
+            # One report per round with new failures; a retried upload failing again adds no new file
+            report_path = write_failure_report(config, failures, round_report_path())
+        report_failures(session.emit, failures, report_path)
+        if failed:
+            for channel, video_ids in updates:
+                if failed.intersection(video_ids):
+                    # Not marked as seen, and the next poll fetches the full feed to queue them again
+                    video_ids[:] = [video_id for video_id in video_ids if video_id not in failed]
+                    channel.update(etag=None, last_modified=None)
+    # Validators and seen IDs are saved after the downloads, so an interrupted round is polled again
+    for channel, video_ids in updates:
+        state.update(channel, video_ids)
+    state.commit()
+    counts['errors'] = len(errors)
+    return counts
+
+def watch_channels(session, config, ydl_opts, sources, state, poller, workers=16, interval=DEFAULT_WATCH_INTERVAL,
+                   once=False, reserve_bytes=DEFAULT_RESERVE_MB * 1024 ** 2, max_retry_passes=3):
+    """Poll the watched channels until interrupted (a single round with `once`)."""
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        channel_ids = resolve_watch_list(session, sources, state, pool)
+        session.emit('watch_started', f"Watching {len(channel_ids)} channel(s), "
+                     f"polling each every {timedelta(seconds=int(interval))}.", 'info', channels=channel_ids)
+        while True:
+            counts = watch_round(session, config, ydl_opts, channel_ids, state, poller, pool, interval,
+                                 reserve_bytes, max_retry_passes)
+            session.emit('watch_round', f"[{time.strftime('%H:%M:%S')}] Polled {counts['polled']}", 'success',
+                         f"{counts['unchanged']} unchanged, {counts['seeded']} first seen, {counts['new']} new "
+                         f"upload(s), {counts['errors']} error(s)", **counts)
+            if once or not channel_ids:
+                return counts
+            wake = min(channel['next_poll'] for channel in state.channels(channel_ids).values())
+            time.sleep(min(max(wake - time.time(), 1.0), max(interval, 1.0)))